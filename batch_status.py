@@ -3,57 +3,125 @@
 배치 처리 상태 모니터링 도구
 """
 
+import argparse
+import json
 import os
+import sys
 import time
+import urllib.request
 from pathlib import Path
 from datetime import datetime
-import subprocess
 
-def get_batch_status():
-    """배치 처리 상태 확인"""
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from progress import ProgressFeedReader, find_latest_feed, format_duration, tail_lines
+from output_store import read_counts, store_path
+
+REPORTS_DIR = "outputs/reports"
+
+def open_progress_feed(progress_dir="logs"):
+    """최신 진행 상황 피드 리더 생성 (피드가 없으면 None)
+
+    이전 호출이 저장한 오프셋(<피드>.offset)부터 이어서 읽습니다.
+    """
+    feed_path = find_latest_feed(progress_dir)
+    return ProgressFeedReader.resume(feed_path) if feed_path else None
+
+def is_process_alive(pid):
+    """PID에 해당하는 프로세스가 살아 있는지 확인"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def fetch_remote_status(url, timeout=2.0):
+    """실행 중인 파이프라인의 상태 엔드포인트(/status) 조회"""
+    with urllib.request.urlopen(url.rstrip('/') + "/status", timeout=timeout) as response:
+        return json.load(response)
+
+def print_remote_status(urls):
+    """여러 실행의 상태 엔드포인트를 조회하여 실행별 한 줄 요약 출력"""
+    print("📡 실행별 상태 (HTTP 엔드포인트)")
+    print("=" * 60)
+    for url in urls:
+        try:
+            snap = fetch_remote_status(url)
+        except Exception as e:
+            print(f"❌ {url}: 조회 실패 ({e})")
+            continue
+        run = snap['run']
+        progress = snap['progress']
+        llm = snap['llm']
+        p95 = llm['recent_latency_s']['p95']
+        p95_text = f"{p95:.1f}s" if p95 is not None else "-"
+        print(f"▶ {run['name'] or url} [{run['mode']}, PID {run['pid']}, {run['status']}]")
+        print(f"   진행률: {progress['done'] + progress['failed']}/{progress['total']} ({progress['percent']}%), "
+              f"대기: {progress['queue_depth']}, 진행 중: {len(progress['in_flight'])}, 실패: {progress['failed']}")
+        print(f"   LLM: 진행 중 {llm['in_flight']}건, 완료 {llm['calls']}건, 오류 {llm['errors']}건, "
+              f"최근 p95 {p95_text}, 예상 완료: {format_duration(progress['eta_s'])} 후")
+    print("=" * 60)
+
+def get_batch_status(reader=None):
+    """배치 처리 상태 확인
+
+    reader를 넘기면 이전 호출 이후 추가된 진행 이벤트만 읽습니다 (연속 모니터링용).
+    """
+    if reader is None:
+        reader = open_progress_feed()
+
     print("📊 배치 처리 상태 모니터링")
     print("=" * 60)
     
-    # 1. 프로세스 상태 확인
-    try:
-        result = subprocess.run(['ps', 'aux'], capture_output=True, text=True)
-        main_processes = [line for line in result.stdout.split('\n') if 'python src/main.py' in line]
-        
-        if main_processes:
-            print("✅ 배치 프로세스 실행 중:")
-            for proc in main_processes:
-                parts = proc.split()
-                pid = parts[1]
-                cpu = parts[2]
-                mem = parts[3]
-                runtime = parts[9]
-                print(f"   PID: {pid}, CPU: {cpu}%, MEM: {mem}%, Runtime: {runtime}")
-        else:
-            print("❌ 배치 프로세스가 실행되지 않음")
-    except Exception as e:
-        print(f"❌ 프로세스 상태 확인 실패: {e}")
+    # 1. 프로세스 상태 확인 (진행 피드에 기록된 PID 기준)
+    if reader is not None:
+        reader.poll()
+        reader.save()
+    state = reader.state if reader is not None else None
+    if state is not None and state.pid and state.finished_at is None and is_process_alive(state.pid):
+        print(f"✅ 배치 프로세스 실행 중: PID {state.pid}")
+        if state.status_url:
+            print(f"   상태 엔드포인트: {state.status_url}/status")
+    elif state is not None and state.finished_at is None:
+        print(f"❌ 배치 프로세스가 종료되었지만 실행 종료 이벤트가 없음 (PID {state.pid})")
+    else:
+        print("❌ 배치 프로세스가 실행되지 않음")
     
     print()
     
-    # 2. 파일 생성 현황
-    total_data_files = len(list(Path("data/conversation_math").glob("*/chats_*.txt")))
-    
-    md_files = len(list(Path("outputs/reports").glob("**/*.md")))
-    html_files = len(list(Path("outputs/reports").glob("**/*.html")))
-    pdf_files = len(list(Path("outputs/reports").glob("**/*.pdf")))
-    
-    student_md = len(list(Path("outputs/reports/student").glob("*.md")))
-    teacher_md = len(list(Path("outputs/reports/teacher").glob("*.md")))
-    
-    print("📁 파일 생성 현황:")
-    print(f"   전체 대상 파일: {total_data_files}개")
-    print(f"   마크다운 파일: {md_files}개 (학생: {student_md}, 교사: {teacher_md})")
-    print(f"   HTML 파일: {html_files}개")
-    print(f"   PDF 파일: {pdf_files}개")
-    
-    progress = (md_files // 2) / total_data_files * 100 if total_data_files > 0 else 0
-    print(f"   진행률: {progress:.1f}% ({md_files//2}/{total_data_files})")
+    # 출력 저장소 집계 (mode.output_store, 저장된 행 수와 무관하게 일정한 비용): 갱신마다 한 번만 읽음
+    counts = read_counts(store_path(REPORTS_DIR))
+
+    # 2. 진행 현황 (파이프라인이 기록한 구조화 피드 기준)
+    if reader is not None:
+        print(f"📁 진행 현황 ({reader.path}):")
+        print(f"   모드: {state.mode or '알 수 없음'}, 동시 실행: {state.concurrency}")
+        print(f"   전체 작업: {state.total}개")
+        print(f"   완료: {state.done}개, 실패: {state.failed}개, 진행 중: {len(state.in_flight)}개")
+        for job in list(state.in_flight)[:5]:
+            print(f"     ▶ {job}")
+        print(f"   진행률: {state.progress:.1f}% ({state.completed}/{state.total})")
+        if state.duration_count:
+            print(f"   평균 작업 시간: {format_duration(state.mean_duration())}")
+    else:
+        # 피드가 없는 이전 실행: 출력 파일 개수로 추정 (출력 저장소가 있으면 트리 대신 저장소의 집계 사용)
+        total_data_files = len(list(Path("data/conversation_math").glob("*/chats_*.txt")))
+        if counts is not None:
+            md_files = sum(count['reports'] for (_, fmt), count in counts.items() if fmt == 'md')
+        else:
+            md_files = len(list(Path(REPORTS_DIR).glob("**/*.md")))
+        progress = (md_files // 2) / total_data_files * 100 if total_data_files > 0 else 0
+        print("📁 파일 생성 현황 (진행 피드 없음):")
+        print(f"   전체 대상 파일: {total_data_files}개")
+        print(f"   마크다운 파일: {md_files}개")
+        print(f"   진행률: {progress:.1f}% ({md_files//2}/{total_data_files})")
     
+    if counts:
+        print(f"🗄️ 출력 저장소 ({store_path(REPORTS_DIR)}):")
+        for (report_type, fmt), count in sorted(counts.items()):
+            print(f"   {report_type} {fmt}: {count['reports']}개 ({count['bytes'] / 1e6:.1f} MB)")
+
     print()
     
     # 3. 로그 파일 확인
@@ -71,13 +139,11 @@ def get_batch_status():
         last_update = datetime.fromtimestamp(mod_time).strftime("%Y-%m-%d %H:%M:%S")
         print(f"   마지막 업데이트: {last_update}")
         
-        # 최근 로그 내용 (마지막 5줄)
+        # 최근 로그 내용 (마지막 5줄, 파일 끝에서부터 읽음)
         print("   최근 로그 내용:")
         try:
-            with open(latest_log, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                for line in lines[-5:]:
-                    print(f"     {line.strip()}")
+            for line in tail_lines(str(latest_log), 5):
+                print(f"     {line}")
         except Exception as e:
             print(f"     로그 읽기 실패: {e}")
     else:
@@ -85,40 +151,54 @@ def get_batch_status():
     
     print()
     
-    # 4. 예상 완료 시간 계산
-    if md_files > 0:
-        # 평균 처리 시간 추정 (약 1.5분/파일)
-        avg_time_per_file = 1.5  # 분
-        remaining_files = total_data_files - (md_files // 2)
-        estimated_time = remaining_files * avg_time_per_file
-        
-        print(f"⏱️  예상 완료 시간: {estimated_time:.1f}분 후")
-        
-        if estimated_time > 0:
-            completion_time = datetime.now().timestamp() + (estimated_time * 60)
-            completion_str = datetime.fromtimestamp(completion_time).strftime("%Y-%m-%d %H:%M:%S")
-            print(f"   완료 예상 시각: {completion_str}")
+    # 4. 예상 완료 시간 계산 (완료 간격의 지수 가중 이동 평균 기반)
+    if reader is not None:
+        state = reader.state
+        if state.finished_at is not None:
+            print(f"🏁 실행 종료 (상태: {state.status})")
+        else:
+            throughput = state.throughput_per_min()
+            if throughput is not None:
+                print(f"🚀 처리량: {throughput:.2f}작업/분")
+            eta = state.eta_seconds()
+            print(f"⏱️  예상 완료 시간: {format_duration(eta)} 후")
+            if eta:
+                completion_str = datetime.fromtimestamp(time.time() + eta).strftime("%Y-%m-%d %H:%M:%S")
+                print(f"   완료 예상 시각: {completion_str}")
     
     print("=" * 60)
 
-def monitor_continuous():
+def monitor_continuous(urls=None):
     """연속 모니터링 모드"""
     print("🔄 연속 모니터링 모드 시작 (Ctrl+C로 종료)")
     print()
     
+    # 피드 리더를 유지하여 매 갱신마다 새로 추가된 이벤트만 읽음
+    reader = None if urls else open_progress_feed()
     try:
         while True:
             os.system('clear')  # 화면 지우기
-            get_batch_status()
+            if urls:
+                print_remote_status(urls)
+            else:
+                latest_feed = find_latest_feed()
+                if latest_feed and (reader is None or reader.path != latest_feed):
+                    reader = ProgressFeedReader.resume(latest_feed)
+                get_batch_status(reader)
             print("(10초마다 자동 업데이트)")
             time.sleep(10)
     except KeyboardInterrupt:
         print("\n👋 모니터링 종료")
 
 if __name__ == "__main__":
-    import sys
+    parser = argparse.ArgumentParser(description="배치 처리 상태 모니터링")
+    parser.add_argument("--monitor", action="store_true", help="10초마다 자동 갱신")
+    parser.add_argument("--url", nargs="+", help="실행 중인 파이프라인의 상태 엔드포인트 (예: http://127.0.0.1:8765)")
+    args = parser.parse_args()
     
-    if len(sys.argv) > 1 and sys.argv[1] == "--monitor":
-        monitor_continuous()
+    if args.monitor:
+        monitor_continuous(args.url)
+    elif args.url:
+        print_remote_status(args.url)
     else:
-        get_batch_status()
\ No newline at end of file
+        get_batch_status()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Report-mode transcript compaction benchmark.
+
+Builds synthetic student/AI-tutor chat logs with the usual noise (system notices,
+timestamps, repeated student messages, tutor answers pasted twice, very long tutor
+turns), runs src/chat_compaction.py with the report-mode config on them and reports
+token reduction and time per student. Also checks that every student turn survives.
+
+    python benchmarks/chat_compaction.py
+    python benchmarks/chat_compaction.py --students 40 --turns 60 --tutor-words 400
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from omegaconf import OmegaConf  # noqa: E402
+
+from chat_compaction import ChatCompactor  # noqa: E402
+from llm_adapter import LLMAdapter  # noqa: E402
+
+VOCABULARY = (
+    "함수 변수 반복문 조건 리스트 딕셔너리 오류 결과 출력 입력 예제 설명 방법 코드 값 "
+    "function variable loop list index error result output example value return type"
+).split()
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words)) + "."
+
+
+def make_chat(rng: random.Random, args, student: int) -> tuple:
+    """A chat log plus the student messages it contains."""
+    lines = ["[시스템] 대화가 시작되었습니다.", "-----"]
+    student_messages = []
+    previous_answer = None
+    for turn in range(args.turns):
+        stamp = f"[2024-03-{1 + student % 28:02d} {9 + turn // 60:02d}:{turn % 60:02d}] "
+        question = f"질문 {turn}: " + sentence(rng, rng.randint(8, 20))
+        student_messages.append(question)
+        lines.append(f"{stamp}학생: {question}")
+        if rng.random() < args.repeat:
+            lines.append(f"{stamp}학생: {question}")
+        if previous_answer is not None and rng.random() < args.repeat:
+            answer = previous_answer
+        else:
+            long_answer = rng.random() < args.long
+            answer = " ".join(sentence(rng, 12) for _ in range(
+                (args.tutor_words if long_answer else args.tutor_words // 6) // 12 + 1))
+        previous_answer = answer
+        lines.append(f"{stamp}AI 튜터: {answer}")
+        if rng.random() < 0.1:
+            lines.append("System: 응답이 생성되었습니다.")
+    lines.append("[시스템] 대화가 종료되었습니다.")
+    return "\n".join(lines) + "\n", student_messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark report-mode transcript compaction")
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=40, help="student questions per chat")
+    parser.add_argument("--tutor-words", type=int, default=300, help="words in a long tutor answer")
+    parser.add_argument("--long", type=float, default=0.4, help="share of long tutor answers")
+    parser.add_argument("--repeat", type=float, default=0.15, help="chance of a repeated message")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    config = OmegaConf.load(os.path.join(REPO_ROOT, "configs", "mode", "report.yaml"))
+    compactor = ChatCompactor.from_config(config.compaction)
+    rng = random.Random(args.seed)
+    chats = [make_chat(rng, args, s) for s in range(args.students)]
+
+    tokens_before = tokens_after = 0
+    seconds = 0.0
+    missing = 0
+    for text, student_messages in chats:
+        started = time.perf_counter()
+        compacted = compactor.compact(text)
+        seconds += time.perf_counter() - started
+        tokens_before += LLMAdapter.estimate_tokens(text)
+        tokens_after += LLMAdapter.estimate_tokens(compacted)
+        missing += sum(1 for message in student_messages if message not in compacted)
+
+    result = {
+        "students": args.students,
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved_pct": round(100 * (tokens_before - tokens_after) / max(tokens_before, 1), 1),
+        "ms_per_student": round(1000 * seconds / max(args.students, 1), 3),
+        "missing_student_turns": missing,
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{args.students} chats x {args.turns} student turns")
+    print(f"  tokens: ~{tokens_before:,} -> ~{tokens_after:,} (-{result['tokens_saved_pct']}%)")
+    print(f"  time: {result['ms_per_student']:.2f} ms per student")
+    print(f"  student turns lost: {missing}")
+
+
+if __name__ == "__main__":
+    main()
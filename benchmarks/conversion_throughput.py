@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Conversion throughput and CPU utilization: in-thread vs thread pool vs ConversionPool.
+
+Writes a batch of synthetic Markdown reports (headings, lists, tables, inline and
+display math) and converts each to math-aware HTML with conversion_pool's
+render_markdown_file, the job report mode runs per report:
+
+- inline: one after another on the calling thread (conversion_pool.enabled=false, concurrency=1)
+- threads: N threads, as report tasks on the pipeline's thread pool do; the GIL serializes them
+- pool: ConversionPool with N pre-warmed worker processes
+
+For each it reports wall time, reports/s, CPU seconds in this process and in the
+workers, the number of cores kept busy (CPU s / wall s) and, on Linux, per-core
+utilization from /proc/stat.
+
+    python benchmarks/conversion_throughput.py
+    python benchmarks/conversion_throughput.py --reports 1000 --workers 8 --json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conversion_pool import ConversionPool, default_workers, render_markdown_file  # noqa: E402
+from corpus import VOCABULARY  # noqa: E402
+
+
+def make_reports(root: str, reports: int, seed: int = 7) -> list:
+    """`reports` Markdown reports of ~8 sections each; returns their paths."""
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+
+    def sentence(words):
+        return " ".join(rng.choice(VOCABULARY) for _ in range(words)) + "."
+
+    paths = []
+    for i in range(reports):
+        parts = [f"# 학습 분석 보고서 {i}", "---"]
+        for s in range(8):
+            parts.append(f"### {s + 1}. {sentence(3)}")
+            parts.append(" ".join(sentence(14) for _ in range(5)))
+            parts.append(f"학생은 $\\frac{{{rng.randint(1, 9)}}}{{{rng.randint(2, 9)}}} + \\sin\\theta$ 를 계산했습니다.")
+            parts.append(f"$$x_{{{s}}} = \\frac{{-b \\pm \\sqrt{{b^2-4ac}}}}{{2a}}$$")
+            parts.extend(f"- **{sentence(2)}** {sentence(10)}" for _ in range(4))
+            parts.append("| 항목 | 점수 | 비고 |\n|---|---|---|\n" +
+                         "\n".join(f"| {sentence(1)} | {rng.randint(1, 5)} | {sentence(4)} |" for _ in range(4)))
+        path = os.path.join(root, f"report_{i:04d}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(parts) + "\n")
+        paths.append(path)
+    return paths
+
+
+def quiet_render(md_path: str) -> tuple:
+    """render_markdown_file without the converter's per-file console line; also returns the job's CPU seconds."""
+    started = time.thread_time()
+    # Swapping sys.stdout is not thread-safe, so threads rely on measure() silencing the whole batch
+    quiet = contextlib.redirect_stdout(io.StringIO()) if threading.current_thread() is threading.main_thread() \
+        else contextlib.nullcontext()
+    with quiet:
+        written = render_markdown_file(md_path, ["html"])
+    return written, time.thread_time() - started
+
+
+def read_proc_stat() -> list:
+    """(busy, total) jiffies per core from /proc/stat; empty where unavailable."""
+    try:
+        with open("/proc/stat", "r") as f:
+            lines = [line.split() for line in f if line.startswith("cpu") and not line.startswith("cpu ")]
+    except OSError:
+        return []
+    cores = []
+    for fields in lines:
+        values = [int(v) for v in fields[1:]]
+        idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+        cores.append((sum(values) - idle, sum(values)))
+    return cores
+
+
+def core_utilization(before: list, after: list) -> list:
+    return [round((b1 - b0) / (t1 - t0), 2) if t1 > t0 else 0.0 for (b0, t0), (b1, t1) in zip(before, after)]
+
+
+def cpu_seconds(who) -> float:
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+
+def measure(name: str, paths: list, workers: int) -> dict:
+    """Convert every path with the given strategy; CPU figures are deltas over the batch.
+
+    Pool workers are children of the forkserver, not of this process, so their CPU
+    time is the sum of the jobs' own thread CPU time.
+    """
+    pool = ConversionPool(workers).start() if name == "pool" else None
+    own_before = cpu_seconds(resource.RUSAGE_SELF)
+    stat_before = read_proc_stat()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if name == "inline":
+            results = [quiet_render(path) for path in paths]
+        elif name == "threads":
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(quiet_render, paths))
+        else:
+            results = [future.result() for future in [pool.submit(quiet_render, path) for path in paths]]
+    wall = time.perf_counter() - started
+    stat_after = read_proc_stat()
+    own = cpu_seconds(resource.RUSAGE_SELF) - own_before
+    workers_cpu = 0.0
+    if pool is not None:
+        pool.close()
+        workers_cpu = sum(cpu for _, cpu in results)
+    failed = sum(1 for written, _ in results if 'html' not in written)
+    return {
+        "strategy": name,
+        "workers": 1 if name == "inline" else workers,
+        "reports": len(paths),
+        "failed": failed,
+        "wall_s": round(wall, 3),
+        "reports_per_s": round(len(paths) / wall, 1),
+        "cpu_s_orchestrator": round(own, 2),
+        "cpu_s_workers": round(workers_cpu, 2),
+        "cores_busy": round((own + workers_cpu) / wall, 2),
+        "per_core_utilization": core_utilization(stat_before, stat_after),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Markdown->HTML conversion on threads vs worker processes")
+    parser.add_argument("--reports", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=0, help="threads / worker processes (0 = CPUs available)")
+    parser.add_argument("--strategies", nargs="+", default=["inline", "threads", "pool"],
+                        choices=["inline", "threads", "pool"])
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    workers = args.workers or default_workers()
+
+    workdir = tempfile.mkdtemp(prefix="bench_conversion_")
+    try:
+        paths = make_reports(workdir, args.reports)
+        results = [measure(name, paths, workers) for name in args.strategies]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps({"cpus": default_workers(), "results": results}, indent=2))
+        return
+    print(f"{args.reports} reports, {workers} threads/workers, {default_workers()} CPUs available")
+    print(f"{'strategy':<8} {'wall (s)':>9} {'reports/s':>10} {'CPU main':>9} {'CPU workers':>12} {'cores busy':>11}  per-core")
+    for r in results:
+        print(f"{r['strategy']:<8} {r['wall_s']:>9.2f} {r['reports_per_s']:>10.1f} {r['cpu_s_orchestrator']:>9.2f} "
+              f"{r['cpu_s_workers']:>12.2f} {r['cores_busy']:>11.2f}  "
+              + " ".join(f"{u:.0%}" for u in r["per_core_utilization"]))
+        if r["failed"]:
+            print(f"  ⚠️ {r['failed']} conversions failed")
+
+
+if __name__ == "__main__":
+    main()
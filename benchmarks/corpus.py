@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Synthetic input corpora for offline benchmarks, in the layouts each mode reads.
+
+- documents: input directories of markdown drafts with shared section headings
+  (summary and integration modes)
+- report folders: one `<name>_<8hex>/chats_*.txt` folder per student (report mode)
+
+Generation is seeded, so a scenario always runs on the same bytes.
+
+    python benchmarks/corpus.py documents /tmp/corpus --dirs 3 --docs 5
+    python benchmarks/corpus.py report /tmp/chats --students 20
+"""
+
+import argparse
+import os
+import random
+from typing import List
+
+VOCABULARY = (
+    "neural circuit behavior cortex signal model analysis dataset experiment hypothesis response "
+    "stimulus decoding learning network representation method result figure function variable loop "
+    "연구 분석 결과 실험 모델 데이터 가설 방법 신경 행동 학습 표현 네트워크 반응 자극 함수 변수 반복문 조건"
+).split()
+HEADINGS = ["연구 배경", "Research questions", "방법론", "Dataset", "실험 결과", "Decoding analysis",
+            "한계점", "Related work", "향후 계획", "Timeline"]
+STUDENT_NAMES = ["김민준", "이서연", "박도윤", "최하은", "정지호", "강서윤", "조예준", "윤지우", "장시우", "임수아"]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words)) + "."
+
+
+def make_documents(root: str, dirs: int = 2, docs: int = 4, sections: int = 5, paragraphs: int = 3,
+                   words: int = 60, seed: int = 7) -> List[str]:
+    """`dirs` input directories of `docs` markdown drafts each; returns the directory paths."""
+    rng = random.Random(seed)
+    paths = []
+    for d in range(dirs):
+        path = os.path.join(root, f"dir{d:02d}")
+        os.makedirs(path, exist_ok=True)
+        for i in range(docs):
+            parts = [f"# Draft {d}-{i}"]
+            for heading in rng.sample(HEADINGS, k=min(sections, len(HEADINGS))):
+                parts.append(f"## {heading}")
+                parts.extend(_sentence(rng, words) for _ in range(paragraphs))
+            with open(os.path.join(path, f"draft_{i:03d}.md"), "w", encoding="utf-8") as f:
+                f.write("\n\n".join(parts) + "\n")
+        paths.append(path)
+    return paths
+
+
+def make_report_folders(root: str, students: int = 10, chats: int = 2, turns: int = 20,
+                        tutor_words: int = 80, seed: int = 7) -> str:
+    """`students` folders named `<name>_<8hex>` holding `chats` chat logs each; returns `root`."""
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    for s in range(students):
+        name = f"{STUDENT_NAMES[s % len(STUDENT_NAMES)]}{s // len(STUDENT_NAMES) or ''}"
+        folder = os.path.join(root, f"{name}_{rng.getrandbits(32):08x}")
+        os.makedirs(folder, exist_ok=True)
+        for c in range(chats):
+            lines = ["[시스템] 대화가 시작되었습니다."]
+            for turn in range(turns):
+                lines.append(f"학생: 질문 {turn}: {_sentence(rng, rng.randint(6, 18))}")
+                lines.append(f"AI 튜터: {' '.join(_sentence(rng, 12) for _ in range(tutor_words // 12 + 1))}")
+            lines.append("[시스템] 대화가 종료되었습니다.")
+            with open(os.path.join(folder, f"chats_{c + 1}.txt"), "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark corpus")
+    parser.add_argument("layout", choices=["documents", "report"])
+    parser.add_argument("root")
+    parser.add_argument("--dirs", type=int, default=2)
+    parser.add_argument("--docs", type=int, default=4)
+    parser.add_argument("--students", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    if args.layout == "documents":
+        print("\n".join(make_documents(args.root, args.dirs, args.docs, seed=args.seed)))
+    else:
+        print(make_report_folders(args.root, args.students, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate paragraph deduplication benchmark.
+
+Builds a synthetic integration corpus: a set of base paragraphs spread over several
+"draft" documents, with injected exact copies, lightly edited copies (a few words
+changed) and unrelated distractor paragraphs. Runs src/dedup.py on it and reports
+detection precision/recall against the injected ground truth, runtime and token savings.
+
+    python benchmarks/dedup.py
+    python benchmarks/dedup.py --docs 12 --paragraphs 60 --exact 0.3 --near 0.3 --edits 2
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from dedup import deduplicate_documents, split_paragraphs  # noqa: E402
+from llm_adapter import LLMAdapter  # noqa: E402
+
+VOCABULARY = (
+    "neural circuit behavior mouse cortex signal model analysis dataset experiment hypothesis "
+    "response stimulus decoding learning network representation variance method result figure "
+    "baseline control effect significant trial session recording imaging population dynamics "
+    "연구 분석 결과 실험 모델 데이터 가설 방법 신경 행동 학습 표현 네트워크 반응 자극"
+).split()
+
+
+def make_paragraph(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words)) + "."
+
+
+def edit_paragraph(rng: random.Random, paragraph: str, edits: int) -> str:
+    words = paragraph.rstrip(".").split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = rng.choice(VOCABULARY) + "s"
+    return " ".join(words) + "."
+
+
+def make_corpus(args) -> tuple:
+    """Documents plus the set of (doc, paragraph) positions that are injected duplicates."""
+    rng = random.Random(args.seed)
+    base = [make_paragraph(rng, rng.randint(args.min_words, args.max_words)) for _ in range(args.paragraphs)]
+    documents = []
+    injected = set()
+    seen = set()
+    for d in range(args.docs):
+        paragraphs = []
+        for p in rng.sample(range(len(base)), k=min(len(base), args.per_doc)):
+            roll = rng.random()
+            if p in seen and roll < args.exact:
+                text, duplicate = base[p], True
+            elif p in seen and roll < args.exact + args.near:
+                text, duplicate = edit_paragraph(rng, base[p], args.edits), True
+            elif p in seen:
+                text, duplicate = make_paragraph(rng, rng.randint(args.min_words, args.max_words)), False
+            else:
+                text, duplicate = base[p], False
+                seen.add(p)
+            if duplicate:
+                injected.add((d, len(paragraphs)))
+            paragraphs.append(text)
+        documents.append({"filename": f"draft_{d:02d}.md", "content": "\n\n".join(paragraphs) + "\n"})
+    return documents, injected
+
+
+def detected_positions(deduplicated: list) -> set:
+    positions = set()
+    for d, doc in enumerate(deduplicated):
+        for p, paragraph in enumerate(split_paragraphs(doc["content"])):
+            if paragraph.startswith("[중복 단락 생략") or paragraph.startswith("[유사 단락 생략"):
+                positions.add((d, p))
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate paragraph deduplication")
+    parser.add_argument("--docs", type=int, default=8, help="number of draft documents")
+    parser.add_argument("--paragraphs", type=int, default=60, help="distinct base paragraphs")
+    parser.add_argument("--per-doc", type=int, default=30, help="paragraphs per document")
+    parser.add_argument("--exact", type=float, default=0.3, help="share of repeats injected as exact copies")
+    parser.add_argument("--near", type=float, default=0.3, help="share of repeats injected as edited copies")
+    parser.add_argument("--edits", type=int, default=1, help="words changed in an edited copy")
+    parser.add_argument("--min-words", type=int, default=60)
+    parser.add_argument("--max-words", type=int, default=120)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    documents, injected = make_corpus(args)
+    best = None
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        deduplicated, stats = deduplicate_documents(documents, {"threshold": args.threshold})
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    detected = detected_positions(deduplicated)
+    true_positives = len(detected & injected)
+    tokens_before = LLMAdapter.estimate_tokens("\n\n".join(doc["content"] for doc in documents))
+    tokens_after = LLMAdapter.estimate_tokens("\n\n".join(doc["content"] for doc in deduplicated))
+    result = {
+        "documents": stats["documents"],
+        "paragraphs": stats["paragraphs"],
+        "injected_duplicates": len(injected),
+        "exact_duplicates": stats["exact_duplicates"],
+        "near_duplicates": stats["near_duplicates"],
+        "precision": round(true_positives / len(detected), 3) if detected else 1.0,
+        "recall": round(true_positives / len(injected), 3) if injected else 1.0,
+        "seconds": round(best, 4),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved_pct": round(100 * (tokens_before - tokens_after) / max(tokens_before, 1), 1),
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{result['documents']} documents, {result['paragraphs']} paragraphs, "
+          f"{result['injected_duplicates']} injected duplicates ({args.edits} word edit(s) in near copies)")
+    print(f"  detected: {result['exact_duplicates']} exact + {result['near_duplicates']} near "
+          f"(precision {result['precision']:.3f}, recall {result['recall']:.3f})")
+    print(f"  time: {result['seconds'] * 1000:.1f} ms (best of {args.repeat})")
+    print(f"  tokens: ~{tokens_before:,} -> ~{tokens_after:,} (-{result['tokens_saved_pct']}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Directory-parallelism benchmark with a stubbed LLM.
+
+Generates a synthetic corpus (several input directories of markdown documents) and
+runs src/main.py on it at different `concurrency` values. The model call is replaced
+by a stub that sleeps for a fixed latency, so the numbers reflect pipeline scheduling
+only. Each run gets a fresh copy of the corpus so no summaries are reused.
+
+    python benchmarks/directory_parallelism.py
+    python benchmarks/directory_parallelism.py --dirs 5 --docs 4 --latency 0.2 --concurrency 1 2 4 8
+    python benchmarks/directory_parallelism.py --mode integration_v6 --paragraphs 150   # two-step chains
+"""
+
+import argparse
+import json
+import os
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_corpus(root: str, dirs: int, docs: int, paragraphs: int = 40) -> list:
+    paths = []
+    for d in range(dirs):
+        path = os.path.join(root, f"dir{d:02d}")
+        os.makedirs(path, exist_ok=True)
+        for i in range(docs):
+            with open(os.path.join(path, f"doc{i:02d}.md"), "w", encoding="utf-8") as f:
+                f.write(f"# Document {d}-{i}\n\n" + "Synthetic paragraph for benchmarking. " * paragraphs)
+        paths.append(path)
+    return paths
+
+
+def install_stub_llm(latency: float) -> None:
+    """Replace litellm with a stub whose completion() sleeps for `latency` seconds."""
+    def completion(**kwargs):
+        time.sleep(latency)
+        usage = types.SimpleNamespace(prompt_tokens=1000, completion_tokens=200, prompt_tokens_details=None)
+        message = types.SimpleNamespace(content="# Stub report\n\nStub output.")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=usage,
+                                     _hidden_params={})
+
+    def token_counter(model=None, messages=(), text=None):
+        if text is not None:
+            return len(text) // 4
+        return sum(len(m["content"]) for m in messages) // 4
+
+    sys.modules["litellm"] = types.SimpleNamespace(completion=completion, token_counter=token_counter)
+
+
+def run_child(latency: float, overrides: list) -> None:
+    install_stub_llm(latency)
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+    sys.argv = ["src/main.py"] + overrides
+    runpy.run_path(os.path.join(REPO_ROOT, "src", "main.py"), run_name="__main__")
+
+
+def run_once(workdir: str, args, concurrency: int) -> dict:
+    corpus_root = os.path.join(workdir, f"corpus_c{concurrency}")
+    input_dirs = make_corpus(corpus_root, args.dirs, args.docs, args.paragraphs)
+    metrics_dir = os.path.join(workdir, f"metrics_c{concurrency}")
+    overrides = [
+        f"mode={args.mode}",
+        f"mode.input_dirs=[{','.join(input_dirs)}]",
+        "mode.feedback_prompt_path=null",
+        f"concurrency={concurrency}",
+        "progress.enabled=false",
+        f"metrics.output_dir={metrics_dir}",
+        f"hydra.run.dir={os.path.join(workdir, f'hydra_c{concurrency}')}",
+    ]
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(args.latency), "--"] + overrides,
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"run with concurrency={concurrency} failed:\n{result.stderr[-3000:]}")
+    with open(os.path.join(metrics_dir, "metrics.json"), "r", encoding="utf-8") as f:
+        summary = json.load(f)["summary"]
+    return {
+        "concurrency": concurrency,
+        "process_wall_s": round(wall, 2),
+        "run_wall_s": summary["run"]["wall_time_s"],
+        "llm_calls": summary["llm"]["calls"],
+        "directories": {name: job for name, job in summary["jobs"].items() if job["kind"] == "directory"},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark directory-level parallelism with a stubbed LLM")
+    parser.add_argument("--dirs", type=int, default=5, help="number of input directories")
+    parser.add_argument("--docs", type=int, default=4, help="documents per directory")
+    parser.add_argument("--paragraphs", type=int, default=40,
+                        help="sentences per document (~150 with 4 docs makes integration_v6 pick two-step)")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub LLM latency per call (s)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--mode", default="integration", help="mode config to run (summary or integration)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    args, overrides = parser.parse_known_args()
+
+    if args.child is not None:
+        run_child(args.child, [o for o in overrides if o != "--"])
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench_dirs_")
+    try:
+        results = [run_once(workdir, args, c) for c in args.concurrency]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    baseline = results[0]["run_wall_s"]
+    print(f"{args.dirs} directories x {args.docs} documents, stub latency {args.latency}s ({args.mode} mode)")
+    print(f"{'concurrency':>11}  {'calls':>5}  {'run wall (s)':>12}  {'speedup':>7}  {'slowest dir (s)':>15}")
+    for r in results:
+        slowest = max((d["duration_s"] for d in r["directories"].values()), default=0.0)
+        print(f"{r['concurrency']:>11}  {r['llm_calls']:>5}  {r['run_wall_s']:>12.2f}  "
+              f"{baseline / r['run_wall_s']:>6.1f}x  {slowest:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Distributed report run: one process vs a coordinator with N local workers.
+
+Builds a synthetic report-mode corpus (corpus.make_report_folders) and runs it with
+the fake backend, first as one process and then as distributed.role=coordinator
+with `distributed.local_workers` = N. Every process gets the same `concurrency`,
+standing in for one machine's connection limit or one key's rate limit, so N
+workers give N times the in-flight calls. Reports wall time, jobs/s, the jobs each
+worker took, and whether every student's reports were written.
+
+    python benchmarks/distributed_workers.py
+    python benchmarks/distributed_workers.py --students 40 --latency 0.5 --workers 1 2 4 8 --concurrency 2
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from broker import SQLiteBroker  # noqa: E402
+from corpus import make_report_folders  # noqa: E402
+
+
+def run(overrides: list, workdir: str, tag: str) -> dict:
+    """Run src/main.py; returns wall time and the number of student reports written."""
+    reports_dir = os.path.join(workdir, tag, "reports")
+    run_dir = os.path.join(workdir, tag, "hydra")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, os.path.join("src", "main.py")] + overrides + [
+            f"mode.output_base_dir={reports_dir}", "mode.output_formats=[md]", "progress.enabled=false",
+            f"metrics.output_dir={os.path.join(workdir, tag, 'metrics')}", f"hydra.run.dir={run_dir}"],
+        cwd=REPO_ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{tag} failed:\n{result.stderr[-3000:]}")
+    student_dir = os.path.join(reports_dir, "student")
+    reports = len([f for f in os.listdir(student_dir) if f.endswith(".md")]) if os.path.isdir(student_dir) else 0
+    per_worker = {}
+    broker_file = os.path.join(run_dir, "broker.sqlite")
+    if os.path.exists(broker_file):
+        broker = SQLiteBroker(broker_file)
+        for job in broker.jobs('done'):
+            per_worker[job['worker']] = per_worker.get(job['worker'], 0) + 1
+        broker.close()
+    return {"wall_s": round(wall, 2), "reports": reports, "jobs_per_worker": per_worker}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark distributed report runs with local workers")
+    parser.add_argument("--students", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake backend latency per call (s)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrency of every process")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_distributed_")
+    try:
+        corpus = make_report_folders(os.path.join(workdir, "corpus"), students=args.students)
+        overrides = ["mode=report", f"mode.input_dirs=[{corpus}]", "llm.backend=fake",
+                     f"llm.fake.latency_s={args.latency}", f"concurrency={args.concurrency}"]
+        results = [dict(run(overrides, workdir, "single"), workers=0)]
+        for workers in args.workers:
+            results.append(dict(run(overrides + ["distributed.role=coordinator", f"distributed.local_workers={workers}",
+                                                 "distributed.poll_s=0.2"], workdir, f"w{workers}"),
+                                workers=workers))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.students} students, fake latency {args.latency}s, concurrency {args.concurrency} per process")
+    print(f"{'workers':>8} {'wall (s)':>9} {'jobs/s':>7} {'speedup':>8} {'reports':>8}  jobs per worker")
+    for r in results:
+        label = "single" if r["workers"] == 0 else r["workers"]
+        print(f"{label:>8} {r['wall_s']:>9.2f} {args.students / r['wall_s']:>7.2f} "
+              f"{results[0]['wall_s'] / r['wall_s']:>7.1f}x {r['reports']:>8}  "
+              f"{', '.join(f'{w}: {n}' for w, n in sorted(r['jobs_per_worker'].items()))}")
+
+
+if __name__ == "__main__":
+    main()
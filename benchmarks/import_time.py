@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Import-time regression benchmark.
+
+Runs each entry point's import under `python -X importtime` in a fresh interpreter,
+sums the cumulative time of top-level imports minus the interpreter's own startup
+imports, and checks it against
+benchmarks/import_budget.json. Also fails if a forbidden heavy module (e.g. litellm)
+is imported on a path that should never need it.
+
+    python benchmarks/import_time.py            # check against budget
+    python benchmarks/import_time.py --json     # machine-readable results
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(REPO_ROOT, "benchmarks", "import_budget.json")
+
+
+def measure_import(module: str, repeat: int = 3) -> dict:
+    """Best-of-N import time (ms) of `module` and the set of modules it pulled in."""
+    code = "import sys; sys.path[:0] = ['src', '.']"
+    if module:
+        code += f"; import {module}"
+    best_ms = None
+    imported = set()
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                cwd=REPO_ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+        total_us = 0
+        imported = set()
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            imported.add(name.strip())
+            # Top-level entries (no extra indentation) already include their children
+            if not name[1:].startswith(" "):
+                total_us += int(cumulative)
+        total_ms = total_us / 1000
+        best_ms = total_ms if best_ms is None else min(best_ms, total_ms)
+    return {"ms": round(best_ms, 1), "imported": imported}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check entry-point import times against a budget")
+    parser.add_argument("--budget", default=BUDGET_FILE)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with open(args.budget, "r", encoding="utf-8") as f:
+        budget = json.load(f)
+
+    baseline = measure_import("", args.repeat)
+    results = {}
+    failures = []
+    for module, spec in budget["modules"].items():
+        measured = measure_import(module, args.repeat)
+        measured["ms"] = round(max(measured["ms"] - baseline["ms"], 0.0), 1)
+        measured["imported"] -= baseline["imported"]
+        leaked = sorted(m for m in spec.get("forbid", [])
+                        if m in measured["imported"] or any(i.startswith(m + ".") for i in measured["imported"]))
+        over = measured["ms"] > spec["budget_ms"]
+        results[module] = {"ms": measured["ms"], "budget_ms": spec["budget_ms"], "forbidden_imported": leaked}
+        if over:
+            failures.append(f"{module}: {measured['ms']}ms > budget {spec['budget_ms']}ms")
+        if leaked:
+            failures.append(f"{module}: imports forbidden module(s) {', '.join(leaked)}")
+
+    if args.json:
+        print(json.dumps({"baseline_ms": baseline["ms"], "results": results, "failures": failures}, indent=2))
+    else:
+        print(f"Interpreter startup baseline: {baseline['ms']}ms (subtracted)")
+        print(f"{'module':<28}{'import ms':>12}{'budget ms':>12}  forbidden")
+        for module, r in results.items():
+            print(f"{module:<28}{r['ms']:>12.1f}{r['budget_ms']:>12}  {', '.join(r['forbidden_imported']) or '-'}")
+        print()
+        print("\n".join(failures) if failures else "All entry points within budget.")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
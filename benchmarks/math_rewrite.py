@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Math rewriting benchmark: the previous two-regex pass vs the math_markup tokenizer.
+
+Times both on math-heavy synthetic reports and on adversarial inputs (thousands of
+unmatched `$`, `$$` and backtick runs, currency amounts), and counts how often each
+one turns text that is not math (currency, code, escaped dollars) into a formula.
+For the reports, the Markdown conversion that follows is timed too, for scale.
+
+    python benchmarks/math_rewrite.py
+    python benchmarks/math_rewrite.py --sizes 1000 10000 100000 --json
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import VOCABULARY  # noqa: E402
+from math_markup import rewrite_math  # noqa: E402
+
+
+def legacy_rewrite(text: str) -> str:
+    """EnhancedHTMLConverter.convert_math_expressions before the tokenizer."""
+    text = re.sub(r'\$\$([^$]+)\$\$', r'<div class="math-display">\\[\1\\]</div>', text, flags=re.DOTALL)
+    text = re.sub(r'\$([^$\n]+)\$', r'<span class="math-inline">\\(\1\\)</span>', text)
+    return text
+
+
+def math_report(rng: random.Random, lines: int) -> str:
+    out = []
+    for i in range(lines):
+        words = " ".join(rng.choice(VOCABULARY) for _ in range(10))
+        kind = i % 4
+        if kind == 0:
+            out.append(f"{words} $x_{{{i}}} = \\frac{{a}}{{b}} + \\sin\\theta$ {words}")
+        elif kind == 1:
+            out.append(f"$$\\sum_{{k=1}}^{{{i}}} k^2 = \\frac{{n(n+1)(2n+1)}}{{6}}$$")
+        elif kind == 2:
+            out.append(f"- **{words}** `code_{i}` {words}")
+        else:
+            out.append(words)
+    return "\n".join(out)
+
+
+def adversarial(kind: str, size: int) -> str:
+    """Inputs with `size` delimiters and no (or few) valid closers."""
+    if kind == "unmatched_dollars":
+        return " ".join(f"${'a' * 20}" for _ in range(size))
+    if kind == "unmatched_display":
+        return "".join(f"$$ {'b' * 20} $" for _ in range(size))
+    if kind == "unmatched_ticks":
+        return "".join("`" * (i % 7 + 1) + " text $" for i in range(size))
+    if kind == "currency":
+        return " ".join(f"costs ${i}.{i % 100:02d} or ${i + 1}" for i in range(size))
+    raise ValueError(kind)
+
+
+# (input, fragments that must stay text) for the false-positive count
+NOT_MATH = [
+    ("The tutor charged $5 and the book was $10.", ["$5", "$10"]),
+    ("Use `$HOME` and `echo $PATH` in the shell.", ["`$HOME`", "`echo $PATH`"]),
+    ("```\nprice = $a + $b\n```", ["price = $a + $b"]),
+    ("An escaped \\$5 and a formula $x$.", ["5 and a formula"]),
+    ("From $3 to $4 per page", ["$3", "$4"]),
+]
+
+
+def timed(fn, text: str, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark math rewriting: legacy regexes vs the tokenizer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="report lines / adversarial delimiters")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    results = []
+    for size in args.sizes:
+        inputs = {"math_report": math_report(rng, size)}
+        inputs.update({kind: adversarial(kind, size) for kind in
+                       ("unmatched_dollars", "unmatched_display", "unmatched_ticks", "currency")})
+        for name, text in inputs.items():
+            legacy = timed(legacy_rewrite, text, args.repeat)
+            tokenizer = timed(rewrite_math, text, args.repeat)
+            result = {"input": name, "size": size, "kb": round(len(text.encode("utf-8")) / 1024, 1),
+                      "legacy_ms": round(legacy * 1000, 2), "tokenizer_ms": round(tokenizer * 1000, 2),
+                      "tokenizer_mb_per_s": round(len(text) / tokenizer / 1e6, 1) if tokenizer else None}
+            if name == "math_report":
+                import markdown
+                result["markdown_ms"] = round(timed(lambda t: markdown.markdown(t, extensions=['nl2br', 'tables']),
+                                                    rewrite_math(text), 1) * 1000, 1)
+            results.append(result)
+
+    false_positives = {"legacy": 0, "tokenizer": 0}
+    for text, keep in NOT_MATH:
+        for name, fn in (("legacy", legacy_rewrite), ("tokenizer", rewrite_math)):
+            rewritten = fn(text)
+            false_positives[name] += sum(1 for fragment in keep if fragment not in rewritten)
+
+    if args.json:
+        print(json.dumps({"results": results, "false_positives": false_positives}, indent=2))
+        return
+    print(f"{'input':<18} {'size':>7} {'KB':>8} {'legacy (ms)':>12} {'tokenizer (ms)':>15} {'MB/s':>6}  markdown (ms)")
+    for r in results:
+        print(f"{r['input']:<18} {r['size']:>7} {r['kb']:>8.1f} {r['legacy_ms']:>12.2f} {r['tokenizer_ms']:>15.2f} "
+              f"{r['tokenizer_mb_per_s'] or 0:>6.1f}  {r.get('markdown_ms', '')}")
+    print(f"non-math text rewritten as math ({sum(len(k) for _, k in NOT_MATH)} fragments): "
+          f"legacy {false_positives['legacy']}, tokenizer {false_positives['tokenizer']}")
+
+
+if __name__ == "__main__":
+    main()
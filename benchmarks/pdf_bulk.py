@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+PDF rendering: one renderer run per report vs one bulk run per batch.
+
+Writes synthetic reports (conversion_throughput.make_reports), converts them to
+HTML, then prints them to PDF two ways with the renderer PDFGenerator finds
+(wkhtmltopdf, else Chrome):
+
+- per_file: generate_pdf_auto once per report, as report mode does by default
+- bulk: generate_pdf_bulk once for the whole batch (mode.pdf_bulk.enabled=true),
+  and again with --split to also cut it back into per-report files
+
+For each it reports wall time, ms per report and output size.
+
+    python benchmarks/pdf_bulk.py
+    python benchmarks/pdf_bulk.py --reports 40 400 --split --json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conversion_pool import render_markdown_file  # noqa: E402
+from conversion_throughput import make_reports  # noqa: E402
+from pdf_generator import PDFGenerator  # noqa: E402
+
+
+def size_mb(paths: list) -> float:
+    return round(sum(os.path.getsize(path) for path in paths if os.path.exists(path)) / 1e6, 2)
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-report vs bulk PDF rendering")
+    parser.add_argument("--reports", type=int, nargs="+", default=[40, 400])
+    parser.add_argument("--split", action="store_true", help="also time bulk rendering with --split")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    generator = PDFGenerator()
+    renderer = "wkhtmltopdf" if generator.available_tools.get('wkhtmltopdf') else \
+        "chrome" if generator.available_tools.get('chrome') else None
+    if renderer is None:
+        sys.exit("wkhtmltopdf or Chrome/Chromium is required for this benchmark")
+
+    results = []
+    for count in args.reports:
+        root = tempfile.mkdtemp(prefix="pdf_bulk_")
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                html_files = [render_markdown_file(path, ["html"])["html"] for path in make_reports(root, count)]
+            pages = [(os.path.splitext(os.path.basename(path))[0], path) for path in html_files]
+            per_file_pdfs = [os.path.splitext(path)[0] + ".pdf" for path in html_files]
+
+            runs = {"per_file": (lambda: [generator.generate_pdf_auto(html, pdf)
+                                         for html, pdf in zip(html_files, per_file_pdfs)], per_file_pdfs)}
+            bulk_pdf = os.path.join(root, "bulk.pdf")
+            runs["bulk"] = (lambda: generator.generate_pdf_bulk(pages, bulk_pdf), [bulk_pdf])
+            if args.split:
+                split_files = [os.path.join(root, f"split_{name}.pdf") for name, _ in pages]
+                runs["bulk_split"] = (lambda: generator.generate_pdf_bulk(pages, bulk_pdf, split_files),
+                                      [bulk_pdf] + split_files)
+
+            for name, (fn, outputs) in runs.items():
+                elapsed = timed(fn)
+                results.append({"reports": count, "run": name, "renderer": renderer,
+                                "wall_s": round(elapsed, 2), "ms_per_report": round(elapsed / count * 1000, 1),
+                                "output_mb": size_mb(outputs)})
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"renderer: {renderer}")
+    print(f"{'reports':>7} {'run':<11} {'wall (s)':>9} {'ms/report':>10} {'output (MB)':>12}")
+    for r in results:
+        print(f"{r['reports']:>7} {r['run']:<11} {r['wall_s']:>9.2f} {r['ms_per_report']:>10.1f} {r['output_mb']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmarks on synthetic corpora with the fake LLM backend.
+
+Each scenario generates its corpus (benchmarks/corpus.py), runs src/main.py in a
+child process with `llm.backend=fake` (deterministic latency, output size and error
+rate; no API calls) and reports wall-clock, calls/s, peak RSS and per-stage time
+as JSON. Results can be saved as a baseline and later runs compared against it;
+a metric that regresses beyond the tolerance makes the run exit non-zero.
+
+    python benchmarks/pipeline_suite.py
+    python benchmarks/pipeline_suite.py --scenario report_small --latency 0.1
+    python benchmarks/pipeline_suite.py --repeat 3 --save-baseline benchmarks/pipeline_baseline.json
+    python benchmarks/pipeline_suite.py --baseline benchmarks/pipeline_baseline.json --tolerance 0.3
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import make_documents, make_report_folders  # noqa: E402
+
+# name -> (mode config, corpus layout, corpus options, extra overrides)
+SCENARIOS = {
+    "summary": ("summary_v2", "documents", {"dirs": 2, "docs": 6}, []),
+    "integration": ("integration", "documents", {"dirs": 3, "docs": 5}, ["concurrency=4"]),
+    "integration_large": ("integration_v6", "documents", {"dirs": 1, "docs": 40, "paragraphs": 8}, ["concurrency=4"]),
+    "report_small": ("report", "report", {"students": 12}, ["concurrency=4"]),
+    "report_sections": ("report", "report", {"students": 12},
+                        ["concurrency=8", "mode.section_generation.enabled=true"]),
+}
+# Lower is better for every compared metric except calls_per_s. run_wall_s excludes
+# interpreter startup and imports (see import_time.py), which make sub-second runs noisy.
+COMPARED = ("run_wall_s", "calls_per_s", "peak_rss_mb")
+
+
+def run_scenario(name: str, workdir: str, args) -> dict:
+    mode, layout, options, extra = SCENARIOS[name]
+    workdir = tempfile.mkdtemp(prefix=f"{name}_", dir=workdir)
+    corpus_root = os.path.join(workdir, name, "corpus")
+    overrides = [f"mode={mode}"]
+    if layout == "documents":
+        input_dirs = make_documents(corpus_root, seed=args.seed, **options)
+        overrides += [f"mode.input_dirs=[{','.join(input_dirs)}]", "mode.feedback_prompt_path=null"]
+    else:
+        overrides += [f"mode.input_dirs=[{make_report_folders(corpus_root, seed=args.seed, **options)}]",
+                      f"mode.output_base_dir={os.path.join(workdir, name, 'reports')}", "mode.output_formats=[md]"]
+    metrics_dir = os.path.join(workdir, name, "metrics")
+    overrides += [
+        "llm.backend=fake",
+        f"llm.fake.latency_s={args.latency}",
+        f"llm.fake.latency_distribution={args.distribution}",
+        f"llm.fake.output_tokens={args.output_tokens}",
+        f"llm.fake.error_rate={args.error_rate}",
+        f"llm.fake.seed={args.seed}",
+        "progress.enabled=false",
+        f"metrics.output_dir={metrics_dir}",
+        f"hydra.run.dir={os.path.join(workdir, name, 'hydra')}",
+    ] + extra
+
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join("src", "main.py")] + overrides, cwd=REPO_ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    stderr = process.stderr.read()
+    # wait4 gives this child's own resource usage (ru_maxrss is in KB on Linux)
+    _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - started
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"scenario {name} failed:\n{stderr[-3000:]}")
+    with open(os.path.join(metrics_dir, "metrics.json"), "r", encoding="utf-8") as f:
+        summary = json.load(f)["summary"]
+    calls = summary["llm"]["calls"]
+    return {
+        "scenario": name,
+        "mode": mode,
+        "wall_s": round(wall, 3),
+        "run_wall_s": summary["run"]["wall_time_s"],
+        "llm_calls": calls,
+        "llm_errors": summary["llm"]["errors"],
+        "calls_per_s": round(calls / summary["run"]["wall_time_s"], 2) if summary["run"]["wall_time_s"] else 0.0,
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "stages_s": {stage: stats.get("total") for stage, stats in summary["stages"].items()},
+    }
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """Human-readable regressions of `results` against `baseline` (scenario -> result)."""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["scenario"])
+        if previous is None:
+            continue
+        for metric in COMPARED:
+            old, new = previous.get(metric), result[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            worse = -change if metric == "calls_per_s" else change
+            result.setdefault("vs_baseline", {})[metric] = round(change, 3)
+            if worse > tolerance:
+                regressions.append(f"{result['scenario']}: {metric} {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run end-to-end pipeline scenarios with the fake LLM backend")
+    parser.add_argument("--scenario", nargs="+", choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.05, help="median fake call latency (s)")
+    parser.add_argument("--distribution", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--output-tokens", type=int, default=400)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per scenario; the median run is reported")
+    parser.add_argument("--baseline", help="compare against this baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative regression")
+    parser.add_argument("--save-baseline", help="write the results as a baseline JSON")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    try:
+        results = []
+        for name in args.scenario:
+            runs = sorted((run_scenario(name, workdir, args) for _ in range(args.repeat)),
+                          key=lambda r: r["run_wall_s"])
+            results.append(runs[len(runs) // 2])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    settings = {k: getattr(args, k) for k in ("latency", "distribution", "output_tokens", "error_rate", "seed")}
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != settings:
+            print(f"⚠️ baseline was recorded with different fake-backend settings: {baseline.get('settings')}")
+        regressions = compare(results, baseline["scenarios"], args.tolerance)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "scenarios": {r["scenario"]: r for r in results}}, f, ensure_ascii=False, indent=2)
+
+    if args.json:
+        print(json.dumps({"results": results, "regressions": regressions}, ensure_ascii=False, indent=2))
+    else:
+        print(f"fake backend: {args.distribution} latency ~{args.latency}s, ~{args.output_tokens} output tokens, "
+              f"error rate {args.error_rate}")
+        print(f"{'scenario':<18} {'calls':>5} {'wall (s)':>9} {'calls/s':>8} {'RSS (MB)':>9}  slowest stages")
+        for r in results:
+            stages = sorted(r["stages_s"].items(), key=lambda item: -(item[1] or 0))[:3]
+            print(f"{r['scenario']:<18} {r['llm_calls']:>5} {r['wall_s']:>9.2f} {r['calls_per_s']:>8.1f} "
+                  f"{r['peak_rss_mb']:>9.1f}  " + ", ".join(f"{s} {t:.2f}s" for s, t in stages if t is not None))
+        for regression in regressions:
+            print(f"  ⚠️ regression: {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Prompt assembly memory benchmark (tracemalloc).
+
+Builds the integration prompt for a synthetic corpus the previous way (string `+=` in
+a loop, then str.format into the template) and the current way (document_parts
+segments joined once by PromptTemplate.render), then serializes the request body as
+the HTTP client would (json.dumps of the messages). Reports the peak traced memory
+of each approach relative to the corpus size. The documents themselves are loaded
+before tracing starts, as FileHandler has already read them in a real run.
+
+    python benchmarks/prompt_memory.py
+    python benchmarks/prompt_memory.py --docs 200 --doc-kb 500
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from prompt_registry import PromptTemplate, document_parts  # noqa: E402
+
+LINE = "연구 결과와 분석 내용을 정리한 문단입니다. Paragraph of draft text with {braces} and numbers 12345.\n"
+
+
+def make_documents(docs: int, doc_kb: int) -> list:
+    repeats = max(1, doc_kb * 1024 // len(LINE.encode("utf-8")))
+    # Each document gets its own string object, as files read from disk do
+    return [{"filename": f"notes/draft_{i:03d}.md", "content": f"# Draft {i}\n" + LINE * repeats} for i in range(docs)]
+
+
+def previous_prompt(template_text: str, documents: list) -> str:
+    concatenated = ""
+    for doc in documents:
+        filename = os.path.basename(doc['filename'])
+        concatenated += f"--- DOCUMENT: {filename} ---\n\n{doc['content']}\n\n"
+    return template_text.format(documents_concatenated=concatenated)
+
+
+def current_prompt(template: PromptTemplate, documents: list) -> str:
+    return template.render(documents_concatenated=document_parts(documents))
+
+
+def measure(build) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    prompt = build()
+    build_s = time.perf_counter() - started
+    _, prompt_peak = tracemalloc.get_traced_memory()
+    body = json.dumps({"messages": [{"role": "user", "content": prompt}]}, ensure_ascii=False)
+    _, request_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"prompt_chars": len(prompt), "body_chars": len(body), "build_s": build_s,
+            "prompt_peak_mb": prompt_peak / 2 ** 20, "request_peak_mb": request_peak / 2 ** 20}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of prompt assembly")
+    parser.add_argument("--template", default="prompts/integration/integration_analysis_v6.txt")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--doc-kb", type=int, default=200, help="size of each document in KB (UTF-8)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with open(os.path.join(REPO_ROOT, args.template), "r", encoding="utf-8") as f:
+        template_text = f.read()
+    template = PromptTemplate("bench", template_text)
+    documents = make_documents(args.docs, args.doc_kb)
+    corpus_mb = sum(sys.getsizeof(doc["content"]) for doc in documents) / 2 ** 20
+
+    results = {
+        "previous": measure(lambda: previous_prompt(template_text, documents)),
+        "current": measure(lambda: current_prompt(template, documents)),
+    }
+    assert results["previous"]["prompt_chars"] == results["current"]["prompt_chars"]
+    if args.json:
+        print(json.dumps({"corpus_mb": corpus_mb, **results}, indent=2))
+        return
+    print(f"{args.docs} documents, corpus {corpus_mb:.1f} MB in memory")
+    print(f"{'approach':>9}  {'build (s)':>9}  {'peak: prompt (MB)':>17}  {'peak: + request body (MB)':>25}  {'x corpus':>8}")
+    for name, r in results.items():
+        print(f"{name:>9}  {r['build_s']:>9.3f}  {r['prompt_peak_mb']:>17.1f}  {r['request_peak_mb']:>25.1f}  "
+              f"{r['request_peak_mb'] / corpus_mb:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Prompt template rendering benchmark.
+
+Compares str.format on the raw template text (parsed again on every call, as before)
+with the precompiled PromptTemplate.render for payloads from a few KB to several MB,
+and times loading + validating every prompt under prompts/. Payloads contain stray
+braces, which neither path may interpret.
+
+    python benchmarks/prompt_render.py
+    python benchmarks/prompt_render.py --template prompts/integration/integration_analysis_v6.txt --sizes 10 1000 10000
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from prompt_registry import PromptTemplate, PromptTemplateError  # noqa: E402
+
+PAYLOAD_LINE = "분석 결과 {not a field} 와 }{ 같은 중괄호가 포함된 문서 내용입니다. Document text with {braces}.\n"
+
+
+def best_of(repeat: int, fn) -> float:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark precompiled prompt rendering against str.format")
+    parser.add_argument("--template", default="prompts/integration/integration_analysis_v6.txt")
+    parser.add_argument("--field", default="documents_concatenated")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="payload sizes in KB")
+    parser.add_argument("--calls", type=int, default=20, help="renders per measurement")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    template_path = os.path.join(REPO_ROOT, args.template)
+    with open(template_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    compile_s = best_of(args.repeat, lambda: PromptTemplate("bench", text))
+    template = PromptTemplate("bench", text, path=template_path)
+
+    paths = sorted(glob.glob(os.path.join(REPO_ROOT, "prompts", "**", "*.txt"), recursive=True))
+
+    def load_all():
+        invalid = 0
+        for path in paths:
+            try:
+                PromptTemplate.from_file("bench", path)
+            except PromptTemplateError:
+                invalid += 1
+        return invalid
+
+    load_all_s = best_of(args.repeat, load_all)
+    results = []
+    for size_kb in args.sizes:
+        payload = PAYLOAD_LINE * max(1, size_kb * 1024 // len(PAYLOAD_LINE.encode("utf-8")))
+        values = {args.field: payload}
+        assert template.render(**values) == text.format(**values)
+        format_s = best_of(args.repeat, lambda: [text.format(**values) for _ in range(args.calls)]) / args.calls
+        render_s = best_of(args.repeat, lambda: [template.render(**values) for _ in range(args.calls)]) / args.calls
+        results.append({"payload_kb": size_kb, "format_ms": round(format_s * 1000, 4),
+                        "render_ms": round(render_s * 1000, 4), "speedup": round(format_s / render_s, 2)})
+
+    summary = {
+        "template": args.template,
+        "template_chars": len(text),
+        "segments": len(template.segments),
+        "compile_ms": round(compile_s * 1000, 4),
+        "load_all_prompts_ms": round(load_all_s * 1000, 2),
+        "prompt_files": len(paths),
+        "invalid_prompt_files": load_all(),
+        "renders": results,
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+        return
+    print(f"{args.template}: {len(text):,} chars, {len(template.segments)} segments, "
+          f"compiled once in {summary['compile_ms']:.3f} ms")
+    print(f"Loading + validating {len(paths)} prompt files: {summary['load_all_prompts_ms']:.1f} ms "
+          f"({summary['invalid_prompt_files']} invalid)")
+    print(f"{'payload':>10}  {'str.format (ms)':>15}  {'render (ms)':>11}  {'speedup':>7}")
+    for r in results:
+        print(f"{r['payload_kb']:>8}KB  {r['format_ms']:>15.3f}  {r['render_ms']:>11.3f}  {r['speedup']:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
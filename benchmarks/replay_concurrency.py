@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Replay a recorded batch at different concurrency values.
+
+A cassette (llm.backend=record) holds every request/response of a run together with
+its latency, so replaying it (llm.backend=replay) reproduces the provider side of
+that batch exactly: differences in wall-clock come from scheduling alone. Without
+--cassette, a report-mode batch is recorded first from the fake backend on a
+synthetic corpus. Every replay must write the same reports as the recorded run.
+
+    python benchmarks/replay_concurrency.py
+    python benchmarks/replay_concurrency.py --students 30 --latency 0.3 --concurrency 1 4 16 --time-scale 0.5
+    # a real batch, recorded with: python src/main.py mode=report llm.backend=record llm.cassette.path=batch.jsonl
+    python benchmarks/replay_concurrency.py --cassette batch.jsonl -- mode=report mode.input_dirs=[data/chats]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import make_report_folders  # noqa: E402
+
+
+def run_main(overrides: list, workdir: str, tag: str) -> dict:
+    """Run src/main.py with `overrides`; returns the run's metrics summary and a digest of its reports."""
+    reports_dir = os.path.join(workdir, tag, "reports")
+    metrics_dir = os.path.join(workdir, tag, "metrics")
+    result = subprocess.run(
+        [sys.executable, os.path.join("src", "main.py")] + overrides + [
+            f"mode.output_base_dir={reports_dir}", "mode.output_formats=[md]", "progress.enabled=false",
+            f"metrics.output_dir={metrics_dir}", f"hydra.run.dir={os.path.join(workdir, tag, 'hydra')}"],
+        cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{tag} failed:\n{result.stderr[-3000:]}")
+    digest = hashlib.sha256()
+    for root, _, files in sorted(os.walk(reports_dir)):
+        for name in sorted(f for f in files if f.endswith(".md")):
+            with open(os.path.join(root, name), "rb") as f:
+                digest.update(name.encode("utf-8") + f.read())
+    with open(os.path.join(metrics_dir, "metrics.json"), "r", encoding="utf-8") as f:
+        summary = json.load(f)["summary"]
+    return {"summary": summary, "reports_sha256": digest.hexdigest()[:16]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded LLM batch at several concurrency values")
+    parser.add_argument("--cassette", help="replay this cassette instead of recording a synthetic batch")
+    parser.add_argument("--students", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake latency when recording (s)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--time-scale", type=float, default=1.0, help="replay latency multiplier")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args, overrides = parser.parse_known_args()
+    overrides = [o for o in overrides if o != "--"]
+
+    workdir = tempfile.mkdtemp(prefix="bench_replay_")
+    try:
+        cassette = args.cassette
+        recorded = None
+        if cassette is None:
+            corpus = make_report_folders(os.path.join(workdir, "corpus"), students=args.students)
+            overrides = ["mode=report", f"mode.input_dirs=[{corpus}]"] + overrides
+            cassette = os.path.join(workdir, "batch.jsonl")
+            recorded = run_main(overrides + ["llm.backend=record", f"llm.cassette.path={cassette}",
+                                             "llm.cassette.source=fake", f"llm.fake.latency_s={args.latency}",
+                                             "concurrency=1"], workdir, "record")
+        results = []
+        for concurrency in args.concurrency:
+            run = run_main(overrides + ["llm.backend=replay", f"llm.cassette.path={os.path.abspath(cassette)}",
+                                        f"llm.cassette.time_scale={args.time_scale}", f"concurrency={concurrency}"],
+                           workdir, f"replay_c{concurrency}")
+            results.append({
+                "concurrency": concurrency,
+                "run_wall_s": run["summary"]["run"]["wall_time_s"],
+                "llm_calls": run["summary"]["llm"]["calls"],
+                "llm_errors": run["summary"]["llm"]["errors"],
+                "reports_sha256": run["reports_sha256"],
+            })
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    reference = recorded["reports_sha256"] if recorded else results[0]["reports_sha256"]
+    identical = all(r["reports_sha256"] == reference for r in results)
+    if args.json:
+        print(json.dumps({"recorded_wall_s": recorded and recorded["summary"]["run"]["wall_time_s"],
+                          "identical_reports": identical, "replays": results}, indent=2))
+        return
+    if recorded:
+        print(f"recorded {recorded['summary']['llm']['calls']} calls from the fake backend "
+              f"in {recorded['summary']['run']['wall_time_s']:.2f}s (concurrency 1)")
+    print(f"{'concurrency':>11}  {'calls':>5}  {'errors':>6}  {'run wall (s)':>12}  {'speedup':>7}")
+    for r in results:
+        print(f"{r['concurrency']:>11}  {r['llm_calls']:>5}  {r['llm_errors']:>6}  {r['run_wall_s']:>12.2f}  "
+              f"{results[0]['run_wall_s'] / r['run_wall_s']:>6.1f}x")
+    print(f"reports identical across replays: {'yes' if identical else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
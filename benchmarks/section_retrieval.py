@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Section retrieval (BM25 index) benchmark for oversized integration inputs.
+
+Generates a synthetic vault of markdown drafts that share a set of section headings,
+then measures a cold index build, a no-change reload, an incremental update after one
+file changes, and the top-k selection. Prompt size stays bounded by the token budget
+however large the vault grows.
+
+    python benchmarks/section_retrieval.py
+    python benchmarks/section_retrieval.py --docs 200 --sections 12 --budget 60000
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from file_handler import FileHandler  # noqa: E402
+
+VOCABULARY = (
+    "neural circuit behavior mouse cortex signal model analysis dataset experiment hypothesis "
+    "response stimulus decoding learning network representation variance method result figure "
+    "연구 분석 결과 실험 모델 데이터 가설 방법 신경 행동 학습 표현 네트워크 반응 자극"
+).split()
+HEADINGS = ["연구 배경", "Research questions", "방법론", "Dataset", "실험 결과", "Decoding analysis",
+            "한계점", "Related work", "향후 계획", "Timeline", "예산", "References"]
+
+
+def make_vault(root: str, args) -> None:
+    rng = random.Random(args.seed)
+    for d in range(args.docs):
+        parts = [f"# Draft {d}"]
+        for heading in rng.sample(HEADINGS, k=min(args.sections, len(HEADINGS))):
+            parts.append(f"## {heading}")
+            for _ in range(args.paragraphs):
+                parts.append(" ".join(rng.choice(VOCABULARY) for _ in range(args.words)) + f" ({heading}).")
+        with open(os.path.join(root, f"draft_{d:03d}.md"), "w", encoding="utf-8") as f:
+            f.write("\n\n".join(parts) + "\n")
+
+
+def timed(fn):
+    started = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BM25 section index used for oversized integrations")
+    parser.add_argument("--docs", type=int, default=60)
+    parser.add_argument("--sections", type=int, default=8, help="sections per document")
+    parser.add_argument("--paragraphs", type=int, default=3, help="paragraphs per section")
+    parser.add_argument("--words", type=int, default=80, help="words per paragraph")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--budget", type=int, default=40000, help="token budget for selected sections")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_retrieval_")
+    try:
+        make_vault(root, args)
+        handler = FileHandler(root)
+        index_path = os.path.join(root, "section_index.json")
+        documents = handler.read_markdown_files()
+
+        (index, cold), cold_s = timed(lambda: handler.load_section_index(index_path, documents))
+        (_, warm), warm_s = timed(lambda: handler.load_section_index(index_path, documents))
+        documents[0] = dict(documents[0], content=documents[0]['content'] + "\n\nEdited paragraph.\n")
+        (index, incremental), incremental_s = timed(lambda: handler.load_section_index(index_path, documents))
+        (selected, stats), select_s = timed(lambda: index.select([], args.top_k, args.budget))
+        result = {
+            "documents": len(documents),
+            "sections": stats["sections"],
+            "index_kb": round(os.path.getsize(index_path) / 1024, 1),
+            "cold_build_s": round(cold_s, 3),
+            "reload_s": round(warm_s, 3),
+            "incremental_s": round(incremental_s, 3),
+            "files_reindexed": incremental["added"] + incremental["updated"],
+            "select_s": round(select_s, 4),
+            "queries": stats["queries"],
+            "selected_sections": stats["selected"],
+            "tokens_total": stats["tokens_total"],
+            "tokens_selected": stats["tokens_selected"],
+        }
+        assert cold["added"] == len(documents) and warm["reused"] == len(documents)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{result['documents']} documents, {result['sections']} sections, index {result['index_kb']} KB")
+    print(f"  cold build: {result['cold_build_s'] * 1000:.0f} ms, reload: {result['reload_s'] * 1000:.0f} ms, "
+          f"one file changed: {result['incremental_s'] * 1000:.0f} ms ({result['files_reindexed']} re-indexed)")
+    print(f"  selection: {result['selected_sections']} sections for {result['queries']} headings "
+          f"in {result['select_s'] * 1000:.1f} ms")
+    print(f"  prompt tokens: ~{result['tokens_total']:,} -> ~{result['tokens_selected']:,} (budget {args.budget:,})")
+
+
+if __name__ == "__main__":
+    main()
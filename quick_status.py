@@ -3,38 +3,49 @@
 빠른 상태 확인 도구
 """
 
-import subprocess
-from pathlib import Path
-
-def quick_status():
-    # 파일 개수 확인
-    md_files = len(list(Path("outputs/reports").glob("**/*.md")))
-    total_files = 41
-    completed = md_files // 2
-    progress = (completed / total_files) * 100
-    
-    # 로그에서 현재 처리 중인 학생 찾기
-    try:
-        with open("logs/batch_report_20250716_214813.log", "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            for line in reversed(lines):
-                if "Processing:" in line:
-                    current_student = line.split("Processing: ")[1].split(" (ID:")[0]
-                    break
-            else:
-                current_student = "알 수 없음"
-    except:
-        current_student = "알 수 없음"
-    
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from progress import ProgressFeedReader, find_latest_feed, format_duration
+
+def quick_status(feed_path=None, brief=False):
+    # 파이프라인이 기록한 진행 상황 피드 읽기 (지정하지 않으면 최신 피드)
+    feed_path = feed_path or find_latest_feed("logs")
+    if feed_path is None or not os.path.exists(feed_path):
+        print("📊 빠른 상태 확인")
+        print("진행 상황 피드(logs/progress_*.jsonl)가 없습니다.")
+        return
+
+    # 저장된 오프셋부터 새 이벤트만 읽고 다시 저장 (실행 시간과 무관하게 일정한 비용)
+    reader = ProgressFeedReader.resume(feed_path)
+    reader.poll()
+    reader.save()
+    state = reader.state
+
+    if brief:
+        eta = "종료" if state.finished_at is not None else format_duration(state.eta_seconds())
+        print(f"📊 진행률: {state.completed}/{state.total} ({state.progress:.0f}%), "
+              f"진행 중: {len(state.in_flight)}, 실패: {state.failed}, 예상 완료: {eta}")
+        return
+
+    current = ", ".join(state.in_flight) if state.in_flight else "없음"
+
     print(f"📊 빠른 상태 확인")
-    print(f"진행률: {progress:.1f}% ({completed}/{total_files})")
-    print(f"현재 처리 중: {current_student}")
-    print(f"남은 학생 수: {total_files - completed}명")
-    
-    # 예상 완료 시간
-    remaining = total_files - completed
-    est_minutes = remaining * 1.5
-    print(f"예상 완료: {est_minutes:.0f}분 후")
+    print(f"진행률: {state.progress:.1f}% ({state.completed}/{state.total})")
+    print(f"현재 처리 중: {current}")
+    print(f"남은 작업 수: {state.remaining}개 (실패: {state.failed}개)")
+
+    # 예상 완료 시간 (최근 처리량 기반)
+    if state.finished_at is not None:
+        print(f"실행 종료 (상태: {state.status})")
+    else:
+        print(f"예상 완료: {format_duration(state.eta_seconds())} 후")
 
 if __name__ == "__main__":
-    quick_status()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="배치 진행 상황 빠른 확인")
+    parser.add_argument("--feed", help="진행 상황 피드 경로 (기본: logs/ 의 최신 progress_*.jsonl)")
+    parser.add_argument("--brief", action="store_true", help="한 줄 요약 출력")
+    args = parser.parse_args()
+    quick_status(args.feed, args.brief)
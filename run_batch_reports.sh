@@ -9,11 +9,13 @@ mkdir -p logs
 # 현재 시간 기록
 TIMESTAMP=$(date "+%Y%m%d_%H%M%S")
 LOG_FILE="logs/batch_report_${TIMESTAMP}.log"
+PROGRESS_FILE="logs/progress_${TIMESTAMP}.jsonl"
 
 echo "📝 로그 파일: $LOG_FILE"
+echo "📈 진행 피드: $PROGRESS_FILE"
 
 # 백그라운드에서 실행
-nohup python src/main.py > "$LOG_FILE" 2>&1 &
+nohup python src/main.py progress.path="$PROGRESS_FILE" > "$LOG_FILE" 2>&1 &
 PID=$!
 
 echo "🔄 프로세스 ID: $PID"
@@ -24,14 +26,9 @@ echo "📈 진행 상황 모니터링 (Ctrl+C로 종료)"
 echo "=================================="
 
 while kill -0 $PID 2>/dev/null; do
-    # 완료된 학생 수 계산
-    COMPLETED=$(grep -c "Completed processing:" "$LOG_FILE" 2>/dev/null || echo "0")
-    TOTAL=$(ls -d data/conversation_math/*/ 2>/dev/null | wc -l)
-    
-    # 진행률 계산
-    if [ "$TOTAL" -gt 0 ]; then
-        PROGRESS=$((COMPLETED * 100 / TOTAL))
-        echo "📊 진행률: $COMPLETED/$TOTAL ($PROGRESS%)"
+    # 진행 피드에서 새로 추가된 이벤트만 읽어 진행률 표시 (로그 전체를 다시 읽지 않음)
+    if [ -f "$PROGRESS_FILE" ]; then
+        python quick_status.py --feed "$PROGRESS_FILE" --brief
     fi
     
     sleep 10
@@ -0,0 +1,209 @@
+# src/broker.py
+"""
+Job broker for distributed runs (distributed.role=coordinator / worker).
+
+The coordinator enqueues one job per student (report mode) or input directory
+(other modes) and seals the queue. Workers claim jobs in batches under a lease,
+renew the lease while they work, and record each job as done or failed together
+with a small result (worker, duration, error).
+
+A job whose lease runs out was held by a worker that died or lost the broker. The
+next claim takes it back and retries it, up to `max_attempts` claims.
+
+SQLiteBroker is the local implementation: one SQLite file in WAL mode that
+processes on the same host, or hosts sharing a filesystem with working locks,
+can open. A networked broker only needs the same methods.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',  -- queued | running | done | failed
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    seq INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, seq);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class SQLiteBroker:
+    """Job queue with leases in a SQLite file, shared by a worker's threads (e.g. its lease renewer)."""
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Autocommit; write transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _write(self, fn):
+        """Run `fn(conn)` in a write transaction; BEGIN IMMEDIATE makes claims exclusive across processes."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def _read(self, query: str, params=()) -> list:
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    # --- coordinator ---
+
+    def enqueue(self, jobs: Dict[str, dict]) -> int:
+        """Add jobs (id -> payload) and seal the queue; returns how many are queued now.
+
+        Jobs already done in this broker are kept (a rerun resumes), failed ones are queued again.
+        """
+        now = time.time()
+
+        def add(conn):
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM jobs").fetchone()[0]
+            for job_id, payload in jobs.items():
+                seq += 1
+                conn.execute("INSERT INTO jobs (id, payload, seq, updated_at) VALUES (?, ?, ?, ?) "
+                             "ON CONFLICT (id) DO UPDATE SET status = 'queued', attempts = 0, error = NULL, "
+                             "updated_at = excluded.updated_at WHERE status = 'failed'",
+                             (job_id, json.dumps(payload, ensure_ascii=False), seq, now))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('sealed', '1')")
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        return self._write(add)
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._read("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def jobs(self, status: Optional[str] = None) -> List[dict]:
+        query = "SELECT id, status, worker, attempts, result, error FROM jobs"
+        if status:
+            query += " WHERE status = ?"
+        rows = self._read(query + " ORDER BY seq", (status,) if status else ())
+        return [{'id': job_id, 'status': job_status, 'worker': worker, 'attempts': attempts,
+                 'result': json.loads(result) if result else None, 'error': error}
+                for job_id, job_status, worker, attempts, result, error in rows]
+
+    # --- workers ---
+
+    def sealed(self) -> bool:
+        return bool(self._read("SELECT 1 FROM meta WHERE key = 'sealed'"))
+
+    def finished(self) -> bool:
+        """Sealed and nothing left queued or running."""
+        counts = self.counts()
+        return self.sealed() and counts['queued'] == 0 and counts['running'] == 0
+
+    def claim(self, worker: str, limit: int, lease_s: float) -> List[dict]:
+        """Lease up to `limit` jobs (queued first, then ones whose lease expired) to `worker`."""
+        now = time.time()
+
+        def take(conn):
+            # Expired leases past max_attempts are given up rather than retried
+            conn.execute("UPDATE jobs SET status = 'failed', error = 'lease expired ' || attempts || ' times', "
+                         "updated_at = ? WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                         (now, now, self.max_attempts))
+            rows = conn.execute(
+                "SELECT id, payload FROM jobs WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY status = 'running', seq LIMIT ?", (now, limit)).fetchall()
+            conn.executemany("UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                             "lease_until = ?, updated_at = ? WHERE id = ?",
+                             [(worker, now + lease_s, now, job_id) for job_id, _ in rows])
+            return [dict(json.loads(payload), id=job_id) for job_id, payload in rows]
+        return self._write(take)
+
+    def renew(self, worker: str, job_ids: List[str], lease_s: float) -> None:
+        now = time.time()
+        self._write(lambda conn: conn.executemany(
+            "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            [(now + lease_s, now, job_id, worker) for job_id in job_ids]))
+
+    def finish(self, worker: str, job_id: str, result: dict, error: Optional[str] = None) -> bool:
+        """Record the outcome of a job this worker holds; False if the lease was lost to another worker.
+
+        A failed job is queued again (for any worker) until it has been claimed `max_attempts` times.
+        """
+        def record(conn):
+            return conn.execute(
+                "UPDATE jobs SET status = CASE WHEN ? IS NULL THEN 'done' WHEN attempts < ? THEN 'queued' "
+                "ELSE 'failed' END, result = ?, error = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (error, self.max_attempts, json.dumps(result, ensure_ascii=False), error, time.time(),
+                 job_id, worker)).rowcount == 1
+        return self._write(record)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LeaseKeeper:
+    """Renews the leases of the jobs a worker holds every `lease_s` / 3 seconds, in a daemon thread."""
+
+    def __init__(self, broker: SQLiteBroker, worker: str, lease_s: float):
+        self.broker = broker
+        self.worker = worker
+        self.lease_s = lease_s
+        self._held = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-keeper", daemon=True)
+
+    def start(self) -> 'LeaseKeeper':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def hold(self, job_ids: List[str]) -> None:
+        with self._lock:
+            self._held.update(job_ids)
+
+    def release(self, job_id: str) -> bool:
+        """Stop renewing `job_id`; False if it was not held."""
+        with self._lock:
+            if job_id not in self._held:
+                return False
+            self._held.discard(job_id)
+            return True
+
+    def held(self) -> List[str]:
+        with self._lock:
+            return list(self._held)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.lease_s / 3):
+            held = self.held()
+            if held:
+                try:
+                    self.broker.renew(self.worker, held, self.lease_s)
+                except sqlite3.Error:
+                    pass  # busy broker: retried on the next tick, well before the lease runs out
@@ -0,0 +1,128 @@
+# src/chat_compaction.py
+import re
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_TURN_PATTERN = r"^\s*(?P<role>[^:：\[\]]{1,20}?)\s*[:：]\s?(?P<text>.*)$"
+DEFAULT_TIMESTAMP_PATTERN = (
+    r"^\s*\[?\(?\d{4}[-./]\d{1,2}[-./]\d{1,2}\.?(?:[ T]+(?:오전|오후|AM|PM)?\s*\d{1,2}:\d{2}(?::\d{2})?)?\)?\]?\s*"
+    # A bare time only counts when bracketed, so ratios like "3:45" in math chats survive
+    r"|^\s*[\[(](?:오전|오후|AM|PM)?\s*\d{1,2}:\d{2}(?::\d{2})?\s*(?:AM|PM)?[\])]\s*"
+)
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+class ChatCompactor:
+    """Deterministic compaction of student/AI-tutor chat transcripts before prompting.
+
+    - drops lines matching any boilerplate pattern (system notices, UI text)
+    - strips leading timestamps
+    - collapses consecutive repeats of the same turn and tutor answers repeated verbatim
+    - truncates tutor turns longer than `max_tutor_chars` (head and tail are kept)
+
+    Student turns are never shortened. Turns are recognised with `turn_pattern`, whose
+    `role` group must be one of the configured student or tutor roles; other lines are
+    continuations of the current turn, so unknown formats degrade to timestamp and
+    boilerplate stripping only.
+    """
+
+    def __init__(self, student_roles: List[str], tutor_roles: List[str],
+                 turn_pattern: str = DEFAULT_TURN_PATTERN,
+                 timestamp_pattern: Optional[str] = DEFAULT_TIMESTAMP_PATTERN,
+                 boilerplate_patterns: Optional[List[str]] = None,
+                 max_tutor_chars: int = 800, collapse_repeats: bool = True):
+        self.student_roles = {role.strip().lower() for role in student_roles}
+        self.tutor_roles = {role.strip().lower() for role in tutor_roles}
+        self.turn_re = re.compile(turn_pattern)
+        self.timestamp_re = re.compile(timestamp_pattern) if timestamp_pattern else None
+        self.boilerplate_res = [re.compile(pattern) for pattern in (boilerplate_patterns or [])]
+        self.max_tutor_chars = max_tutor_chars
+        self.collapse_repeats = collapse_repeats
+
+    @classmethod
+    def from_config(cls, compaction_cfg) -> 'ChatCompactor':
+        return cls(
+            student_roles=list(compaction_cfg.student_roles),
+            tutor_roles=list(compaction_cfg.tutor_roles),
+            turn_pattern=compaction_cfg.get('turn_pattern') or DEFAULT_TURN_PATTERN,
+            timestamp_pattern=compaction_cfg.get('timestamp_pattern', DEFAULT_TIMESTAMP_PATTERN),
+            boilerplate_patterns=list(compaction_cfg.get('boilerplate_patterns') or []),
+            max_tutor_chars=compaction_cfg.get('max_tutor_chars', 800),
+            collapse_repeats=compaction_cfg.get('collapse_repeats', True),
+        )
+
+    def _role_kind(self, role: str) -> Optional[str]:
+        role = role.strip().lower()
+        if role in self.student_roles:
+            return 'student'
+        if role in self.tutor_roles:
+            return 'tutor'
+        return None
+
+    def parse(self, text: str) -> List[Tuple[Optional[str], str, List[str]]]:
+        """Split a transcript into (kind, speaker label, lines) turns; kind None is free text."""
+        turns: List[Tuple[Optional[str], str, List[str]]] = []
+        for line in text.splitlines():
+            if any(pattern.search(line) for pattern in self.boilerplate_res):
+                continue
+            if self.timestamp_re is not None:
+                line = self.timestamp_re.sub("", line, count=1)
+            match = self.turn_re.match(line)
+            kind = self._role_kind(match.group('role')) if match else None
+            if kind is not None:
+                turns.append((kind, match.group('role').strip(), [match.group('text')]))
+            elif turns:
+                turns[-1][2].append(line)
+            else:
+                turns.append((None, '', [line]))
+        return turns
+
+    def _truncate(self, text: str) -> str:
+        if len(text) <= self.max_tutor_chars:
+            return text
+        head_chars = int(self.max_tutor_chars * 0.7)
+        tail_chars = self.max_tutor_chars - head_chars
+        head = text[:head_chars]
+        tail = text[-tail_chars:] if tail_chars else ""
+        # Cut at whitespace so words are not split
+        head = head[:head.rfind(" ")] if " " in head[head_chars // 2:] else head
+        tail = tail[tail.find(" ") + 1:] if " " in tail[:tail_chars // 2] else tail
+        omitted = len(text) - len(head) - len(tail)
+        return f"{head.rstrip()} …(중략 {omitted:,}자)… {tail.lstrip()}"
+
+    def compact(self, text: str) -> str:
+        output: List[str] = []
+        previous_key = None
+        repeat_count = 0
+        last_body = ""
+        seen_tutor_answers = set()
+        for kind, speaker, lines in self.parse(text):
+            body = _BLANK_LINES_RE.sub("\n", "\n".join(lines).strip())
+            if kind is None:
+                if body:
+                    output.append(body)
+                previous_key = None
+                continue
+            key = (kind, " ".join(body.split()))
+            if self.collapse_repeats and key == previous_key:
+                repeat_count += 1
+                output[-1] = f"{speaker}: {last_body} (×{repeat_count + 1})"
+                continue
+            previous_key, repeat_count = key, 0
+            if kind == 'tutor':
+                if self.collapse_repeats and key[1] in seen_tutor_answers:
+                    body = "[앞과 동일한 답변 생략]"
+                else:
+                    seen_tutor_answers.add(key[1])
+                    body = self._truncate(body)
+            last_body = body
+            output.append(f"{speaker}: {body}")
+        return "\n".join(output) + "\n"
+
+
+def compaction_stats(before: str, after: str, estimate_tokens) -> Dict[str, int]:
+    return {
+        'chars_before': len(before),
+        'chars_after': len(after),
+        'tokens_before': estimate_tokens(before),
+        'tokens_after': estimate_tokens(after),
+    }
@@ -0,0 +1,156 @@
+# src/conversion_pool.py
+"""
+Persistent worker processes for CPU-bound conversion work (conversion_pool.enabled=true).
+
+Markdown -> HTML conversion, math rewriting, PDF printing and token counting hold the
+GIL, so on the pipeline's thread pool they stall every other stage. ConversionPool
+runs them in worker processes that are started (and have imported the converters and
+loaded the tokenizer) once per run; pipeline threads submit a job and wait on its
+result without holding the GIL. InlineConverter has the same interface and runs jobs
+in the calling thread, which is the behaviour when the pool is disabled.
+
+Jobs are module-level functions so they can be sent to the workers by reference.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+# Per-worker PDFGenerator: probing for wkhtmltopdf/chrome runs subprocesses, so do it once
+_PDF_GENERATOR = None
+
+
+def default_workers() -> int:
+    """CPUs this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _warm_up() -> None:
+    """Worker initializer: import the converters and load the tokenizer before the first job."""
+    import markdown  # noqa: F401
+    from enhanced_html_converter import EnhancedHTMLConverter
+    from llm_adapter import LLMAdapter
+    import improved_html_converter  # noqa: F401
+    import report_render  # noqa: F401
+    from html_assets import get_bundle
+
+    EnhancedHTMLConverter().convert_math_expressions("$x$")
+    LLMAdapter.estimate_tokens("warm up")
+    get_bundle()
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def _pdf_generator():
+    global _PDF_GENERATOR
+    if _PDF_GENERATOR is None:
+        from pdf_generator import PDFGenerator
+        _PDF_GENERATOR = PDFGenerator()
+    return _PDF_GENERATOR
+
+
+# --- jobs ---
+
+def render_markdown_file(md_path: str, formats: List[str], assets_cfg: Optional[dict] = None) -> Dict[str, str]:
+    """Write the HTML (math-aware) and/or PDF rendering of a saved Markdown report.
+
+    Returns format -> path written. The HTML is only kept when 'html' is requested.
+    `assets_cfg` is the html_assets config.
+    """
+    from enhanced_html_converter import EnhancedHTMLConverter
+    from html_assets import get_bundle
+
+    base_path = os.path.splitext(md_path)[0]
+    html_path = f"{base_path}.html"
+    written = {}
+    if not EnhancedHTMLConverter(get_bundle(assets_cfg)).convert_to_html(md_path, html_path):
+        return written
+    if 'html' in formats:
+        written['html'] = html_path
+    if 'pdf' in formats:
+        if _pdf_generator().generate_pdf_auto(html_path, f"{base_path}.pdf"):
+            written['pdf'] = f"{base_path}.pdf"
+        if 'html' not in formats:
+            os.remove(html_path)
+    return written
+
+
+def render_report_files(report: dict, base_path: str, formats: List[str],
+                        assets_cfg: Optional[dict] = None) -> Dict[str, str]:
+    """report_render.render_files for a structured report."""
+    from html_assets import get_bundle
+    from report_render import render_files
+    return render_files(report, base_path, formats, get_bundle(assets_cfg))
+
+
+def render_bulk_pdf(pages: List[tuple], pdf_file: str, split_files: Optional[List[str]] = None,
+                    keep_html: bool = True) -> bool:
+    """One PDF for all (title, html path) pages, rendered by a single renderer run (PDFGenerator.generate_pdf_bulk).
+
+    The HTML files are removed afterwards unless `keep_html` or rendering failed.
+    """
+    ok = _pdf_generator().generate_pdf_bulk(pages, pdf_file, split_files)
+    if ok and not keep_html:
+        for _, html_path in pages:
+            os.remove(html_path)
+    return ok
+
+
+def compaction_token_stats(before: str, after: str) -> Dict[str, int]:
+    """chat_compaction.compaction_stats with the offline token estimate."""
+    from chat_compaction import compaction_stats
+    from llm_adapter import LLMAdapter
+    return compaction_stats(before, after, LLMAdapter.estimate_tokens)
+
+
+# --- runners ---
+
+class InlineConverter:
+    """Runs conversion jobs in the calling thread."""
+
+    workers = 0
+
+    def run(self, fn, *args):
+        return fn(*args)
+
+    def close(self) -> None:
+        pass
+
+
+class ConversionPool:
+    """Process pool with `workers` pre-warmed workers; run() blocks the caller, not the GIL."""
+
+    def __init__(self, workers: int = 0):
+        self.workers = workers or default_workers()
+        # Pipeline threads are already running, so avoid fork(); forkserver forks from a clean process
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up,
+                                             mp_context=multiprocessing.get_context(method))
+        self.pids: List[int] = []
+
+    def start(self) -> 'ConversionPool':
+        """Start every worker now (one job each) so no pipeline task pays for startup and imports."""
+        futures = [self._executor.submit(_ready) for _ in range(self.workers)]
+        self.pids = sorted({future.result() for future in futures})
+        return self
+
+    def submit(self, fn, *args) -> Future:
+        return self._executor.submit(fn, *args)
+
+    def run(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+def create_converter(pool_cfg: Optional[dict]):
+    """ConversionPool when `conversion_pool.enabled`, otherwise InlineConverter."""
+    if not pool_cfg or not pool_cfg.get('enabled', False):
+        return InlineConverter()
+    return ConversionPool(pool_cfg.get('workers', 0) or 0).start()
@@ -0,0 +1,184 @@
+# src/dedup.py
+import hashlib
+import re
+import struct
+from typing import Dict, List, Optional, Tuple
+
+_MAX_HASH = (1 << 32) - 1
+_UNPACK_64_BYTES = struct.Struct("<16I").unpack
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Blank-line separated paragraphs, keeping fenced code blocks in one piece."""
+    paragraphs = []
+    current: List[str] = []
+    in_fence = False
+    for line in text.split("\n"):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        if not line.strip() and not in_fence:
+            if current:
+                paragraphs.append("\n".join(current))
+                current = []
+            continue
+        current.append(line)
+    if current:
+        paragraphs.append("\n".join(current))
+    return paragraphs
+
+
+def shingles(text: str, size: int = 5) -> set:
+    """Word `size`-grams of the normalized text (character 5-grams for very short texts)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) >= size:
+        return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    joined = " ".join(words)
+    if len(joined) <= 5:
+        return {joined} if joined else set()
+    return {joined[i:i + 5] for i in range(len(joined) - 4)}
+
+
+class MinHasher:
+    """MinHash signatures built from `num_perm` independent keyed BLAKE2b hash functions.
+
+    One 64-byte keyed digest yields 16 32-bit hash values, so a shingle costs
+    num_perm / 16 C-level hash calls; the per-function minimum is taken with zip/min.
+    Keys are derived from `seed`, so signatures are stable across processes.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        self.num_perm = num_perm
+        self._keys = [hashlib.blake2b(f"minhash-{seed}-{i}".encode("utf-8"), digest_size=32).digest()
+                      for i in range((num_perm + 15) // 16)]
+
+    def _hash_values(self, shingle: str) -> List[int]:
+        data = shingle.encode("utf-8")
+        values: List[int] = []
+        for key in self._keys:
+            values.extend(_UNPACK_64_BYTES(hashlib.blake2b(data, digest_size=64, key=key).digest()))
+        return values[:self.num_perm]
+
+    def signature(self, shingle_set: set) -> Tuple[int, ...]:
+        if not shingle_set:
+            return (_MAX_HASH,) * self.num_perm
+        return tuple(map(min, zip(*(self._hash_values(s) for s in shingle_set))))
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class ParagraphDeduplicator:
+    """Collapses duplicate and near-duplicate paragraphs across a set of documents.
+
+    Exact duplicates are found by hashing the normalized paragraph; near duplicates by
+    MinHash with LSH banding to find candidate pairs, confirmed with the exact Jaccard
+    similarity of their word shingles. The first occurrence (in document order) is kept
+    and annotated with where else it appeared; later copies are replaced by a short
+    pointer to it. Paragraphs shorter than `min_chars` (headings, list stubs) are left alone.
+    """
+
+    def __init__(self, threshold: float = 0.8, shingle_size: int = 5, num_perm: int = 64,
+                 bands: int = 16, min_chars: int = 80):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.min_chars = min_chars
+        self.hasher = MinHasher(num_perm)
+
+    def deduplicate(self, documents: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], dict]:
+        """Return (documents with duplicates collapsed, stats). Input documents are not modified."""
+        entries = []  # (doc_index, paragraph_index, text)
+        paragraphs_by_doc = []
+        for doc_index, doc in enumerate(documents):
+            paragraphs = split_paragraphs(doc['content'])
+            paragraphs_by_doc.append(paragraphs)
+            for paragraph_index, text in enumerate(paragraphs):
+                entries.append((doc_index, paragraph_index, text))
+
+        by_hash: Dict[str, Tuple[int, float]] = {}  # normalized text -> (kept entry, similarity)
+        buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        shingle_sets: Dict[int, set] = {}
+        duplicate_of: Dict[int, Tuple[int, float]] = {}  # entry -> (kept entry, similarity)
+
+        for entry_id, (_, _, text) in enumerate(entries):
+            if len(text.strip()) < self.min_chars:
+                continue
+            normalized = " ".join(_WORD_RE.findall(text.lower()))
+            digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+            if digest in by_hash:
+                if by_hash[digest][0] != entry_id:
+                    duplicate_of[entry_id] = by_hash[digest]
+                continue
+
+            shingle_set = shingles(text, self.shingle_size)
+            signature = self.hasher.signature(shingle_set)
+            band_keys = [(band, repr(signature[band * self.rows:(band + 1) * self.rows]).encode())
+                         for band in range(self.bands)]
+            best = None
+            candidates = {candidate for key in band_keys for candidate in buckets.get(key, ())}
+            for candidate in sorted(candidates):
+                similarity = jaccard(shingle_set, shingle_sets[candidate])
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (candidate, similarity)
+            if best is not None:
+                duplicate_of[entry_id] = best
+                by_hash[digest] = best
+                continue
+            by_hash[digest] = (entry_id, 1.0)
+            # Only kept paragraphs are indexed, so every duplicate points at a kept one
+            shingle_sets[entry_id] = shingle_set
+            for key in band_keys:
+                buckets.setdefault(key, []).append(entry_id)
+
+        also_in: Dict[int, List[str]] = {}
+        for entry_id, (kept_id, similarity) in duplicate_of.items():
+            filename = documents[entries[entry_id][0]]['filename']
+            label = filename if similarity >= 1.0 else f"{filename} ~{similarity:.0%}"
+            also_in.setdefault(kept_id, [])
+            if label not in also_in[kept_id]:
+                also_in[kept_id].append(label)
+
+        deduplicated = []
+        entry_id = 0
+        for doc_index, doc in enumerate(documents):
+            parts = []
+            for text in paragraphs_by_doc[doc_index]:
+                if entry_id in duplicate_of:
+                    kept_id, similarity = duplicate_of[entry_id]
+                    kind = "중복" if similarity >= 1.0 else "유사"
+                    parts.append(f"[{kind} 단락 생략: {documents[entries[kept_id][0]]['filename']} 참조]")
+                elif entry_id in also_in:
+                    parts.append(f"{text}\n[동일/유사 단락: {', '.join(also_in[entry_id])}]")
+                else:
+                    parts.append(text)
+                entry_id += 1
+            deduplicated.append(dict(doc, content="\n\n".join(parts) + "\n"))
+
+        exact = sum(1 for _, similarity in duplicate_of.values() if similarity >= 1.0)
+        stats = {
+            'documents': len(documents),
+            'paragraphs': len(entries),
+            'exact_duplicates': exact,
+            'near_duplicates': len(duplicate_of) - exact,
+            'chars_before': sum(len(doc['content']) for doc in documents),
+            'chars_after': sum(len(doc['content']) for doc in deduplicated),
+        }
+        return deduplicated, stats
+
+
+def deduplicate_documents(documents: List[Dict[str, str]], dedup_cfg=None) -> Tuple[List[Dict[str, str]], dict]:
+    """Deduplicate with settings from the `dedup` config block (None means defaults)."""
+    options: Dict[str, Optional[float]] = {}
+    if dedup_cfg is not None:
+        for key in ('threshold', 'shingle_size', 'num_perm', 'bands', 'min_chars'):
+            if key in dedup_cfg:
+                options[key] = dedup_cfg[key]
+    return ParagraphDeduplicator(**options).deduplicate(documents)
@@ -1,8 +1,14 @@
 import argparse
 import os
 from llm_adapter import LLMAdapter
+from metrics import RunMetrics
+from output_writer import write_text
+from prompt_registry import PromptTemplate
 import logging
 
+DEFAULT_MODEL_NAME = "perplexity/sonar-reasoning"
+DEFAULT_MAX_TOKENS = 4000
+
 def get_full_path(path: str) -> str:
     """Helper to get absolute path from the current working directory."""
     return os.path.abspath(path)
@@ -17,12 +23,14 @@ def main():
                         help="Absolute path to the feedback prompt file.")
     parser.add_argument("--output_file", type=str, required=True,
                         help="Absolute path to save the generated feedback report.")
-    parser.add_argument("--model_name", type=str, default="perplexity/sonar-reasoning",
+    parser.add_argument("--model_name", type=str, default=DEFAULT_MODEL_NAME,
                         help="LLM model name to use for generation.")
     parser.add_argument("--temperature", type=float, default=0.7,
                         help="Temperature for LLM generation.")
-    parser.add_argument("--max_tokens", type=int, default=4000,
+    parser.add_argument("--max_tokens", type=int, default=DEFAULT_MAX_TOKENS,
                         help="Maximum tokens for LLM generation.")
+    parser.add_argument("--metrics_file", type=str, default=None,
+                        help="Optional path to write per-call LLM metrics (JSON) for the parent run.")
 
     args = parser.parse_args()
 
@@ -32,20 +40,22 @@ def main():
 
     print(f"Generating PI feedback for: {args.report_file}")
 
+    metrics = RunMetrics() if args.metrics_file else None
+
     try:
         # Read contents
         with open(get_full_path(args.report_file), 'r', encoding='utf-8') as f:
             report_content = f.read()
         with open(get_full_path(args.pi_info_file), 'r', encoding='utf-8') as f:
             pi_info_content = f.read()
-        with open(get_full_path(args.feedback_prompt_file), 'r', encoding='utf-8') as f:
-            feedback_prompt_template = f.read()
+        feedback_prompt_template = PromptTemplate.from_file("feedback", get_full_path(args.feedback_prompt_file))
 
         # Initialize LLM adapter
         llm_adapter = LLMAdapter(
             model_name=args.model_name,
             temperature=args.temperature,
-            max_tokens=args.max_tokens
+            max_tokens=args.max_tokens,
+            metrics=metrics
         )
 
         # Format the prompt
@@ -55,7 +65,7 @@ def main():
         #
         # **입력 2: 연구실 정보**
         # [연구실명, PI 정보, 주요 연구 분야, 보유 장비/자원, 연구 철학 등을 입력하세요]
-        formatted_prompt = feedback_prompt_template.format(
+        formatted_prompt = feedback_prompt_template.render(
             document_info=report_content,
             pi_lab_info=pi_info_content
         )
@@ -64,9 +74,7 @@ def main():
         feedback_content = llm_adapter.generate(formatted_prompt)
 
         # Save feedback
-        os.makedirs(os.path.dirname(get_full_path(args.output_file)), exist_ok=True)
-        with open(get_full_path(args.output_file), 'w', encoding='utf-8') as f:
-            f.write(feedback_content)
+        write_text(get_full_path(args.output_file), feedback_content)
 
         print(f"PI feedback saved to: {args.output_file}")
 
@@ -74,6 +82,9 @@ def main():
         print(f"Error: One of the input files was not found. {e}")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+    finally:
+        if metrics is not None:
+            metrics.write_json(get_full_path(args.metrics_file))
 
 if __name__ == "__main__":
     main()
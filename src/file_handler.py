@@ -1,6 +1,7 @@
 # src/file_handler.py
 import os
-from typing import List, Dict
+import re
+from typing import List, Dict, Tuple
 
 class FileHandler:
     def __init__(self, directory: str):
@@ -25,3 +26,33 @@ class FileHandler:
                     except Exception as e:
                         print(f"Could not read file {filepath}: {e}")
         return documents
+
+    def find_student_folders(self, folder_pattern: str) -> List[Tuple[str, str, str]]:
+        """Return (folder_path, student_name, student_id) for subfolders matching `folder_pattern`."""
+        pattern = re.compile(folder_pattern)
+        folders = []
+        for folder_name in os.listdir(self.directory):
+            folder_path = os.path.join(self.directory, folder_name)
+            if not os.path.isdir(folder_path):
+                continue
+            # 폴더명 패턴 매칭: group(1) 이름, group(2) 8자리 ID
+            match = pattern.match(folder_name)
+            if match:
+                folders.append((folder_path, match.group(1), match.group(2)))
+        return folders
+
+    def load_section_index(self, index_path: str, documents: List[Dict[str, str]] = None,
+                           max_section_tokens: int = 800, save: bool = True):
+        """BM25 section index of this directory's markdown files, persisted at `index_path`.
+
+        Only files whose content hash changed since the index was saved are re-split;
+        returns (SectionIndex, update stats).
+        """
+        from section_index import SectionIndex
+        if documents is None:
+            documents = self.read_markdown_files()
+        index = SectionIndex.load(index_path, max_section_tokens=max_section_tokens)
+        stats = index.update(documents)
+        if save and (stats['added'] or stats['updated'] or stats['removed'] or not os.path.exists(index_path)):
+            index.save()
+        return index, stats
@@ -0,0 +1,147 @@
+# src/html_assets.py
+"""
+Local, content-hashed assets for generated HTML (stylesheets, fonts, math renderer).
+
+Reports never fetch anything from the network. With mode "inline" each HTML file
+carries its stylesheet (and fonts/MathJax, when configured) and stands alone. With
+mode "link" (the default) the bundle is written once per output directory to
+`_assets/<name>.<hash>.<ext>`, and reports reference it. The HTML stays small (the
+2 MB MathJax build is not copied into every report with math), and a changed asset
+gets a new name instead of a stale cached copy.
+
+MathJax comes from `mathjax_path`, a local single-file build. By default this is
+the bundled assets/js/mathjax/tex-svg.js, which needs no font files. It is only
+included in reports that contain math. With `mathjax_path: null`, formulas are shown as
+their TeX source, and the first report with math says so once per process.
+"""
+
+import base64
+import hashlib
+import html
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from output_writer import open_atomic
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+STYLESHEETS = ("enhanced", "improved")
+FONT_FORMATS = {'.woff2': 'woff2', '.woff': 'woff', '.ttf': 'truetype', '.otf': 'opentype'}
+LINK_DIR = "_assets"
+DEFAULT_MATHJAX = os.path.join(ASSET_DIR, "js", "mathjax", "tex-svg.js")
+
+
+class AssetBundle:
+    """The stylesheets, optional font files and optional MathJax build reports use."""
+
+    def __init__(self, mode: str = "inline", mathjax_path: Optional[str] = None,
+                 fonts: Optional[List[dict]] = None, asset_dir: str = ASSET_DIR):
+        if mode not in ("inline", "link"):
+            raise ValueError(f"html_assets.mode must be 'inline' or 'link', not {mode!r}")
+        self.mode = mode
+        # name -> (file name in the bundle, bytes)
+        self.files: Dict[str, tuple] = {}
+        for name in STYLESHEETS:
+            self._add(name, os.path.join(asset_dir, "css", f"{name}.css"))
+        self._add("mathjax-config", os.path.join(asset_dir, "js", "mathjax-config.js"))
+        if mathjax_path:
+            self._add("mathjax", mathjax_path)
+        self.fonts = []  # (family, weight, style, bundle name)
+        for index, font in enumerate(fonts or []):
+            name = f"font{index}"
+            self._add(name, font['path'])
+            self.fonts.append((font['family'], font.get('weight', 'normal'), font.get('style', 'normal'), name))
+        digest = hashlib.sha256()
+        for name in sorted(self.files):
+            digest.update(name.encode('utf-8') + b'\0' + self.files[name][1])
+        self.version = digest.hexdigest()[:12]
+        self._written = set()  # directories this process already wrote the bundle to
+        self._math_warned = False
+
+    def _add(self, name: str, path: str) -> None:
+        with open(path, 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(os.path.basename(path))
+        self.files[name] = (f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}", data)
+
+    @property
+    def has_math(self) -> bool:
+        return 'mathjax' in self.files
+
+    def _font_faces(self, url_prefix: Optional[str]) -> str:
+        rules = []
+        for family, weight, style, name in self.fonts:
+            file_name, data = self.files[name]
+            font_format = FONT_FORMATS.get(os.path.splitext(file_name)[1].lower(), 'truetype')
+            if url_prefix is None:
+                url = f"data:font/{font_format};base64,{base64.b64encode(data).decode('ascii')}"
+            else:
+                url = f"{url_prefix}/{file_name}"
+            rules.append(f'@font-face {{ font-family: "{family}"; font-weight: {weight}; font-style: {style}; '
+                         f'src: url("{url}") format("{font_format}"); }}')
+        return "\n".join(rules)
+
+    def write(self, directory: str) -> str:
+        """Write the bundle to `directory`/_assets (files already there are kept); returns that path."""
+        target = os.path.join(directory, LINK_DIR)
+        os.makedirs(target, exist_ok=True)
+        files = dict(self.files)
+        if self.fonts:
+            files['fonts'] = (f"fonts.{self.version}.css", self._font_faces(".").encode('utf-8'))
+        for file_name, data in files.values():
+            path = os.path.join(target, file_name)
+            if os.path.exists(path):
+                continue
+            # Several workers may render into the same directory: write aside, then rename
+            with open_atomic(path, 'wb', record=False) as f:
+                f.write(data)
+        return target
+
+    def head(self, stylesheet: str, html_path: Optional[str] = None, math: bool = False) -> str:
+        """<head> markup for `stylesheet` (and MathJax when `math`), inline or linking the written bundle."""
+        def text(name):
+            return self.files[name][1].decode('utf-8')
+
+        with_math = math and self.has_math
+        if math and not self.has_math and not self._math_warned:
+            self._math_warned = True
+            print("⚠️ 보고서에 수식이 있지만 html_assets.mathjax_path 가 없어 TeX 원문으로 표시됩니다")
+        if self.mode == "inline" or html_path is None:
+            parts = []
+            if self.fonts:
+                parts.append(f"<style>\n{self._font_faces(None)}\n</style>")
+            parts.append(f"<style>\n{text(stylesheet)}</style>")
+            if with_math:
+                parts.append(f"<script>\n{text('mathjax-config')}</script>")
+                parts.append(f"<script>\n{text('mathjax')}\n</script>")
+            return "\n    ".join(parts)
+
+        directory = os.path.dirname(os.path.abspath(html_path))
+        if directory not in self._written:
+            self.write(directory)
+            self._written.add(directory)
+
+        def href(name):
+            return html.escape(f"{LINK_DIR}/{self.files[name][0]}" if name != 'fonts'
+                               else f"{LINK_DIR}/fonts.{self.version}.css")
+
+        parts = []
+        if self.fonts:
+            parts.append(f'<link rel="stylesheet" href="{href("fonts")}">')
+        parts.append(f'<link rel="stylesheet" href="{href(stylesheet)}">')
+        if with_math:
+            parts.append(f'<script src="{href("mathjax-config")}"></script>')
+            parts.append(f'<script src="{href("mathjax")}"></script>')
+        return "\n    ".join(parts)
+
+
+@lru_cache(maxsize=8)
+def _cached_bundle(mode: str, mathjax_path: Optional[str], fonts: tuple) -> AssetBundle:
+    return AssetBundle(mode, mathjax_path, [dict(font) for font in fonts])
+
+
+def get_bundle(assets_cfg: Optional[dict] = None) -> AssetBundle:
+    """AssetBundle for an html_assets config (link, bundled MathJax, no fonts when None), loaded once per process."""
+    assets_cfg = assets_cfg or {}
+    fonts = tuple(tuple(sorted(dict(font).items())) for font in assets_cfg.get('fonts') or [])
+    return _cached_bundle(assets_cfg.get('mode', 'link'), assets_cfg.get('mathjax_path', DEFAULT_MATHJAX), fonts)
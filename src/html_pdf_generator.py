@@ -6,18 +6,13 @@ HTML 기반 PDF 생성 도구 - Markdown을 HTML로 변환 후 PDF 생성
 import os
 from pathlib import Path
 import argparse
+from importlib.util import find_spec
 
-try:
-    import markdown
-    MARKDOWN_AVAILABLE = True
-except ImportError:
-    MARKDOWN_AVAILABLE = False
+from output_writer import open_atomic, write_text
 
-try:
-    import pdfkit
-    PDFKIT_AVAILABLE = True
-except ImportError:
-    PDFKIT_AVAILABLE = False
+# markdown/pdfkit는 PDF 변환 시에만 import (HTML 전용 경로의 시작 시간 단축)
+MARKDOWN_AVAILABLE = find_spec("markdown") is not None
+PDFKIT_AVAILABLE = find_spec("pdfkit") is not None
 
 def markdown_to_html_pdf(markdown_file: str, output_file: str = None) -> str:
     """
@@ -36,6 +31,9 @@ def markdown_to_html_pdf(markdown_file: str, output_file: str = None) -> str:
         print("wkhtmltopdf도 설치해야 합니다: sudo apt-get install wkhtmltopdf")
         return None
     
+    import markdown
+    import pdfkit
+    
     try:
         # 출력 파일명 생성
         if output_file is None:
@@ -94,7 +92,9 @@ def markdown_to_html_pdf(markdown_file: str, output_file: str = None) -> str:
             'no-outline': None
         }
         
-        pdfkit.from_string(html_template, output_file, options=options)
+        # output_path=False 이면 PDF 바이트를 반환 -> 원자적으로 저장
+        with open_atomic(output_file, 'wb') as f:
+            f.write(pdfkit.from_string(html_template, False, options=options))
         print(f"✅ PDF 생성 완료: {output_file}")
         return output_file
         
@@ -207,8 +207,7 @@ def simple_markdown_to_html(markdown_file: str, output_file: str = None) -> str:
 </body>
 </html>"""
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_template)
+        write_text(output_file, html_template)
         
         print(f"✅ HTML 생성 완료: {output_file}")
         print("브라우저에서 열어 인쇄 → PDF로 저장하세요.")
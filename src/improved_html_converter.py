@@ -8,6 +8,9 @@ import re
 from pathlib import Path
 import argparse
 
+from html_assets import get_bundle
+from output_writer import write_text
+
 def convert_markdown_to_html(markdown_content: str) -> str:
     """
     Markdown 내용을 HTML로 변환
@@ -95,9 +98,9 @@ def convert_markdown_to_html(markdown_content: str) -> str:
     
     return '\n'.join(html_lines)
 
-def create_full_html(title: str, content: str) -> str:
+def create_full_html(title: str, content: str, assets=None, html_path: str = None) -> str:
     """
-    완전한 HTML 문서 생성
+    완전한 HTML 문서 생성 (스타일은 로컬 에셋 번들에서, html_path는 link 모드의 에셋 경로 기준)
     """
     return f"""<!DOCTYPE html>
 <html lang="ko">
@@ -105,104 +108,7 @@ def create_full_html(title: str, content: str) -> str:
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{title}</title>
-    <style>
-        body {{ 
-            font-family: "Noto Sans CJK KR", "Apple SD Gothic Neo", "Malgun Gothic", sans-serif;
-            margin: 40px;
-            line-height: 1.8;
-            color: #333;
-            background-color: #fafafa;
-        }}
-        
-        .container {{
-            max-width: 800px;
-            margin: 0 auto;
-            background-color: white;
-            padding: 40px;
-            border-radius: 10px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        
-        h1 {{ 
-            color: #2c3e50;
-            border-bottom: 3px solid #3498db;
-            padding-bottom: 15px;
-            margin-bottom: 30px;
-        }}
-        
-        h2 {{ 
-            color: #27ae60;
-            border-bottom: 2px solid #27ae60;
-            padding-bottom: 10px;
-            margin-top: 35px;
-            margin-bottom: 20px;
-        }}
-        
-        h3 {{ 
-            color: #e74c3c;
-            margin-top: 30px;
-            margin-bottom: 15px;
-        }}
-        
-        h4 {{
-            color: #8e44ad;
-            margin-top: 25px;
-            margin-bottom: 10px;
-        }}
-        
-        p {{ 
-            margin: 10px 0;
-            text-align: justify;
-        }}
-        
-        ul {{
-            margin: 15px 0;
-            padding-left: 20px;
-        }}
-        
-        li {{ 
-            margin: 8px 0;
-            line-height: 1.6;
-        }}
-        
-        strong {{ 
-            color: #2c3e50;
-            font-weight: bold;
-        }}
-        
-        em {{
-            color: #7f8c8d;
-            font-style: italic;
-        }}
-        
-        br {{
-            line-height: 1.5;
-        }}
-        
-        /* 이모지 크기 조정 */
-        .emoji {{
-            font-size: 1.2em;
-        }}
-        
-        /* 인쇄 스타일 */
-        @media print {{
-            body {{ 
-                font-size: 12pt;
-                background-color: white;
-                margin: 0;
-            }}
-            .container {{
-                box-shadow: none;
-                margin: 0;
-                padding: 20px;
-            }}
-            h1 {{ font-size: 18pt; }}
-            h2 {{ font-size: 16pt; }}
-            h3 {{ font-size: 14pt; }}
-            h4 {{ font-size: 13pt; }}
-            p {{ font-size: 12pt; }}
-        }}
-    </style>
+    {(assets or get_bundle()).head('improved', html_path)}
 </head>
 <body>
     <div class="container">
@@ -229,11 +135,10 @@ def convert_file(input_file: str, output_file: str = None) -> str:
         
         # HTML 변환
         html_content = convert_markdown_to_html(markdown_content)
-        full_html = create_full_html(title, html_content)
+        full_html = create_full_html(title, html_content, html_path=output_file)
         
         # 파일 저장
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(full_html)
+        write_text(output_file, full_html)
         
         print(f"✅ HTML 변환 완료: {output_file}")
         return output_file
@@ -1,15 +1,46 @@
 # src/llm_adapter.py
-import litellm
-from dotenv import load_dotenv
+# litellm and dotenv are imported lazily: litellm pulls in every provider SDK and
+# dominates startup time, while status, planning and conversion paths never call a model.
 import os
 import logging
+import threading
+import time
+from contextlib import contextmanager
+
+_ENCODING = None  # tiktoken encoding for estimate_tokens; False once known to be unavailable
+
+
+def _tiktoken_encoding():
+    """Look the encoding up once: without a cached BPE file tiktoken retries a download on every call."""
+    global _ENCODING
+    if _ENCODING is None:
+        try:
+            import tiktoken
+            _ENCODING = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _ENCODING = False
+    return _ENCODING
+
 
 class LLMAdapter:
-    def __init__(self, model_name, temperature, max_tokens):
+    def __init__(self, model_name, temperature, max_tokens, stream=False, metrics=None, max_concurrency=None,
+                 backend=None):
+        from dotenv import load_dotenv
         load_dotenv()
         self.model_name = model_name
+        # Transport for completions and token counts (llm_backends; litellm unless configured)
+        if backend is None:
+            from llm_backends import LiteLLMBackend
+            backend = LiteLLMBackend()
+        self.backend = backend
         self.temperature = temperature
         self.max_tokens = max_tokens
+        # Streaming is only needed to measure time-to-first-token
+        self.stream = stream
+        # Optional RunMetrics instance receiving one record per call
+        self.metrics = metrics
+        # Global cap on concurrent calls, shared by every thread using this adapter
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
         # litellm automatically handles API keys from .env
         # (e.g., OPENAI_API_KEY, GEMINI_API_KEY)
         
@@ -30,34 +61,144 @@ class LLMAdapter:
             'gemini-1.5-pro': 1048576,
             'gemini-1.5-flash': 1048576,
         }
+
+        # Estimated list prices in USD per 1M tokens: (input, output).
+        # Longest matching key wins, so 'gpt-4o-mini' is not priced as 'gpt-4o'.
+        self.model_pricing = {
+            'gpt-4': (30.00, 60.00),
+            'gpt-4-turbo': (10.00, 30.00),
+            'gpt-4o': (2.50, 10.00),
+            'gpt-4o-mini': (0.15, 0.60),
+            'gpt-3.5-turbo': (0.50, 1.50),
+            'claude-3-opus': (15.00, 75.00),
+            'claude-3-sonnet': (3.00, 15.00),
+            'claude-3-5-sonnet': (3.00, 15.00),
+            'claude-3-haiku': (0.25, 1.25),
+            'gemini-1.5-pro': (1.25, 5.00),
+            'gemini-1.5-flash': (0.075, 0.30),
+            'gemini-2.5-pro': (1.25, 10.00),
+            'gemini-2.5-flash': (0.30, 2.50),
+            'sonar-reasoning': (1.00, 5.00),
+        }
         
         # Calculate dynamic thresholds
         self.model_context_limit = self._get_model_context_limit()
         self.direct_integration_threshold = int(self.model_context_limit * 0.6)  # 60% for direct
         self.two_step_threshold = int(self.model_context_limit * 0.85)  # 85% for two-step
 
-    def generate(self, prompt: str) -> str:
+    @contextmanager
+    def slot(self):
+        """Hold one of the adapter's concurrency slots (no-op without a cap).
+
+        Also used around work that calls a model outside this adapter, such as the
+        feedback_generator subprocess, so it counts against the same limit.
+        """
+        if self._slots is None:
+            yield
+            return
+        self._slots.acquire()
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def generate(self, prompt: str, json_mode: bool = False) -> str:
+        """Completion text for `prompt`; `json_mode` asks the provider for a single JSON object."""
+        # Time spent waiting for a slot is not part of the call latency
+        with self.slot():
+            return self._generate(prompt, json_mode)
+
+    def _generate(self, prompt: str, json_mode: bool = False) -> str:
+        started = time.perf_counter()
+        response = None
+        ttft = None
+        if self.metrics is not None:
+            self.metrics.call_started()
         try:
             messages = [{"role": "user", "content": prompt}]
-            response = litellm.completion(
-                model=self.model_name,
-                messages=messages,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+            if self.stream:
+                response, ttft = self._complete_streaming(messages, started, **extra)
+            else:
+                response = self.backend.completion(
+                    model=self.model_name,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    **extra,
+                )
             
             # Add robust checking for the response content
             if response and response.choices and response.choices[0].message and response.choices[0].message.content:
+                self._record_call(started, response, ttft)
                 return response.choices[0].message.content
             else:
                 logging.error("LLM response was empty or invalid.")
                 logging.error(f"Full response object: {response}")
+                self._record_call(started, response, ttft, error="empty response")
                 return "Error: LLM returned an empty or invalid response."
 
         except Exception as e:
             logging.error(f"An error occurred while calling the LLM: {e}", exc_info=True)
+            self._record_call(started, response, ttft, error=str(e))
             return f"Error: Could not get a response from the model. Details: {e}"
 
+    def _complete_streaming(self, messages, started, **extra):
+        """Stream the completion to measure time-to-first-token, then rebuild the full response."""
+        chunks = []
+        ttft = None
+        for chunk in self.backend.completion(
+            model=self.model_name,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+            **extra,
+        ):
+            if ttft is None and chunk.choices and getattr(chunk.choices[0].delta, 'content', None):
+                ttft = time.perf_counter() - started
+            chunks.append(chunk)
+        return self.backend.stream_chunk_builder(chunks, messages=messages), ttft
+
+    def _record_call(self, started, response, ttft, error=''):
+        if self.metrics is None:
+            return
+        usage = getattr(response, 'usage', None)
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached_tokens = getattr(details, 'cached_tokens', 0) or 0
+        hidden_params = getattr(response, '_hidden_params', None) or {}
+        self.metrics.record_call(
+            model=self.model_name,
+            latency_s=time.perf_counter() - started,
+            ttft_s=ttft,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            cache_hit=bool(hidden_params.get('cache_hit')),
+            cost_usd=self.estimate_cost(prompt_tokens, completion_tokens) if response is not None else None,
+            status='error' if error else 'ok',
+            error=error,
+        )
+
+    def estimate_cost(self, prompt_tokens: int, completion_tokens: int):
+        """Estimated USD cost of a call; None if the model has no known price or the backend bills nothing."""
+        if not getattr(self.backend, 'billed', True):
+            # Fake/replay calls are free: the price table must not make offline runs look billed
+            return None
+        for model_key in sorted(self.model_pricing, key=len, reverse=True):
+            if model_key in self.model_name:
+                input_price, output_price = self.model_pricing[model_key]
+                return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+        try:
+            prompt_cost, completion_cost = self.backend.cost_per_token(
+                model=self.model_name, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+            return prompt_cost + completion_cost
+        except Exception:
+            return None
+
     def _get_model_context_limit(self) -> int:
         """Get context limit for current model"""
         for model_key in self.model_context_limits:
@@ -68,16 +209,35 @@ class LLMAdapter:
         logging.warning(f"Unknown model {self.model_name}, using default context limit of 8192")
         return 8192
 
-    def count_tokens(self, text: str) -> int:
+    def count_tokens(self, text) -> int:
+        """Model token count of `text`, a string or a list of segments (counted without joining them)."""
         try:
-            return litellm.token_counter(model=self.model_name, messages=[{"role": "user", "content": text}])
+            if not isinstance(text, str):
+                return sum(self.backend.token_counter(model=self.model_name, text=part) for part in text if part)
+            return self.backend.token_counter(model=self.model_name, messages=[{"role": "user", "content": text}])
         except Exception as e:
             logging.warning(f"Could not count tokens for model {self.model_name}: {e}")
             return -1 # Return -1 to indicate an error or inability to count
     
-    def analyze_token_strategy(self, text: str) -> dict:
+    @staticmethod
+    def estimate_tokens(text) -> int:
+        """Offline token estimate that never imports litellm (used by --plan); `text` may be a list of segments.
+
+        Uses tiktoken's o200k/cl100k encoding when installed; otherwise a conservative
+        heuristic of ~4 ASCII characters per token and one token per non-ASCII character.
+        """
+        if not isinstance(text, str):
+            return sum(LLMAdapter.estimate_tokens(part) for part in text)
+        encoding = _tiktoken_encoding()
+        if encoding:
+            return len(encoding.encode(text, disallowed_special=()))
+        ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+        return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+    def analyze_token_strategy(self, text, token_count: int = None) -> dict:
         """Analyze input and determine optimal processing strategy"""
-        token_count = self.count_tokens(text)
+        if token_count is None:
+            token_count = self.count_tokens(text)
         
         strategy_info = {
             'token_count': token_count,
@@ -0,0 +1,336 @@
+# src/llm_backends.py
+# Transports behind LLMAdapter. The adapter keeps concurrency slots, metrics and error
+# handling; a backend only turns a completion request into a litellm-shaped response.
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+_FAKE_WORDS = (
+    "analysis result method data model evidence student question approach pattern "
+    "분석 결과 방법 데이터 모델 근거 학생 질문 접근 패턴"
+).split()
+
+
+def response_object(content: str, usage=None):
+    """Minimal litellm-shaped completion response."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage,
+                           _hidden_params={})
+
+
+def build_streamed_response(chunks):
+    """Response from streamed chunks (delta contents, usage on the last chunk), as litellm.stream_chunk_builder."""
+    content = "".join(c.choices[0].delta.content or "" for c in chunks if c.choices)
+    usage = next((c.usage for c in chunks if getattr(c, 'usage', None) is not None), None)
+    return response_object(content, usage)
+
+
+def stream_chunks(content: str, usage, ttft_s: float, latency_s: float):
+    """Yield `content` as delta chunks: the first after `ttft_s`, the rest spread until `latency_s`."""
+    pieces = [content[i:i + 200] for i in range(0, len(content), 200)] or [""]
+    time.sleep(ttft_s)
+    step = max(latency_s - ttft_s, 0.0) / len(pieces)
+    for piece in pieces:
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+        time.sleep(step)
+    yield SimpleNamespace(choices=[], usage=usage)
+
+
+def estimate_token_count(model=None, messages=None, text=None) -> int:
+    from llm_adapter import LLMAdapter
+    if text is not None:
+        return LLMAdapter.estimate_tokens(text)
+    return LLMAdapter.estimate_tokens([m['content'] for m in messages or ()])
+
+
+class LiteLLMBackend:
+    """Real provider calls through litellm (the default)."""
+
+    name = "litellm"
+    billed = True  # calls cost money: LLMAdapter.estimate_cost prices them
+
+    def completion(self, **kwargs):
+        import litellm
+        return litellm.completion(**kwargs)
+
+    def stream_chunk_builder(self, chunks, messages):
+        import litellm
+        return litellm.stream_chunk_builder(chunks, messages=messages)
+
+    def token_counter(self, **kwargs) -> int:
+        import litellm
+        return litellm.token_counter(**kwargs)
+
+    def cost_per_token(self, **kwargs):
+        import litellm
+        return litellm.cost_per_token(**kwargs)
+
+
+class FakeBackendError(RuntimeError):
+    """A simulated provider failure (FakeBackend error_rate)."""
+
+
+class FakeBackend:
+    """Deterministic offline backend for benchmarks: sleeps, then returns filler text.
+
+    Latency, output size and failures are drawn from a generator seeded with the
+    request itself, so a given prompt behaves the same in every run and at any
+    concurrency. `latency_distribution` is fixed (always `latency_s`), uniform
+    (`latency_s` +/- `latency_spread` fraction) or lognormal (median `latency_s`,
+    sigma `latency_spread`). Never imports litellm.
+    """
+
+    name = "fake"
+    billed = False
+
+    def __init__(self, latency_s: float = 1.0, latency_distribution: str = "lognormal", latency_spread: float = 0.5,
+                 output_tokens: int = 500, error_rate: float = 0.0, seed: int = 0):
+        if latency_distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown fake latency distribution: {latency_distribution}")
+        self.latency_s = latency_s
+        self.latency_distribution = latency_distribution
+        self.latency_spread = latency_spread
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.seed = seed
+
+    def _rng(self, model: str, messages) -> random.Random:
+        digest = hashlib.sha256(f"{self.seed}\0{model}".encode('utf-8'))
+        for message in messages:
+            digest.update(message['content'].encode('utf-8'))
+        return random.Random(digest.digest())
+
+    def _latency(self, rng: random.Random) -> float:
+        if self.latency_distribution == "uniform":
+            return max(0.0, self.latency_s * (1 + rng.uniform(-self.latency_spread, self.latency_spread)))
+        if self.latency_distribution == "lognormal":
+            return self.latency_s * math.exp(rng.gauss(0.0, self.latency_spread))
+        return self.latency_s
+
+    def completion(self, model, messages, stream=False, response_format=None, **kwargs):
+        rng = self._rng(model, messages)
+        latency = self._latency(rng)
+        failed = rng.random() < self.error_rate
+        tokens = max(1, int(self.output_tokens * rng.uniform(0.8, 1.2)))
+        words = " ".join(rng.choice(_FAKE_WORDS) for _ in range(tokens))
+        if response_format is not None:
+            content = '{"text": "%s"}' % words
+        else:
+            content = f"# Fake response\n\n{words}\n"
+        usage = SimpleNamespace(prompt_tokens=estimate_token_count(messages=messages), completion_tokens=tokens,
+                                prompt_tokens_details=None)
+        if stream:
+            return self._stream(latency, failed, content, usage)
+        time.sleep(latency)
+        if failed:
+            raise FakeBackendError("simulated provider error")
+        return response_object(content, usage)
+
+    def _stream(self, latency, failed, content, usage):
+        # First token after a fifth of the latency, the rest spread over the remainder
+        if failed:
+            time.sleep(latency / 5)
+            raise FakeBackendError("simulated provider error")
+        yield from stream_chunks(content, usage, latency / 5, latency)
+
+    def stream_chunk_builder(self, chunks, messages):
+        return build_streamed_response(chunks)
+
+    token_counter = staticmethod(estimate_token_count)
+
+    def cost_per_token(self, **kwargs):
+        raise LookupError("fake backend has no price list")
+
+
+def request_key(model: str, messages, response_format=None) -> str:
+    """Cassette key of a completion request: model, messages and requested output format."""
+    payload = json.dumps([model, messages, response_format], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def token_key(model, messages=None, text=None) -> str:
+    payload = json.dumps([model, messages, text], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _usage_dict(usage) -> dict:
+    return {'prompt_tokens': getattr(usage, 'prompt_tokens', 0) or 0,
+            'completion_tokens': getattr(usage, 'completion_tokens', 0) or 0}
+
+
+class RecordingBackend:
+    """Wraps another backend and appends every request/response pair to a JSONL cassette.
+
+    Each line holds the request key (prompts are hashed, not stored), the response
+    text and token usage, the call's latency and time-to-first-token, its start
+    offset in the run, and the error message if the call failed.
+    """
+
+    name = "record"
+
+    def __init__(self, inner, path: str):
+        self.inner = inner
+        self.billed = getattr(inner, "billed", True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _write(self, entry: dict) -> None:
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def completion(self, model, messages, stream=False, **kwargs):
+        entry = {'key': request_key(model, messages, kwargs.get('response_format')), 'model': model,
+                 'prompt_chars': sum(len(m['content']) for m in messages), 'stream': stream,
+                 'offset_s': round(time.perf_counter() - self._started, 4)}
+        started = time.perf_counter()
+        if stream:
+            return self._record_stream(entry, started, self.inner.completion(
+                model=model, messages=messages, stream=True, **kwargs))
+        try:
+            response = self.inner.completion(model=model, messages=messages, **kwargs)
+        except Exception as e:
+            self._write(dict(entry, latency_s=round(time.perf_counter() - started, 4), error=str(e)))
+            raise
+        self._write(dict(entry, latency_s=round(time.perf_counter() - started, 4), ttft_s=None,
+                         content=response.choices[0].message.content if response.choices else None,
+                         usage=_usage_dict(getattr(response, 'usage', None))))
+        return response
+
+    def _record_stream(self, entry, started, chunks):
+        ttft = None
+        pieces = []
+        usage = None
+        try:
+            for chunk in chunks:
+                content = getattr(chunk.choices[0].delta, 'content', None) if chunk.choices else None
+                if content:
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    pieces.append(content)
+                usage = getattr(chunk, 'usage', None) or usage
+                yield chunk
+        except Exception as e:
+            self._write(dict(entry, latency_s=round(time.perf_counter() - started, 4), error=str(e)))
+            raise
+        self._write(dict(entry, latency_s=round(time.perf_counter() - started, 4),
+                         ttft_s=round(ttft, 4) if ttft is not None else None,
+                         content="".join(pieces), usage=_usage_dict(usage)))
+
+    def stream_chunk_builder(self, chunks, messages):
+        return self.inner.stream_chunk_builder(chunks, messages)
+
+    def token_counter(self, model=None, messages=None, text=None) -> int:
+        # Token counts pick the integration strategy, so replay must see the same numbers
+        count = self.inner.token_counter(model=model, messages=messages, text=text)
+        self._write({'kind': 'tokens', 'key': token_key(model, messages, text), 'count': count})
+        return count
+
+    def cost_per_token(self, **kwargs):
+        return self.inner.cost_per_token(**kwargs)
+
+
+class CassetteMissError(LookupError):
+    """Replay got a request that the cassette does not contain."""
+
+
+class ReplayedError(RuntimeError):
+    """A provider error that was recorded in the cassette."""
+
+
+class ReplayBackend:
+    """Serves completions from a cassette written by RecordingBackend; never calls a provider.
+
+    Requests are matched by key; identical requests are served in recorded order (the
+    last one repeats). Each reply waits its recorded latency times `time_scale` (0 for
+    no waiting), so scheduler and concurrency changes can be timed against the same
+    provider behaviour. Recorded failures are raised again.
+    """
+
+    name = "replay"
+    billed = False
+
+    def __init__(self, path: str, time_scale: float = 1.0):
+        self.path = path
+        self.time_scale = time_scale
+        self._entries = {}
+        self._token_counts = {}
+        self._lock = threading.Lock()
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get('kind') == 'tokens':
+                    self._token_counts[entry['key']] = entry['count']
+                else:
+                    self._entries.setdefault(entry['key'], []).append(entry)
+        self._served = {key: 0 for key in self._entries}
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _next(self, key: str) -> dict:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMissError(f"request {key[:12]} is not in cassette {self.path}")
+            index = min(self._served[key], len(entries) - 1)
+            self._served[key] += 1
+            return entries[index]
+
+    def completion(self, model, messages, stream=False, response_format=None, **kwargs):
+        entry = self._next(request_key(model, messages, response_format))
+        latency = entry['latency_s'] * self.time_scale
+        usage = SimpleNamespace(prompt_tokens_details=None, **(entry.get('usage') or _usage_dict(None)))
+        if stream and not entry.get('error'):
+            ttft = entry.get('ttft_s')
+            return stream_chunks(entry['content'] or "", usage,
+                                 (ttft if ttft is not None else entry['latency_s']) * self.time_scale, latency)
+        time.sleep(latency)
+        if entry.get('error'):
+            raise ReplayedError(entry['error'])
+        return response_object(entry['content'], usage)
+
+    def stream_chunk_builder(self, chunks, messages):
+        return build_streamed_response(chunks)
+
+    def token_counter(self, model=None, messages=None, text=None) -> int:
+        count = self._token_counts.get(token_key(model, messages, text))
+        return count if count is not None else estimate_token_count(model, messages, text)
+
+    def cost_per_token(self, **kwargs):
+        raise LookupError("replay backend has no price list")
+
+
+def create_backend(llm_cfg=None):
+    """Backend named by `llm.backend` (default litellm), configured from `llm.<backend>` if present.
+
+    `record` calls `llm.cassette.source` (litellm) and writes `llm.cassette.path`; `replay` serves from it.
+    """
+    name = llm_cfg.get('backend', 'litellm') if llm_cfg is not None else 'litellm'
+    if name == "litellm":
+        return LiteLLMBackend()
+    if name == "fake":
+        options = llm_cfg.get('fake') or {}
+        return FakeBackend(**dict(options))
+    if name in ("record", "replay"):
+        cassette = llm_cfg.get('cassette') or {}
+        if not cassette.get('path'):
+            raise ValueError(f"llm.backend={name} needs llm.cassette.path")
+        if name == "record":
+            # Normally records real calls; `source: fake` records the fake backend (for testing the harness)
+            source = cassette.get('source', 'litellm')
+            if source not in ("litellm", "fake"):
+                raise ValueError(f"llm.cassette.source must be litellm or fake, not '{source}'")
+            inner = FakeBackend(**dict(llm_cfg.get('fake') or {})) if source == "fake" else LiteLLMBackend()
+            return RecordingBackend(inner, cassette['path'])
+        return ReplayBackend(cassette['path'], time_scale=cassette.get('time_scale', 1.0))
+    raise ValueError(f"Unknown llm.backend '{name}' (expected litellm, fake, record or replay)")
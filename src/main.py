@@ -1,11 +1,25 @@
 # src/main.py
 import hydra
+import sys
+from hydra.core.hydra_config import HydraConfig
 from omegaconf import DictConfig
 import os
+import shutil
 import subprocess
-from tqdm import tqdm
+import tempfile
+from functools import partial
+from typing import Optional
+from conversion_pool import (InlineConverter, compaction_token_stats, create_converter, render_bulk_pdf,
+                             render_markdown_file, render_report_files)
 from file_handler import FileHandler
 from llm_adapter import LLMAdapter
+from llm_backends import create_backend
+from metrics import RunMetrics
+from output_writer import adopt, is_valid, open_atomic, write_text
+from pipeline import Pipeline
+from progress import ProgressReporter
+from prompt_registry import PromptRegistry, document_parts
+from section_index import template_headings
 import logging
 from datetime import datetime
 
@@ -13,357 +27,983 @@ def get_full_path(path: str) -> str:
     """Helper to get absolute path from hydra's original cwd."""
     return os.path.join(hydra.utils.get_original_cwd(), path)
 
+def get_run_dir() -> str:
+    """Hydra's output directory for the current run."""
+    return HydraConfig.get().runtime.output_dir
+
+# Report renderings waiting to be moved into the output store (mode.output_store)
+STAGING_DIR = ".staging"
+REPORT_TYPE_SUFFIXES = {"summary": "_summary", "integration": "_integrated", "report": "_report"}
+
+def structured_output_enabled(cfg: DictConfig) -> bool:
+    return cfg.mode.analysis_mode == "report" and hasattr(cfg.mode, 'structured_output') and cfg.mode.structured_output.enabled
+
+def html_assets_config(cfg: DictConfig) -> dict:
+    """html_assets as a plain dict (it is sent to conversion workers) with file paths made absolute."""
+    assets_cfg = dict(cfg.get('html_assets') or {})
+    if assets_cfg.get('mathjax_path'):
+        assets_cfg['mathjax_path'] = get_full_path(assets_cfg['mathjax_path'])
+    assets_cfg['fonts'] = [dict(font, path=get_full_path(font['path'])) for font in assets_cfg.get('fonts') or []]
+    return assets_cfg
+
+def pdf_bulk_enabled(cfg: DictConfig) -> bool:
+    return (cfg.mode.analysis_mode == "report" and hasattr(cfg.mode, 'pdf_bulk') and cfg.mode.pdf_bulk.enabled
+            and 'pdf' in cfg.mode.get('output_formats', []))
+
+def output_store_enabled(cfg: DictConfig) -> bool:
+    return cfg.mode.analysis_mode == "report" and hasattr(cfg.mode, 'output_store') and cfg.mode.output_store.enabled
+
+def section_generation_enabled(cfg: DictConfig) -> bool:
+    # Structured output asks for the whole report as one JSON object, so it takes precedence
+    return (cfg.mode.analysis_mode == "report" and hasattr(cfg.mode, 'section_generation')
+            and cfg.mode.section_generation.enabled and not structured_output_enabled(cfg))
+
+def load_prompt_templates(cfg: DictConfig, validate: bool = True) -> PromptRegistry:
+    """Load and compile every prompt template the active mode needs, before any model call.
+
+    With `validate`, all template problems are raised together as a PromptTemplateError.
+    """
+    templates = PromptRegistry(get_full_path)
+
+    # Load prompts (only for summary and integration modes)
+    if cfg.mode.analysis_mode in ["summary", "integration"] and hasattr(cfg.mode, 'individual_summary_prompt'):
+        templates.load('individual', cfg.mode.individual_summary_prompt)
+
+    if cfg.mode.analysis_mode == "integration" and hasattr(cfg.mode, 'two_step_integration') and cfg.mode.two_step_integration:
+        templates.load('integration_analysis', cfg.mode.integration_analysis_prompt_path)
+        templates.load('integration_report', cfg.mode.integration_report_prompt_path)
+    if cfg.mode.analysis_mode in ["summary", "integration"]:
+        templates.load('final', cfg.mode.final_prompt_path)
+        if hasattr(cfg.mode, 'feedback_prompt_path') and cfg.mode.feedback_prompt_path:
+            templates.load('feedback', cfg.mode.feedback_prompt_path)
+    elif cfg.mode.analysis_mode == "report":
+        # Report 모드는 개별 프롬프트 템플릿을 사용
+        for report_type in cfg.mode.report_types:
+            path = cfg.mode.get(f"{report_type}_prompt_path")
+            if path is None:
+                templates.errors.append(f"{report_type} prompt: mode.{report_type}_prompt_path is not set")
+                continue
+            template = templates.load(report_type, path)
+            if template is not None and structured_output_enabled(cfg):
+                # 구조화 출력: 보고서 형식 프롬프트 뒤에 JSON 스키마 지시를 덧붙임
+                from structured_report import load_schema, output_instruction
+                try:
+                    schema = load_schema(get_full_path(cfg.mode.structured_output.schema_dir), report_type)
+                except (OSError, ValueError) as e:
+                    templates.errors.append(f"{report_type} schema: {e}")
+                    continue
+                templates.templates[report_type] = template.with_suffix(output_instruction(schema))
+            elif template is not None and section_generation_enabled(cfg):
+                from prompt_registry import PromptTemplateError
+                from report_sections import split_report_template
+                try:
+                    split_report_template(template, cfg.mode.section_generation.heading_level)
+                except PromptTemplateError as e:
+                    templates.errors.append(str(e))
+    else:
+        raise ValueError("Invalid analysis_mode specified in config. Must be 'summary', 'integration', or 'report'.")
+
+    for warning in templates.warnings:
+        logging.warning(f"Prompt template: {warning}")
+    return templates.validate() if validate else templates
+
 @hydra.main(config_path="../configs", config_name="config", version_base=None)
 def main(cfg: DictConfig) -> None:
     # Suppress verbose logging from httpx and litellm
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("LiteLLM").setLevel(logging.WARNING)
 
+    if cfg.plan:
+        run_plan(cfg)
+        return
+
+    if cfg.distributed.role == "coordinator":
+        # Fail on template errors here rather than in every worker
+        load_prompt_templates(cfg)
+        run_coordinator(cfg)
+        return
+
     print("Starting the analysis process...")
-    
+
+    # Opt-in sampling profiler; setup and teardown are attributed to the "main" stage
+    profiler = None
+    if cfg.profile:
+        from profiling import StageProfiler
+        profiler = StageProfiler(interval_s=cfg.profiling.interval_ms / 1000).start()
+
     # --- 1. Setup ---
+    # Template errors surface here, before any model call is paid for
+    templates = load_prompt_templates(cfg)
+    metrics = RunMetrics()
+    metrics.profiler = profiler
+    for name, template in templates.items():
+        metrics.record_item("prompt", name, path=template.path, fingerprint=template.fingerprint)
+
     # Initialize LLM adapter once
     llm_adapter = LLMAdapter(
         model_name=cfg.llm.model_name,
         temperature=cfg.llm.temperature,
-        max_tokens=cfg.llm.max_tokens
+        max_tokens=cfg.llm.max_tokens,
+        stream=cfg.llm.get('stream', False),
+        metrics=metrics,
+        max_concurrency=cfg.concurrency,
+        backend=create_backend(cfg.llm),
     )
+    if llm_adapter.backend.name != "litellm":
+        print(f"LLM backend: {llm_adapter.backend.name}")
 
-    # Load prompts (only for summary and integration modes)
-    individual_prompt_template = ""
-    if cfg.mode.analysis_mode in ["summary", "integration"] and hasattr(cfg.mode, 'individual_summary_prompt'):
-        individual_prompt_template = open(get_full_path(cfg.mode.individual_summary_prompt), 'r', encoding='utf-8').read()
-    
-    final_analysis_prompt_template = ""
-    integration_analysis_prompt_template = ""
-    integration_report_prompt_template = ""
+    # Structured progress feed read by batch_status.py / quick_status.py
+    progress = ProgressReporter(None, mode=cfg.mode.analysis_mode, concurrency=cfg.concurrency)
+    if cfg.progress.enabled and cfg.progress.path:
+        progress = ProgressReporter(get_full_path(cfg.progress.path), mode=cfg.mode.analysis_mode,
+                                    concurrency=cfg.concurrency)
+    elif cfg.progress.enabled:
+        progress = ProgressReporter.for_run(get_full_path(cfg.progress.dir), mode=cfg.mode.analysis_mode,
+                                            concurrency=cfg.concurrency)
+        print(f"Progress feed: {progress.path}")
 
-    if cfg.mode.analysis_mode == "integration" and hasattr(cfg.mode, 'two_step_integration') and cfg.mode.two_step_integration:
-        integration_analysis_prompt_template = open(get_full_path(cfg.mode.integration_analysis_prompt_path), 'r', encoding='utf-8').read()
-        integration_report_prompt_template = open(get_full_path(cfg.mode.integration_report_prompt_path), 'r', encoding='utf-8').read()
-    if cfg.mode.analysis_mode == "summary":
-        report_type_suffix = "_summary"
-        final_analysis_prompt_template = open(get_full_path(cfg.mode.final_prompt_path), 'r', encoding='utf-8').read()
-    elif cfg.mode.analysis_mode == "integration":
-        report_type_suffix = "_integrated"
-        final_analysis_prompt_template = open(get_full_path(cfg.mode.final_prompt_path), 'r', encoding='utf-8').read()
-    elif cfg.mode.analysis_mode == "report":
-        report_type_suffix = "_report"
-        # Report 모드는 개별 프롬프트 템플릿을 사용
-        student_prompt_template = open(get_full_path(cfg.mode.student_prompt_path), 'r', encoding='utf-8').read()
-        teacher_prompt_template = open(get_full_path(cfg.mode.teacher_prompt_path), 'r', encoding='utf-8').read()
+    # Optional local HTTP endpoint with live progress and LLM call stats
+    status_server = None
+    if cfg.status_server.enabled:
+        from status_server import StatusServer
+        status_server = StatusServer(progress, metrics, host=cfg.status_server.host, port=cfg.status_server.port,
+                                     run_name=os.path.basename(get_run_dir())).start()
+        progress.emit("status_server", url=status_server.url)
+        print(f"Status endpoint: {status_server.url}/status (Prometheus: {status_server.url}/metrics)")
+
+    run_status = "error"
+    try:
+        if cfg.distributed.role == "worker":
+            run_worker(cfg, templates, llm_adapter, metrics, progress)
+        else:
+            run_analysis(cfg, templates, llm_adapter, metrics, progress)
+        run_status = "ok"
+    finally:
+        progress.close(run_status)
+        if status_server is not None:
+            status_server.stop()
+        if cfg.metrics.enabled:
+            metrics_dir = get_full_path(cfg.metrics.output_dir) if cfg.metrics.output_dir else get_run_dir()
+            metrics_paths = metrics.write(metrics_dir)
+            metrics.print_summary()
+            print(f"\nMetrics saved to: {metrics_paths['json']} / {metrics_paths['csv']}")
+        if profiler is not None:
+            write_profile(cfg, profiler)
+
+
+def write_profile(cfg: DictConfig, profiler) -> None:
+    """Stop the profiler, save collapsed stacks and summary, and print the top self-time functions."""
+    profiler.stop()
+    if cfg.profiling.output_dir:
+        profile_dir = get_full_path(cfg.profiling.output_dir)
     else:
-        raise ValueError("Invalid analysis_mode specified in config. Must be 'summary', 'integration', or 'report'.")
+        base_dir = get_full_path(cfg.metrics.output_dir) if cfg.metrics.output_dir else get_run_dir()
+        profile_dir = os.path.join(base_dir, "profile")
+    paths = profiler.write(profile_dir, top=cfg.profiling.top)
+    profiler.print_summary(cfg.profiling.top)
+    print(f"\nProfile saved to: {paths['collapsed']} / {paths['summary']}")
+
+def run_plan(cfg: DictConfig) -> None:
+    """Dry run: size and price every LLM call of this config without calling the model."""
+    import json
+    from planner import CallEstimator, RunPlanner, find_latest_metrics, print_plan
+    from feedback_generator import DEFAULT_MODEL_NAME, DEFAULT_MAX_TOKENS
+
+    llm_adapter = LLMAdapter(model_name=cfg.llm.model_name, temperature=cfg.llm.temperature,
+                             max_tokens=cfg.llm.max_tokens)
+    feedback_adapter = LLMAdapter(model_name=DEFAULT_MODEL_NAME, temperature=0.7, max_tokens=DEFAULT_MAX_TOKENS)
+
+    # Per-stage output size and latency from the most recent run that wrote metrics
+    history_patterns = [get_full_path(os.path.join("outputs", "*", "*", "metrics.json"))]
+    if cfg.metrics.output_dir:
+        history_patterns.append(os.path.join(get_full_path(cfg.metrics.output_dir), "metrics.json"))
+    estimator = CallEstimator(cfg.planning.completion_tokens, cfg.planning.latency_s,
+                              history_path=find_latest_metrics(history_patterns))
+
+    planner = RunPlanner(cfg, llm_adapter, load_prompt_templates(cfg, validate=False), get_full_path, estimator,
+                         feedback_adapter=feedback_adapter)
+    plan = planner.plan()
+    print_plan(plan)
+
+    plan_path = os.path.join(get_run_dir(), "plan.json")
+    with open_atomic(plan_path) as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    print(f"\nPlan saved to: {plan_path}")
+
+def list_jobs(cfg: DictConfig) -> dict:
+    """Job id -> payload for a distributed run: one job per student (report mode) or input directory.
+
+    Job ids are the pipeline's group names, so a worker can report each job when its group ends.
+    """
+    jobs = {}
+    mode = cfg.mode.analysis_mode
+    for input_dir_path in cfg.mode.input_dirs:
+        if mode == "report":
+            student_folders = FileHandler(get_full_path(input_dir_path)).find_student_folders(
+                cfg.mode.file_patterns.folder_pattern)
+            for _, student_name, _ in student_folders:
+                # Like the pipeline, a duplicate student name is processed once (first directory wins)
+                jobs.setdefault(student_name, {'mode': mode, 'input_dir': input_dir_path, 'student': student_name})
+        else:
+            jobs.setdefault(os.path.basename(input_dir_path), {'mode': mode, 'input_dir': input_dir_path})
+    return jobs
+
+def broker_path(cfg: DictConfig) -> str:
+    return get_full_path(cfg.distributed.broker) if cfg.distributed.broker else os.path.join(get_run_dir(),
+                                                                                            "broker.sqlite")
+
+def start_local_worker(broker_file: str, index: int) -> subprocess.Popen:
+    """This run's command line as a worker process with its own run directory, metrics and log."""
+    worker_dir = os.path.join(get_run_dir(), f"worker_{index}")
+    os.makedirs(worker_dir, exist_ok=True)
+    own_keys = ("distributed.", "hydra.", "metrics.output_dir=", "progress.")
+    overrides = [o for o in HydraConfig.get().overrides.task if not o.lstrip('+~').startswith(own_keys)]
+    cmd = [sys.executable, os.path.abspath(__file__)] + overrides + [
+        "distributed.role=worker", f"distributed.broker={broker_file}", f"distributed.worker_id=local-{index}",
+        f"hydra.run.dir={worker_dir}", f"metrics.output_dir={worker_dir}", "progress.enabled=false"]
+    with open(os.path.join(worker_dir, "worker.log"), 'w', encoding='utf-8') as log:
+        return subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+
+def run_coordinator(cfg: DictConfig) -> None:
+    """Enqueue this run's jobs in the broker, optionally start local workers, and wait for the queue to drain."""
+    import time
+    from broker import SQLiteBroker
+
+    broker_file = broker_path(cfg)
+    broker = SQLiteBroker(broker_file, max_attempts=cfg.distributed.max_attempts)
+    jobs = list_jobs(cfg)
+    queued = broker.enqueue(jobs)
+    print(f"Broker: {broker_file} ({len(jobs)} jobs, {queued} queued)")
+    print(f"Workers: python src/main.py <same overrides> distributed.role=worker distributed.broker={broker_file}")
+
+    workers = [start_local_worker(broker_file, index) for index in range(cfg.distributed.local_workers)]
+    if workers:
+        print(f"Started {len(workers)} local workers (logs: {get_run_dir()}/worker_*/worker.log)")
+    started = time.time()
+    last = None
+    try:
+        while cfg.distributed.wait or workers:
+            counts = broker.counts()
+            if counts != last:
+                print(f"📦 Jobs: {counts['done']}/{len(jobs)} done, {counts['failed']} failed, "
+                      f"{counts['running']} running, {counts['queued']} queued ({time.time() - started:.1f}s)")
+                last = counts
+            if broker.finished():
+                break
+            if workers and all(worker.poll() is not None for worker in workers) and not cfg.distributed.wait:
+                print("⚠️ All local workers exited before the queue was drained")
+                break
+            time.sleep(cfg.distributed.poll_s)
+    finally:
+        for worker in workers:
+            worker.wait()
+
+    per_worker = {}
+    for job in broker.jobs('done'):
+        per_worker[job['worker']] = per_worker.get(job['worker'], 0) + 1
+    for worker_id, count in sorted(per_worker.items()):
+        print(f"  ├─ {worker_id}: {count} jobs")
+    for job in broker.jobs('failed'):
+        print(f"  ❌ {job['id']} ({job['worker']}, {job['attempts']} attempts): {job['error']}")
+    counts = broker.counts()
+    print(f"\n--- Distributed run: {counts['done']} done, {counts['failed']} failed, "
+          f"{counts['queued'] + counts['running']} unfinished in {time.time() - started:.1f}s ---")
+    broker.close()
+
+def run_worker(cfg: DictConfig, templates: PromptRegistry, llm_adapter: LLMAdapter, metrics: RunMetrics,
+               progress: ProgressReporter) -> None:
+    """Claim jobs from the broker and run each claimed batch as one pipeline, until the queue is drained.
+
+    The model is called with this process's own llm config and credentials. Each job is
+    marked done or failed as soon as its pipeline group ends. Reports are written to the
+    configured output paths, which are expected to be shared with the coordinator.
+    """
+    import time
+    from broker import LeaseKeeper, SQLiteBroker, default_worker_id
+    from pipeline import PipelineError
+
+    if not cfg.distributed.broker:
+        raise ValueError("distributed.broker is required for distributed.role=worker")
+    if pdf_bulk_enabled(cfg):
+        # A bulk PDF would only hold the students of one batch
+        print("⚠️ mode.pdf_bulk is not supported by workers; rendering one PDF per report")
+        cfg.mode.pdf_bulk.enabled = False
+    worker_id = cfg.distributed.worker_id or default_worker_id()
+    batch_size = cfg.distributed.batch or cfg.concurrency
+    lease_s = cfg.distributed.lease_s
+    broker = SQLiteBroker(broker_path(cfg), max_attempts=cfg.distributed.max_attempts)
+    leases = LeaseKeeper(broker, worker_id, lease_s).start()
+    converter = create_converter(cfg.get('conversion_pool')) if cfg.mode.analysis_mode == "report" else None
+    print(f"Worker {worker_id}: broker {broker.path}, {batch_size} jobs per claim")
+
+    def job_ended(job_id, duration_s, error):
+        if leases.release(job_id):
+            broker.finish(worker_id, job_id, {'worker': worker_id, 'duration_s': round(duration_s, 3)},
+                          None if error is None else f"{type(error).__name__}: {error}")
+
+    done = 0
+    try:
+        while True:
+            claimed = broker.claim(worker_id, batch_size, lease_s)
+            if not claimed:
+                if broker.finished():
+                    break
+                time.sleep(cfg.distributed.poll_s)
+                continue
+            selection = {}
+            for job in claimed:
+                if job['mode'] != cfg.mode.analysis_mode:
+                    broker.finish(worker_id, job['id'], {'worker': worker_id},
+                                  f"job is for mode {job['mode']}, worker runs {cfg.mode.analysis_mode}")
+                    continue
+                leases.hold([job['id']])
+                students = selection.setdefault(job['input_dir'], set())
+                if 'student' in job:
+                    students.add(job['student'])
+            try:
+                run_analysis(cfg, templates, llm_adapter, metrics, progress, jobs=selection, on_job_end=job_ended,
+                             converter=converter)
+            except PipelineError:
+                pass  # each failed job was already reported when its group ended
+            except Exception as e:
+                for job_id in leases.held():
+                    if leases.release(job_id):
+                        broker.finish(worker_id, job_id, {'worker': worker_id}, f"{type(e).__name__}: {e}")
+                raise
+            # Jobs that added no tasks (e.g. a directory without documents) have nothing left to do
+            for job_id in leases.held():
+                job_ended(job_id, 0.0, None)
+            done += len(claimed)
+    finally:
+        leases.stop()
+        if converter is not None:
+            converter.close()
+        broker.close()
+    print(f"\n--- Worker {worker_id} finished: {done} jobs claimed ---")
+
+def run_analysis(cfg: DictConfig, templates: PromptRegistry, llm_adapter: LLMAdapter, metrics: RunMetrics,
+                 progress: ProgressReporter, jobs: Optional[dict] = None, on_job_end=None, converter=None) -> None:
+    """Build and run the pipeline for every input directory.
+
+    With `jobs` (input dir -> student names, used by workers), only those directories, and
+    in report mode only those students, are processed; `on_job_end(job_id, duration_s,
+    error)` is called as each one ends. A `converter` passed in is left open.
+    """
+    job_kind = "student" if cfg.mode.analysis_mode == "report" else "directory"
+
+    def job_ended(job_id, duration_s, error):
+        progress.job_ended(job_id, job_kind, duration_s, error)
+        metrics.record_span(job_kind, job_id, duration_s, status="ok" if error is None else "error")
+        if job_kind == "student" and error is None:
+            print(f"  Completed processing: {job_id}")
+        if on_job_end is not None:
+            on_job_end(job_id, duration_s, error)
+
+    # Every mode is one DAG of stages. With concurrency > 1, early stages of the next
+    # directory/student run while later stages of the previous one are still in flight;
+    # the adapter's shared slots keep in-flight LLM calls at `concurrency`.
+    pipeline = Pipeline(max_workers=cfg.concurrency, metrics=metrics,
+                        on_group_start=lambda job_id: progress.job_started(job_id, job_kind),
+                        on_group_end=job_ended)
 
     # --- Report 모드 처리 ---
+    own_converter = converter is None
+    output_store = None
+    # (report type, student, html path) of every rendered report when PDFs are rendered in bulk
+    bulk_pages = [] if pdf_bulk_enabled(cfg) else None
     if cfg.mode.analysis_mode == "report":
         print("\n--- Processing Report Mode ---")
-        
-        # Report 모드 전용 처리 로직
-        import re
-        import glob
-        
-        # 각 입력 디렉토리 처리
+        # CPU-bound rendering and token counting go to worker processes when conversion_pool is enabled
+        if own_converter:
+            converter = create_converter(cfg.get('conversion_pool'))
+            if converter.workers:
+                print(f"Conversion pool: {converter.workers} worker processes")
+        if output_store_enabled(cfg):
+            from output_store import OutputStore, store_path
+            output_store = OutputStore(store_path(get_full_path(cfg.mode.output_base_dir)),
+                                       run_id=os.path.basename(get_run_dir()))
+            print(f"Output store: {output_store.path}")
         for input_dir_path in cfg.mode.input_dirs:
-            input_dir = get_full_path(input_dir_path)
-            print(f"\n--- Processing directory: {input_dir} ---")
-            
-            # 폴더 패턴에 맞는 하위 폴더 찾기
-            folder_pattern = re.compile(cfg.mode.file_patterns.folder_pattern)
-            
-            for folder_name in os.listdir(input_dir):
-                folder_path = os.path.join(input_dir, folder_name)
-                if not os.path.isdir(folder_path):
-                    continue
-                    
-                # 폴더명 패턴 매칭
-                match = folder_pattern.match(folder_name)
-                if not match:
-                    continue
-                    
-                student_name = match.group(1)  # 이름 부분
-                student_id = match.group(2)    # 8자리 ID
-                
-                print(f"Processing: {student_name} (ID: {student_id})")
-                
-                # chats_*.txt 파일 찾기
-                chat_files = glob.glob(os.path.join(folder_path, cfg.mode.file_patterns.chat_file_pattern))
-                
-                if not chat_files:
-                    print(f"  No chat files found in {folder_path}")
-                    continue
-                
-                # 모든 chat 파일 내용 연결
-                concatenated_content = ""
-                for chat_file in sorted(chat_files):
-                    with open(chat_file, 'r', encoding='utf-8') as f:
-                        concatenated_content += f.read() + "\n\n"
-                
-                # 학생용 및 교사용 리포트 생성
-                for report_type in cfg.mode.report_types:
-                    print(f"  Generating {report_type} report...")
-                    
-                    # 프롬프트 선택
-                    if report_type == "student":
-                        prompt_template = student_prompt_template
-                    elif report_type == "teacher":
-                        prompt_template = teacher_prompt_template
-                    else:
-                        continue
-                    
-                    # 프롬프트에 대화 내용 삽입
-                    final_prompt = prompt_template.format(query=concatenated_content)
-                    
-                    # LLM 호출
-                    with tqdm(total=1, desc=f"Generating {report_type} report") as pbar:
-                        report_content = llm_adapter.generate(final_prompt)
-                        pbar.update(1)
-                    
-                    # 출력 디렉토리 생성
-                    output_dir = os.path.join(get_full_path(cfg.mode.output_base_dir), report_type)
-                    os.makedirs(output_dir, exist_ok=True)
-                    
-                    # 파일 저장 (MD)
-                    output_filename = f"{student_name}.md"
-                    output_path = os.path.join(output_dir, output_filename)
-                    
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        f.write(report_content)
-                    
-                    print(f"  {report_type.title()} report saved to: {output_path}")
-                    
-                    # PDF 출력 (설정에서 활성화된 경우)
-                    if hasattr(cfg.mode, 'output_formats') and 'pdf' in cfg.mode.output_formats:
-                        try:
-                            from pdf_generator import markdown_to_pdf
-                            pdf_output_path = output_path.replace('.md', '.pdf')
-                            pdf_result = markdown_to_pdf(output_path, pdf_output_path)
-                            if pdf_result:
-                                print(f"  {report_type.title()} PDF saved to: {pdf_output_path}")
-                        except Exception as e:
-                            print(f"  ⚠️ PDF 생성 실패: {e}")
-                
-                print(f"  Completed processing: {student_name}")
+            if jobs is None or input_dir_path in jobs:
+                add_report_stages(pipeline, cfg, input_dir_path, templates, llm_adapter, metrics, converter,
+                                  bulk_pages, output_store, students=jobs[input_dir_path] if jobs else None)
+    else:
+        for input_dir_path in cfg.mode.input_dirs:
+            if jobs is None or input_dir_path in jobs:
+                add_directory_stages(pipeline, cfg, input_dir_path, templates, llm_adapter, metrics)
+
+    progress.add_jobs(len(pipeline.groups()), kind=job_kind)
+    # A failing job does not stop the others; PipelineError is raised once all are done
+    try:
+        pipeline.run()
+    finally:
+        # Reports of failed students are simply missing from the bulk PDF
+        if bulk_pages:
+            render_bulk_pdfs(cfg, bulk_pages, converter, metrics,
+                             keep_html='html' in cfg.mode.output_formats and output_store is None,
+                             output_store=output_store)
+        if converter is not None and own_converter:
+            converter.close()
+        if output_store is not None:
+            output_store.close()
+            # Renderings were moved into the store; only those of failed tasks could be left
+            shutil.rmtree(os.path.join(get_full_path(cfg.mode.output_base_dir), STAGING_DIR), ignore_errors=True)
 
+    if cfg.mode.analysis_mode == "report":
+        before = metrics.counters.get("compaction_tokens_before", 0)
+        if before:
+            after = metrics.counters.get("compaction_tokens_after", 0)
+            print(f"\n🗜️ Transcript compaction: ~{before:,} → ~{after:,} prompt tokens (-{1 - after / before:.0%})")
         print("\n--- Report Mode Processing Complete ---")
-        return  # Exit early for report mode
 
-    # Process each input directory (for summary and integration modes)
-    for input_dir_path in cfg.mode.input_dirs:
-        input_dir = get_full_path(input_dir_path)
-        print(f"\n--- Processing directory: {input_dir} ---")
-
-        # Use the absolute path for the base output directory for this input_dir
-        summaries_base_dir = os.path.join(input_dir, "outputs")
-        os.makedirs(summaries_base_dir, exist_ok=True)
-
-        individual_summaries_dir = os.path.join(summaries_base_dir, "summaries")
-        os.makedirs(individual_summaries_dir, exist_ok=True)
-
-        # Initialize file_handler for the current input_dir
-        file_handler = FileHandler(input_dir)
-
-        # Determine the final report path, adding a number if the file already exists
-        today_str = datetime.now().strftime("%y%m%d")
-        llm_name = cfg.llm.model_name.replace('/', '_')
-        
-        # Include input directory name in the report filename
-        input_dir_name = os.path.basename(input_dir_path)
-        base_report_filename = f"{today_str}_{llm_name}_{input_dir_name}{report_type_suffix}"
-        report_counter = 1
-        final_report_path = os.path.join(summaries_base_dir, f"{base_report_filename}_{report_counter}.md")
-        while os.path.exists(final_report_path):
-            report_counter += 1
-            final_report_path = os.path.join(summaries_base_dir, f"{base_report_filename}_{report_counter}.md")
+def render_bulk_pdfs(cfg: DictConfig, bulk_pages: list, converter, metrics: RunMetrics, keep_html: bool,
+                     output_store=None) -> None:
+    """One PDF per report type (`<type>_reports.pdf`, bookmarked per student) from a single renderer run each.
 
-        # --- 2. Read Documents ---
-        documents = file_handler.read_markdown_files()
-        if not documents:
-            print(f"No markdown files found in {input_dir}. Skipping.")
+    With `output_store`, the PDFs are rendered in the staging folder and moved into the store:
+    the combined one as student `<type>_reports`, split ones under their student.
+    """
+    base_dir = get_full_path(cfg.mode.output_base_dir)
+    for report_type in sorted({page[0] for page in bulk_pages}):
+        pages = sorted((student, html_path) for page_type, student, html_path in bulk_pages if page_type == report_type)
+        output_dir = os.path.join(base_dir, STAGING_DIR, report_type) if output_store is not None \
+            else os.path.join(base_dir, report_type)
+        pdf_path = os.path.join(output_dir, f"{report_type}_reports.pdf")
+        split_files = [os.path.splitext(html_path)[0] + ".pdf" for _, html_path in pages] \
+            if cfg.mode.pdf_bulk.split else None
+        with metrics.span("render_pdf_bulk", report_type):
+            if not converter.run(render_bulk_pdf, pages, pdf_path, split_files, keep_html):
+                continue
+        if output_store is None:
+            print(f"📚 {report_type.title()} PDF ({len(pages)} reports) saved to: {pdf_path}")
             continue
+        # The staging folder is removed at the end of the run: whatever is not stored is lost
+        for (student, _), split_file in zip(pages, split_files or []):
+            if os.path.exists(split_file):
+                output_store.put_file(report_type, student, split_file)
+        output_store.put_file(report_type, f"{report_type}_reports", pdf_path)
+        print(f"📚 {report_type.title()} PDF ({len(pages)} reports) stored in {output_store.path}")
 
-        print(f"Found {len(documents)} documents to analyze in {input_dir_name}.")
+def deduplicate_for_prompt(documents: list, cfg: DictConfig, llm_adapter: LLMAdapter, metrics: RunMetrics,
+                           input_dir_name: str) -> list:
+    """Collapse duplicate/near-duplicate paragraphs across documents and report the token savings."""
+    from dedup import deduplicate_documents
 
-        # --- 3. Generate and Save Individual Summaries ---
-        summary_file_paths = []
-        documents_to_summarize = []
+    with metrics.span("dedup", input_dir_name):
+        deduplicated, stats = deduplicate_documents(documents, cfg.dedup)
+    collapsed = stats['exact_duplicates'] + stats['near_duplicates']
+    tokens_before = llm_adapter.estimate_tokens([doc['content'] for doc in documents])
+    tokens_after = llm_adapter.estimate_tokens([doc['content'] for doc in deduplicated])
+    saved = tokens_before - tokens_after
+    print(f"🧹 Deduplication ({input_dir_name}): {stats['exact_duplicates']} duplicate + "
+          f"{stats['near_duplicates']} near-duplicate of {stats['paragraphs']} paragraphs collapsed, "
+          f"~{tokens_before:,} → ~{tokens_after:,} tokens (-{saved / max(tokens_before, 1):.0%})")
+    metrics.increment("dedup_paragraphs", collapsed)
+    metrics.increment("dedup_tokens_saved", max(saved, 0))
+    return deduplicated
 
-        print("\n--- Checking for Existing Summaries ---")
-        for doc in documents:
-            base_filename = os.path.basename(doc['filename'])
-            summary_filename = f"{os.path.splitext(base_filename)[0]}_summary.md"
-            summary_filepath = os.path.join(individual_summaries_dir, summary_filename)
+def select_sections_for_prompt(documents: list, file_handler: FileHandler, index_path: str, template_text: str,
+                               cfg: DictConfig, llm_adapter: LLMAdapter, metrics: RunMetrics,
+                               input_dir_name: str) -> list:
+    """Keep only the sections most relevant to each heading of the template (or retrieval.queries), within the retrieval token budget."""
+    with metrics.span("retrieve", input_dir_name):
+        index, update = file_handler.load_section_index(index_path, documents, cfg.retrieval.max_section_tokens)
+        token_budget = (int(llm_adapter.model_context_limit * cfg.retrieval.budget_ratio)
+                        - llm_adapter.estimate_tokens(template_text))
+        queries = list(cfg.retrieval.queries or []) or template_headings(template_text)
+        selected, stats = index.select(queries, cfg.retrieval.top_k, token_budget)
+    print(f"📚 Section retrieval ({input_dir_name}): index {len(index)} sections "
+          f"({update['added'] + update['updated']} file(s) indexed, {update['reused']} reused), "
+          f"{stats['selected']} selected for {stats['queries']} heading(s), "
+          f"~{stats['tokens_total']:,} → ~{stats['tokens_selected']:,} tokens (budget {stats['token_budget']:,})")
+    metrics.increment("retrieval_sections_selected", stats['selected'])
+    metrics.increment("retrieval_tokens_dropped", stats['tokens_total'] - stats['tokens_selected'])
+    return selected
 
-            if os.path.exists(summary_filepath):
-                print(f"  └ Existing summary found for {doc['filename']}. Reusing it.")
-                summary_file_paths.append(summary_filepath)
+def add_report_stages(pipeline: Pipeline, cfg: DictConfig, input_dir_path: str, templates: PromptRegistry,
+                      llm_adapter: LLMAdapter, metrics: RunMetrics, converter=None, bulk_pages=None,
+                      output_store=None, students=None) -> None:
+    """Report mode stages for every student folder of one input directory.
+
+    load (chat files) -> one report per report type (student, teacher)
+    Rendering (HTML/PDF) and transcript token counts run through `converter`
+    (conversion_pool), in the task's thread when it is None. With `bulk_pages`
+    (mode.pdf_bulk), reports are rendered to HTML only and listed there for one
+    combined PDF per report type at the end of the run. With `output_store`
+    (mode.output_store), renderings are written to a staging folder and then
+    moved into the store. `students` limits the run to those student names.
+    With mode.structured_output, reports are JSON validated against a per-type schema
+    and rendered to the output formats by report_render. With mode.section_generation,
+    each report section is its own task (cached per section) and an assemble task
+    joins them: load -> sections -> assemble.
+    """
+    import glob
+    import hashlib
+    import json
+    from tqdm import tqdm
+
+    input_dir = get_full_path(input_dir_path)
+    print(f"\n--- Processing directory: {input_dir} ---")
+    if converter is None:
+        converter = InlineConverter()
+    assets_cfg = html_assets_config(cfg)
+    if output_store is not None:
+        # Stored HTML has no folder to put _assets/ next to: keep it self-contained
+        assets_cfg['mode'] = "inline"
+
+    # 대화 기록 압축 (설정된 경우): 시스템 문구/타임스탬프 제거, 반복 축약, 긴 튜터 답변 중략
+    compactor = None
+    if hasattr(cfg.mode, 'compaction') and cfg.mode.compaction.enabled:
+        from chat_compaction import ChatCompactor
+        compactor = ChatCompactor.from_config(cfg.mode.compaction)
+
+    # 구조화 출력: 보고서 유형별 JSON 스키마 (렌더링은 템플릿으로 결정적으로 수행)
+    schemas = {}
+    if structured_output_enabled(cfg):
+        from structured_report import load_schema
+        schema_dir = get_full_path(cfg.mode.structured_output.schema_dir)
+        schemas = {report_type: load_schema(schema_dir, report_type) for report_type in cfg.mode.report_types}
+
+    # 섹션 단위 생성: 섹션마다 프롬프트 하나, (모델, 섹션 프롬프트, 입력) 해시가 같으면 이전 결과 재사용
+    sectioned = {}
+    if section_generation_enabled(cfg):
+        from report_sections import SectionCache, section_cache_key, split_report_template
+        sectioned = {report_type: split_report_template(templates[report_type], cfg.mode.section_generation.heading_level)
+                     for report_type in cfg.mode.report_types if report_type in templates}
+
+    def section_cache_path(student_name, report_type):
+        return os.path.join(get_full_path(cfg.mode.output_base_dir), report_type, ".sections", f"{student_name}.json")
+
+    def load_chats(folder_path, student_name, student_id):
+        print(f"Processing: {student_name} (ID: {student_id})")
+
+        # chats_*.txt 파일 찾기
+        chat_files = glob.glob(os.path.join(folder_path, cfg.mode.file_patterns.chat_file_pattern))
+        if not chat_files:
+            print(f"  No chat files found in {folder_path}")
+            return None
+
+        # 모든 chat 파일 내용 연결
+        parts = []
+        for chat_file in sorted(chat_files):
+            with open(chat_file, 'r', encoding='utf-8') as f:
+                parts.extend((f.read(), "\n\n"))
+        concatenated_content = "".join(parts)
+
+        if compactor is not None:
+            compacted = compactor.compact(concatenated_content)
+            stats = converter.run(compaction_token_stats, concatenated_content, compacted)
+            metrics.record_item("compaction", student_name, **stats)
+            metrics.increment("compaction_tokens_before", stats['tokens_before'])
+            metrics.increment("compaction_tokens_after", stats['tokens_after'])
+            saved = 1 - stats['tokens_after'] / max(stats['tokens_before'], 1)
+            print(f"  🗜️ Transcript compacted: ~{stats['tokens_before']:,} → ~{stats['tokens_after']:,} tokens (-{saved:.0%})")
+            concatenated_content = compacted
+        return concatenated_content
+
+    def generate_report(student_name, report_type, concatenated_content):
+        if concatenated_content is None:
+            return
+        print(f"  Generating {report_type} report...")
+
+        # 프롬프트에 대화 내용 삽입
+        final_prompt = templates[report_type].render(query=concatenated_content)
+
+        # LLM 호출
+        with tqdm(total=1, desc=f"Generating {report_type} report") as pbar:
+            report_content = llm_adapter.generate(final_prompt, json_mode=report_type in schemas)
+            pbar.update(1)
+
+        if report_type in schemas:
+            from structured_report import StructuredReportError, parse_report
+            try:
+                report = parse_report(report_content, schemas[report_type])
+            except StructuredReportError as e:
+                # 스키마에 맞지 않으면 응답을 그대로 Markdown 으로 저장
+                metrics.increment("structured_invalid")
+                print(f"  ⚠️ Structured {report_type} report invalid ({e}); saving raw response as Markdown")
             else:
-                documents_to_summarize.append(doc)
-
-        if documents_to_summarize:
-            print("\n--- Generating New Individual Summaries ---")
-            for doc in tqdm(documents_to_summarize, desc="Summarizing new documents"):
-                tqdm.write(f"\nProcessing: {doc['filename']}")
-                
-                base_filename = os.path.basename(doc['filename'])
-                summary_filename = f"{os.path.splitext(base_filename)[0]}_summary.md"
-                summary_filepath = os.path.join(individual_summaries_dir, summary_filename)
-
-                prompt = individual_prompt_template.format(document_content=doc['content'])
-                summary_content = llm_adapter.generate(prompt)
-                
-                with open(summary_filepath, 'w', encoding='utf-8') as f:
-                    f.write(summary_content)
-                
-                summary_snippet = summary_content.strip().replace('\n', ' ')[0:200]
-                tqdm.write(f"  └ Summary Snippet: {summary_snippet}...")
-
-                summary_file_paths.append(summary_filepath)
+                json_path = os.path.join(report_dir(report_type), f"{student_name}.json")
+                with open_atomic(json_path) as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2)
+                with metrics.span("render", f"{student_name}/{report_type}"):
+                    written = converter.run(render_report_files, report, json_path[:-len('.json')],
+                                            output_formats(), assets_cfg)
+                add_bulk_page(student_name, report_type, written)
+                if output_store is not None:
+                    store_outputs(student_name, report_type, [json_path] + list(written.values()))
+                else:
+                    print(f"  {report_type.title()} report saved to: {json_path} (+ {', '.join(written)})")
+                return
+        save_report(student_name, report_type, report_content)
+
+    def generate_section(student_name, report_type, number, concatenated_content):
+        """(cache key, text) of one report section; reused when the section prompt and input are unchanged."""
+        if concatenated_content is None:
+            return None
+        section = sectioned[report_type].sections[number]
+        input_sha256 = hashlib.sha256(concatenated_content.encode('utf-8')).hexdigest()
+        key = section_cache_key(llm_adapter.model_name, section, input_sha256)
+        cached = SectionCache(section_cache_path(student_name, report_type)).get(key)
+        if cached is not None:
+            metrics.increment("report_sections_reused")
+            return key, cached
+        print(f"  Generating {report_type} section {number + 1}/{len(sectioned[report_type].sections)}...")
+        text = llm_adapter.generate(section.render(query=concatenated_content))
+        metrics.increment("report_sections_generated")
+        return key, text
+
+    def assemble_report(student_name, report_type, *sections):
+        if any(section is None for section in sections):
+            return
+        report = sectioned[report_type]
+        cache = SectionCache(section_cache_path(student_name, report_type))
+        reused = sum(1 for key, _ in sections if cache.get(key) is not None)
+        # Failed calls come back as "Error: ..." text; keep them out of the cache so they are retried
+        cache.save({key: {'section': heading, 'text': text}
+                    for (key, text), heading in zip(sections, report.headings) if not text.startswith("Error:")})
+        print(f"  ♻️ {report_type.title()} report: {reused}/{len(sections)} sections reused, "
+              f"{len(sections) - reused} generated")
+        save_report(student_name, report_type, report.assemble([text for _, text in sections]))
+
+    def output_formats():
+        formats = list(cfg.mode.output_formats) if hasattr(cfg.mode, 'output_formats') else ['md']
+        # 묶음 PDF: 보고서마다 HTML 만 만들고 PDF는 실행 끝에 유형별로 한 번에 렌더링
+        if bulk_pages is not None and 'pdf' in formats:
+            formats = [fmt for fmt in formats if fmt != 'pdf'] + ([] if 'html' in formats else ['html'])
+        return formats
+
+    def report_dir(report_type):
+        # 출력 저장소 사용 시 렌더링 파일은 임시 폴더에 쓰고 저장소로 옮김
+        base_dir = get_full_path(cfg.mode.output_base_dir)
+        return os.path.join(base_dir, STAGING_DIR, report_type) if output_store is not None \
+            else os.path.join(base_dir, report_type)
+
+    def store_outputs(student_name, report_type, paths):
+        """Move the written renderings of one report into the output store."""
+        requested = set(cfg.mode.get('output_formats', ['md'])) | {'md', 'json'}
+        stored = []
+        for path in paths:
+            fmt = os.path.splitext(path)[1].lstrip('.')
+            # HTML made only for the bulk PDF is removed once that is rendered
+            needed_for_bulk = bulk_pages is not None and fmt == 'html'
+            if fmt in requested:
+                output_store.put_file(report_type, student_name, path, remove=not needed_for_bulk)
+                stored.append(fmt)
+            elif not needed_for_bulk:
+                os.remove(path)
+        print(f"  {report_type.title()} report stored in {output_store.path} ({', '.join(stored)})")
+
+    def add_bulk_page(student_name, report_type, written):
+        if bulk_pages is not None and 'html' in written:
+            bulk_pages.append((report_type, student_name, written['html']))
+
+    def save_report(student_name, report_type, report_content):
+        # 파일 저장 (MD)
+        output_path = os.path.join(report_dir(report_type), f"{student_name}.md")
+        write_text(output_path, report_content)
+        written = {'md': output_path}
+
+        if output_store is None:
+            print(f"  {report_type.title()} report saved to: {output_path}")
+
+        # HTML/PDF 출력 (설정에서 활성화된 경우)
+        formats = output_formats()
+        if 'html' in formats or 'pdf' in formats:
+            with metrics.span("render_pdf" if 'pdf' in formats else "render", f"{student_name}/{report_type}"):
+                try:
+                    rendered = converter.run(render_markdown_file, output_path, formats, assets_cfg)
+                    if output_store is None:
+                        for fmt, path in rendered.items():
+                            print(f"  {report_type.title()} {fmt.upper()} saved to: {path}")
+                    add_bulk_page(student_name, report_type, rendered)
+                    written.update(rendered)
+                except Exception as e:
+                    print(f"  ⚠️ HTML/PDF 생성 실패: {e}")
+        if output_store is not None:
+            store_outputs(student_name, report_type, list(written.values()))
+
+    # 폴더 패턴(이름_8자리ID)에 맞는 학생 폴더 수집
+    student_folders = FileHandler(input_dir).find_student_folders(cfg.mode.file_patterns.folder_pattern)
+    for folder_path, student_name, student_id in student_folders:
+        if students is not None and student_name not in students:
+            continue
+        load_key = f"{student_name}/load"
+        if load_key in pipeline.tasks:
+            print(f"  ⚠️ Duplicate student name {student_name} ({folder_path}); skipping")
+            continue
+        pipeline.add(load_key, partial(load_chats, folder_path, student_name, student_id),
+                     stage="load", group=student_name)
+        # 학생용 및 교사용 리포트 생성
+        for report_type in cfg.mode.report_types:
+            if report_type not in ("student", "teacher"):
+                continue
+            if report_type in sectioned:
+                section_keys = [pipeline.add(f"{student_name}/{report_type}/{number + 1}",
+                                             partial(generate_section, student_name, report_type, number),
+                                             deps=[load_key], stage="report_section", group=student_name)
+                                for number in range(len(sectioned[report_type].sections))]
+                pipeline.add(f"{student_name}/{report_type}", partial(assemble_report, student_name, report_type),
+                             deps=section_keys, stage="report", group=student_name)
+                continue
+            pipeline.add(f"{student_name}/{report_type}", partial(generate_report, student_name, report_type),
+                         deps=[load_key], stage="report", group=student_name)
+
+def add_directory_stages(pipeline: Pipeline, cfg: DictConfig, input_dir_path: str, templates: PromptRegistry,
+                         llm_adapter: LLMAdapter, metrics: RunMetrics) -> None:
+    """Summary/integration stages for one input directory.
+
+    summarize (each new document) -> integrate:analysis -> integrate:report -> feedback
+    Documents are read now; everything that calls a model runs in the pipeline.
+    """
+    from tqdm import tqdm
+
+    individual_prompt_template = templates['individual']
+    final_analysis_prompt_template = templates['final']
+    integration_analysis_prompt_template = templates['integration_analysis']
+    integration_report_prompt_template = templates['integration_report']
+    report_type_suffix = REPORT_TYPE_SUFFIXES[cfg.mode.analysis_mode]
+    two_step_configured = hasattr(cfg.mode, 'two_step_integration') and cfg.mode.two_step_integration
+
+    input_dir = get_full_path(input_dir_path)
+    input_dir_name = os.path.basename(input_dir_path)
+    print(f"\n--- Processing directory: {input_dir} ---")
+
+    # Use the absolute path for the base output directory for this input_dir
+    summaries_base_dir = os.path.join(input_dir, "outputs")
+    os.makedirs(summaries_base_dir, exist_ok=True)
+
+    individual_summaries_dir = os.path.join(summaries_base_dir, "summaries")
+    os.makedirs(individual_summaries_dir, exist_ok=True)
+    section_index_path = os.path.join(summaries_base_dir, "section_index.json")
+
+    # Initialize file_handler for the current input_dir
+    file_handler = FileHandler(input_dir)
+
+    # Determine the final report path, adding a number if the file already exists
+    today_str = datetime.now().strftime("%y%m%d")
+    llm_name = cfg.llm.model_name.replace('/', '_')
+
+    # Include input directory name in the report filename
+    base_report_filename = f"{today_str}_{llm_name}_{input_dir_name}{report_type_suffix}"
+    report_counter = 1
+    final_report_path = os.path.join(summaries_base_dir, f"{base_report_filename}_{report_counter}.md")
+    while os.path.exists(final_report_path):
+        report_counter += 1
+        final_report_path = os.path.join(summaries_base_dir, f"{base_report_filename}_{report_counter}.md")
+
+    # --- 2. Read Documents ---
+    with metrics.span("load", input_dir_name):
+        documents = file_handler.read_markdown_files()
+    if not documents:
+        print(f"No markdown files found in {input_dir}. Skipping.")
+        return
+
+    print(f"Found {len(documents)} documents to analyze in {input_dir_name}.")
+
+    # --- 3. Generate and Save Individual Summaries ---
+    def summarize(doc, summary_filepath):
+        print(f"\nProcessing: {doc['filename']}")
+        prompt = individual_prompt_template.render(document_content=doc['content'])
+        summary_content = llm_adapter.generate(prompt)
+
+        write_text(summary_filepath, summary_content)
+
+        summary_snippet = summary_content.strip().replace('\n', ' ')[0:200]
+        print(f"  └ Summary Snippet: {summary_snippet}...")
+
+    summary_file_paths = []
+    summarize_keys = []
+
+    print("\n--- Checking for Existing Summaries ---")
+    for doc in documents:
+        base_filename = os.path.basename(doc['filename'])
+        summary_filename = f"{os.path.splitext(base_filename)[0]}_summary.md"
+        summary_filepath = os.path.join(individual_summaries_dir, summary_filename)
+        summary_file_paths.append(summary_filepath)
+
+        if is_valid(summary_filepath):
+            print(f"  └ Existing summary found for {doc['filename']}. Reusing it.")
+            metrics.increment("summary_cache_hits")
+        elif adopt(summary_filepath):
+            # Written before outputs had a manifest: trusted as is rather than paid for again
+            print(f"  └ ⚠️ Existing summary for {doc['filename']} predates the outputs manifest. "
+                  f"Adopting and reusing it (delete it to regenerate).")
+            metrics.increment("summary_cache_hits")
         else:
-            print("\n--- No new documents to summarize. ---")
+            if os.path.exists(summary_filepath):
+                # Not in the outputs manifest, or changed since: possibly cut short by an interrupted run
+                print(f"  └ Existing summary for {doc['filename']} failed its checksum. Regenerating it.")
+                metrics.increment("summary_invalid")
+            summarize_keys.append(pipeline.add(f"{input_dir_name}/summarize/{doc['filename']}",
+                                               partial(summarize, doc, summary_filepath),
+                                               stage="summarize", group=input_dir_name))
+    if not summarize_keys:
+        print("\n--- No new documents to summarize. ---")
 
-        # --- 4. Generate Final Analysis Report based on mode ---
+    # --- 4. Generate Final Analysis Report based on mode ---
+    # Step 1 returns either the finished report or, for two-step integration, the analysis
+    # summary that step 2 turns into the report.
+    def integrate_analysis(*_):
         if cfg.mode.analysis_mode == "summary":
-            print("\n--- Generating Comprehensive Summary Report ---")
-            # Concatenate all individual summaries
-            concatenated_input = ""
+            print(f"\n--- Generating Comprehensive Summary Report ({input_dir_name}) ---")
+            # Concatenate all individual summaries (as segments, joined once into the prompt)
+            summaries = []
             for filepath in summary_file_paths:
                 filename = os.path.basename(filepath).replace('_summary.md', '.md')
                 with open(filepath, 'r', encoding='utf-8') as f:
-                    summary_text = f.read()
-                concatenated_input += f"--- DOCUMENT: {filename} ---\n\n{summary_text}\n\n"
-            
-            final_prompt = final_analysis_prompt_template.format(documents_concatenated=concatenated_input)
-            final_report_content = ""
+                    summaries.append({'filename': filename, 'content': f.read()})
+            concatenated_input = document_parts(summaries)
+
+            final_prompt = final_analysis_prompt_template.render(documents_concatenated=concatenated_input)
             with tqdm(total=1, desc="Creating final report") as pbar:
                 final_report_content = llm_adapter.generate(final_prompt)
                 pbar.update(1)
+            return {'report': final_report_content}
+
+        print(f"\n--- Integrating and Optimizing Documents ({input_dir_name}) ---")
 
-        elif cfg.mode.analysis_mode == "integration":
-            print("\n--- Integrating and Optimizing Documents ---")
-            # Concatenate all original documents for integration
-            concatenated_original_documents = ""
-            for doc in documents: # Use original documents, not summaries
-                filename = os.path.basename(doc['filename'])
-                concatenated_original_documents += f"--- DOCUMENT: {filename} ---\n\n{doc['content']}\n\n"
+        def concatenate(source_documents):
+            if cfg.dedup.enabled:
+                # Drafts share many paragraphs: collapse them before they are paid for in the prompt
+                source_documents = deduplicate_for_prompt(source_documents, cfg, llm_adapter, metrics, input_dir_name)
+            # Use original documents, not summaries. Segments are only joined once, into the prompt
+            return document_parts(source_documents)
 
-            # Smart token strategy analysis
-            print("\n🔍 Analyzing content and determining optimal strategy...")
+        # Concatenate all original documents for integration
+        concatenated_original_documents = concatenate(documents)
+
+        # Smart token strategy analysis
+        print("\n🔍 Analyzing content and determining optimal strategy...")
+        strategy_info = llm_adapter.analyze_token_strategy(concatenated_original_documents)
+
+        if strategy_info['strategy'] == 'chunk' and cfg.retrieval.enabled:
+            # Too large even for two-step: send only the sections relevant to each heading
+            print(f"  └─ ~{strategy_info['token_count']:,} tokens exceed the two-step threshold; selecting relevant sections")
+            selected_documents = select_sections_for_prompt(
+                documents, file_handler, section_index_path, (integration_analysis_prompt_template or final_analysis_prompt_template).text,
+                cfg, llm_adapter, metrics, input_dir_name)
+            concatenated_original_documents = concatenate(selected_documents)
             strategy_info = llm_adapter.analyze_token_strategy(concatenated_original_documents)
-            
-            # Display strategy information
-            print(f"📊 Token Analysis:")
-            print(f"  ├─ Content tokens: {strategy_info['token_count']:,}")
-            print(f"  ├─ Model context limit: {strategy_info['model_context_limit']:,}")
-            print(f"  ├─ Direct integration threshold: {strategy_info['direct_threshold']:,}")
-            print(f"  ├─ Two-step threshold: {strategy_info['two_step_threshold']:,}")
-            print(f"  ├─ Recommended strategy: {strategy_info['strategy'].upper()}")
-            print(f"  ├─ Risk level: {strategy_info['risk_level'].upper()}")
-            print(f"  └─ Reason: {strategy_info['reason']}")
-            
-            # Log strategy information
-            logging.info(f"Token strategy analysis: {strategy_info}")
-
-            # Execute based on strategy
-            if strategy_info['strategy'] == 'direct':
-                print(f"\n⚡ Executing DIRECT integration (single-step)...")
-                final_prompt = integration_analysis_prompt_template.format(documents_concatenated=concatenated_original_documents)
-                final_report_content = ""
-                with tqdm(total=1, desc="Direct integration") as pbar:
-                    final_report_content = llm_adapter.generate(final_prompt)
-                    pbar.update(1)
-            
-            elif strategy_info['strategy'] == 'two_step':
-                print(f"\n🔄 Executing TWO-STEP integration...")
-                
-                if hasattr(cfg.mode, 'two_step_integration') and cfg.mode.two_step_integration:
-                    print("--- Step 1: Generating Integration Analysis Summary ---")
-                    analysis_prompt = integration_analysis_prompt_template.format(documents_concatenated=concatenated_original_documents)
-                    integration_analysis_summary = ""
-                    with tqdm(total=1, desc="Generating analysis summary") as pbar:
-                        integration_analysis_summary = llm_adapter.generate(analysis_prompt)
-                        pbar.update(1)
-                    
-                    print("--- Step 2: Generating Final Integration Report ---")
-                    report_prompt = integration_report_prompt_template.format(integration_analysis_summary=integration_analysis_summary)
-                    final_report_content = ""
-                    with tqdm(total=1, desc="Creating final report") as pbar:
-                        final_report_content = llm_adapter.generate(report_prompt)
-                        pbar.update(1)
-                else:
-                    # Fallback to single-step if two_step_integration not configured
-                    print("⚠️  Two-step integration not configured, falling back to single-step")
-                    final_prompt = final_analysis_prompt_template.format(documents_concatenated=concatenated_original_documents)
-                    final_report_content = ""
-                    with tqdm(total=1, desc="Single-step fallback") as pbar:
-                        final_report_content = llm_adapter.generate(final_prompt)
-                        pbar.update(1)
-            
-            elif strategy_info['strategy'] == 'chunk':
-                print(f"\n⚠️  CHUNKING strategy detected - content exceeds safe limits")
-                print("📋 Consider:")
-                print("  ├─ Breaking documents into smaller sections")
-                print("  ├─ Using document summary mode instead")
-                print("  └─ Processing documents in batches")
-                
-                # For now, attempt two-step with warning
-                print("🔄 Attempting two-step integration with risk warning...")
-                logging.warning("Content exceeds safe limits - attempting two-step integration")
-                
-                if hasattr(cfg.mode, 'two_step_integration') and cfg.mode.two_step_integration:
-                    analysis_prompt = integration_analysis_prompt_template.format(documents_concatenated=concatenated_original_documents)
-                    integration_analysis_summary = ""
-                    with tqdm(total=1, desc="High-risk analysis") as pbar:
-                        integration_analysis_summary = llm_adapter.generate(analysis_prompt)
-                        pbar.update(1)
-                    
-                    report_prompt = integration_report_prompt_template.format(integration_analysis_summary=integration_analysis_summary)
-                    final_report_content = ""
-                    with tqdm(total=1, desc="High-risk integration") as pbar:
-                        final_report_content = llm_adapter.generate(report_prompt)
-                        pbar.update(1)
-                else:
-                    final_prompt = final_analysis_prompt_template.format(documents_concatenated=concatenated_original_documents)
-                    final_report_content = ""
-                    with tqdm(total=1, desc="High-risk single-step") as pbar:
-                        final_report_content = llm_adapter.generate(final_prompt)
-                        pbar.update(1)
-            
-            else:
-                print(f"❌ Unknown strategy: {strategy_info['strategy']} - using fallback")
-                final_prompt = final_analysis_prompt_template.format(documents_concatenated=concatenated_original_documents)
-                final_report_content = ""
-                with tqdm(total=1, desc="Fallback integration") as pbar:
-                    final_report_content = llm_adapter.generate(final_prompt)
-                    pbar.update(1)
+
+        # Display strategy information
+        print(f"📊 Token Analysis ({input_dir_name}):")
+        print(f"  ├─ Content tokens: {strategy_info['token_count']:,}")
+        print(f"  ├─ Model context limit: {strategy_info['model_context_limit']:,}")
+        print(f"  ├─ Direct integration threshold: {strategy_info['direct_threshold']:,}")
+        print(f"  ├─ Two-step threshold: {strategy_info['two_step_threshold']:,}")
+        print(f"  ├─ Recommended strategy: {strategy_info['strategy'].upper()}")
+        print(f"  ├─ Risk level: {strategy_info['risk_level'].upper()}")
+        print(f"  └─ Reason: {strategy_info['reason']}")
+
+        # Log strategy information
+        logging.info(f"Token strategy analysis: {strategy_info}")
+
+        # Execute based on strategy
+        if strategy_info['strategy'] == 'direct':
+            print(f"\n⚡ Executing DIRECT integration (single-step)...")
+            final_prompt = integration_analysis_prompt_template.render(documents_concatenated=concatenated_original_documents)
+            with tqdm(total=1, desc="Direct integration") as pbar:
+                final_report_content = llm_adapter.generate(final_prompt)
+                pbar.update(1)
+            return {'report': final_report_content}
+
+        if strategy_info['strategy'] == 'two_step':
+            print(f"\n🔄 Executing TWO-STEP integration...")
+            analysis_desc, report_desc, fallback_desc = "Generating analysis summary", "Creating final report", "Single-step fallback"
+            if not two_step_configured:
+                # Fallback to single-step if two_step_integration not configured
+                print("⚠️  Two-step integration not configured, falling back to single-step")
+        elif strategy_info['strategy'] == 'chunk':
+            print(f"\n⚠️  CHUNKING strategy detected - content exceeds safe limits")
+            print("📋 Consider:")
+            print("  ├─ Breaking documents into smaller sections")
+            print("  ├─ Using document summary mode instead")
+            print("  └─ Processing documents in batches")
+
+            # For now, attempt two-step with warning
+            print("🔄 Attempting two-step integration with risk warning...")
+            logging.warning("Content exceeds safe limits - attempting two-step integration")
+            analysis_desc, report_desc, fallback_desc = "High-risk analysis", "High-risk integration", "High-risk single-step"
+        else:
+            print(f"❌ Unknown strategy: {strategy_info['strategy']} - using fallback")
+            analysis_desc, report_desc, fallback_desc = None, None, "Fallback integration"
+
+        if two_step_configured and analysis_desc:
+            print("--- Step 1: Generating Integration Analysis Summary ---")
+            analysis_prompt = integration_analysis_prompt_template.render(documents_concatenated=concatenated_original_documents)
+            with tqdm(total=1, desc=analysis_desc) as pbar:
+                integration_analysis_summary = llm_adapter.generate(analysis_prompt)
+                pbar.update(1)
+            return {'analysis': integration_analysis_summary, 'desc': report_desc}
+
+        final_prompt = final_analysis_prompt_template.render(documents_concatenated=concatenated_original_documents)
+        with tqdm(total=1, desc=fallback_desc) as pbar:
+            final_report_content = llm_adapter.generate(final_prompt)
+            pbar.update(1)
+        return {'report': final_report_content}
+
+    def integrate_report(step1):
+        if 'analysis' in step1:
+            print(f"--- Step 2: Generating Final Integration Report ({input_dir_name}) ---")
+            report_prompt = integration_report_prompt_template.render(integration_analysis_summary=step1['analysis'])
+            with tqdm(total=1, desc=step1['desc']) as pbar:
+                final_report_content = llm_adapter.generate(report_prompt)
+                pbar.update(1)
+        else:
+            final_report_content = step1['report']
 
         # --- 5. Write Final Report ---
-        with open(final_report_path, 'w', encoding='utf-8') as f:
-            f.write(final_report_content)
+        write_text(final_report_path, final_report_content)
 
         print(f"\nAnalysis complete. Report saved to: {final_report_path}")
+        return final_report_path
 
-        # --- 6. Generate Feedback if path is provided ---
-        if hasattr(cfg.mode, 'feedback_prompt_path') and cfg.mode.feedback_prompt_path:
-            print(f"\n--- Generating Feedback for {os.path.basename(final_report_path)} ---")
-            feedback_output_path = final_report_path.replace(".md", "_feedback.md")
-            feedback_command = (
-                f"python3 src/feedback_generator.py "
-                f"--report_file \"{final_report_path}\" "
-                f"--pi_info_file \"{get_full_path('data/target/lab.md')}\" "
-                f"--feedback_prompt_file \"{get_full_path(cfg.mode.feedback_prompt_path)}\" "
-                f"--output_file \"{feedback_output_path}\""
-            )
-            
-            try:
+    analysis_key = pipeline.add(f"{input_dir_name}/integrate:analysis", integrate_analysis, deps=summarize_keys,
+                                stage="integrate", group=input_dir_name)
+    report_key = pipeline.add(f"{input_dir_name}/integrate:report", integrate_report, deps=[analysis_key],
+                              stage="integrate", group=input_dir_name)
+
+    # --- 6. Generate Feedback if path is provided ---
+    def generate_feedback(final_report_path):
+        print(f"\n--- Generating Feedback for {os.path.basename(final_report_path)} ---")
+        feedback_output_path = final_report_path.replace(".md", "_feedback.md")
+        metrics_fd, feedback_metrics_path = tempfile.mkstemp(prefix="feedback_metrics_", suffix=".json")
+        os.close(metrics_fd)
+        feedback_command = (
+            f"python3 src/feedback_generator.py "
+            f"--report_file \"{final_report_path}\" "
+            f"--pi_info_file \"{get_full_path('data/target/lab.md')}\" "
+            f"--feedback_prompt_file \"{get_full_path(cfg.mode.feedback_prompt_path)}\" "
+            f"--output_file \"{feedback_output_path}\" "
+            f"--metrics_file \"{feedback_metrics_path}\""
+        )
+
+        try:
+            # The feedback generator calls a model too, so it takes one of the shared slots
+            with llm_adapter.slot():
                 result = subprocess.run(feedback_command, shell=True, capture_output=True, text=True)
-                if result.returncode == 0:
-                    print(f"Feedback generated successfully: {feedback_output_path}")
-                else:
-                    print(f"Error generating feedback: {result.stderr}")
-            except Exception as e:
-                print(f"Error running feedback generator: {e}")
+            if result.returncode == 0:
+                print(f"Feedback generated successfully: {feedback_output_path}")
+            else:
+                print(f"Error generating feedback: {result.stderr}")
+        except Exception as e:
+            print(f"Error running feedback generator: {e}")
+        finally:
+            metrics.merge_file(feedback_metrics_path, stage="feedback")
+            os.remove(feedback_metrics_path)
+
+    if hasattr(cfg.mode, 'feedback_prompt_path') and cfg.mode.feedback_prompt_path:
+        if llm_adapter.backend.name != "litellm":
+            # feedback_generator.py runs in its own process and always calls the real provider
+            print(f"Feedback skipped for {input_dir_name} (llm.backend={llm_adapter.backend.name})")
+            return
+        pipeline.add(f"{input_dir_name}/feedback", generate_feedback, deps=[report_key],
+                     stage="feedback", group=input_dir_name)
 
 
 if __name__ == "__main__":
+    # `--plan` is shorthand for the Hydra override `plan=true`
+    if "--plan" in sys.argv:
+        sys.argv = [arg for arg in sys.argv if arg != "--plan"] + ["plan=true"]
     main()
\ No newline at end of file
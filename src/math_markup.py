@@ -0,0 +1,117 @@
+# src/math_markup.py
+"""
+TeX math in Markdown -> MathJax-ready HTML, in one left-to-right pass.
+
+Rules (close to pandoc's tex_math_dollars):
+- `$$...$$` is display math and may span lines.
+- `$...$` is inline math on one line. The opening `$` must be followed by a
+  non-space; the closing `$` must follow a non-space and not be followed by a
+  digit. So "$5 and $10" stays text.
+- `\\$` is a literal dollar sign.
+- Fenced code blocks and inline code spans are copied unchanged.
+
+Scanning is done by one compiled pattern. Math content can't cross an unescaped
+`$`, so an opener without a closer costs only the distance to the next dollar.
+A missing code-span or fence closer is remembered per delimiter length, and
+adversarial input (thousands of unmatched `$`, `$$` or backtick runs) stays linear.
+"""
+
+import html
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+# One alternation, tried left to right at each position: code first, then escapes, then math.
+# Math content stops at the next unescaped dollar (and, inline, at the end of the line),
+# so a failed match costs at most the distance to that dollar.
+_TOKEN = re.compile(r"""
+    (?=[$`\\~]|^[ ])  # cheap first-character gate
+    (?: ^[ ]{0,3}(?P<fence>`{3,}|~{3,})
+  | (?P<ticks>`+)
+  | (?P<escape>\\[\\$`])
+  | \$\$(?P<display>(?:[^$\\]|\\[\s\S]|\$(?!\$))+?)\$\$
+  | \$(?P<inline>(?!\s)(?:[^$\\\n]|\\.)+?)(?<!\s)\$(?!\d) )
+""", re.MULTILINE | re.VERBOSE)
+_PLACEHOLDER = re.compile(r'<p>@@math(\d+)@@</p>|@@math(\d+)@@')
+
+
+@lru_cache(maxsize=None)
+def _fence_close(marker: str) -> 're.Pattern':
+    return re.compile(rf'(?m)^[ ]{{0,3}}{re.escape(marker[0])}{{{len(marker)},}}[ \t]*$')
+
+
+@lru_cache(maxsize=None)
+def _ticks_close(count: int) -> 're.Pattern':
+    return re.compile(rf'(?<!`)`{{{count}}}(?!`)')
+
+
+def inline_math_html(tex: str) -> str:
+    return f'<span class="math-inline">\\({html.escape(tex, quote=False)}\\)</span>'
+
+
+def display_math_html(tex: str) -> str:
+    return f'<div class="math-display">\\[{html.escape(tex, quote=False)}\\]</div>'
+
+
+def rewrite_math(text: str, stash: Optional[List[str]] = None) -> str:
+    """Replace math in Markdown `text` with MathJax HTML (see module docstring).
+
+    With a `stash` list, the HTML is appended to it and the text gets `@@math<n>@@`
+    placeholders instead, so a Markdown converter cannot touch `_`, `*` or `\\`
+    inside formulas; restore_math() puts the HTML back afterwards.
+    """
+    if '$' not in text:
+        return text
+    out = []
+    pos = 0
+    # Earliest position from which a closing fence/backtick run is known not to exist
+    no_close = {}
+
+    def find_close(kind, pattern: 're.Pattern', start: int):
+        if start >= no_close.get(kind, len(text) + 1):
+            return None
+        match = pattern.search(text, start)
+        if match is None:
+            no_close[kind] = start
+        return match
+
+    while True:
+        token = _TOKEN.search(text, pos)
+        if token is None:
+            out.append(text[pos:])
+            break
+        out.append(text[pos:token.start()])
+        kind = token.lastgroup
+        value = token.group(kind)
+        pos = token.end()
+
+        if kind == 'fence':
+            start = text.find('\n', pos) + 1 or len(text)
+            close = find_close(value[0] * len(value), _fence_close(value), start)
+            pos = close.end() if close else len(text)
+            out.append(text[token.start():pos])
+        elif kind == 'ticks':
+            close = find_close(len(value), _ticks_close(len(value)), pos)
+            if close:
+                pos = close.end()
+            out.append(text[token.start():pos])
+        elif kind == 'escape':
+            out.append('&#36;' if value == '\\$' else value)
+        elif kind == 'display' and not value.strip():
+            out.append('$$')
+            pos = token.start() + 2
+        else:
+            fragment = display_math_html(value.strip()) if kind == 'display' else inline_math_html(value)
+            if stash is None:
+                out.append(fragment)
+            else:
+                out.append(f"@@math{len(stash)}@@")
+                stash.append(fragment)
+    return ''.join(out)
+
+
+def restore_math(html_text: str, stash: List[str]) -> str:
+    """Put the math HTML stashed by rewrite_math() back in place of its placeholders."""
+    if not stash:
+        return html_text
+    return _PLACEHOLDER.sub(lambda m: stash[int(m.group(1) or m.group(2))], html_text)
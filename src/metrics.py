@@ -0,0 +1,306 @@
+# src/metrics.py
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from output_writer import open_atomic
+
+CSV_FIELDS = [
+    'kind', 'stage', 'name', 'start_s', 'duration_s', 'ttft_s',
+    'prompt_tokens', 'completion_tokens', 'cached_tokens', 'cache_hit',
+    'cost_usd', 'status', 'detail',
+]
+
+# Span stages that mark one unit of work (see RunMetrics.summary()['jobs'])
+JOB_STAGES = ('directory', 'student')
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Linear-interpolated percentile (pct in 0..100); None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def describe(values: List[float]) -> Dict[str, Optional[float]]:
+    """count/total/mean/p50/p95/max summary of a list of durations."""
+    if not values:
+        return {'count': 0, 'total': 0.0, 'mean': None, 'p50': None, 'p95': None, 'max': None}
+    return {
+        'count': len(values),
+        'total': round(sum(values), 4),
+        'mean': round(sum(values) / len(values), 4),
+        'p50': round(percentile(values, 50), 4),
+        'p95': round(percentile(values, 95), 4),
+        'max': round(max(values), 4),
+    }
+
+
+class RunMetrics:
+    """Collects LLM call records and pipeline stage spans for a single run.
+
+    Thread-safe: calls and spans may be recorded from worker threads. LLM calls
+    are attributed to the innermost span open on the calling thread, and to the
+    job (input directory, student) given by the outermost span.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.calls: List[dict] = []
+        self.spans: List[dict] = []
+        self.counters: Dict[str, int] = {}
+        # Per-item measurements, e.g. per-student transcript compaction stats
+        self.items: Dict[str, List[dict]] = {}
+        self.in_flight_calls = 0
+        # Optional StageProfiler (profile=true) told about every span entered and left
+        self.profiler = None
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def current_stage(self) -> str:
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1][0] if stack else ''
+
+    def current_job(self) -> str:
+        stack = getattr(self._local, 'stack', None)
+        return stack[0][2] if stack else ''
+
+    @contextmanager
+    def span(self, stage: str, name: str = '', job: Optional[str] = None):
+        """Time a pipeline stage; `name` identifies the item (document, student, ...).
+
+        `job` names the unit of work the stage belongs to; it defaults to `name`.
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append((stage, name, name if job is None else job))
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.enter(stage)
+        start = self._elapsed()
+        status = 'ok'
+        try:
+            yield
+        except BaseException:
+            status = 'error'
+            raise
+        finally:
+            stack.pop()
+            if profiler is not None:
+                profiler.exit()
+            record = {
+                'stage': stage,
+                'name': name,
+                'start_s': round(start, 4),
+                'duration_s': round(self._elapsed() - start, 4),
+                'status': status,
+            }
+            with self._lock:
+                self.spans.append(record)
+
+    def record_span(self, stage: str, name: str, duration_s: float, status: str = 'ok') -> None:
+        """Record a span that ended now, for work not wrapped in a single `with` block."""
+        with self._lock:
+            self.spans.append({
+                'stage': stage,
+                'name': name,
+                'start_s': round(self._elapsed() - duration_s, 4),
+                'duration_s': round(duration_s, 4),
+                'status': status,
+            })
+
+    def call_started(self) -> None:
+        """Mark an LLM call as in flight; the matching record_call() ends it."""
+        with self._lock:
+            self.in_flight_calls += 1
+
+    def record_call(self, model: str, latency_s: float, ttft_s: Optional[float] = None,
+                    prompt_tokens: int = 0, completion_tokens: int = 0, cached_tokens: int = 0,
+                    cache_hit: bool = False, cost_usd: Optional[float] = None,
+                    status: str = 'ok', error: str = '') -> None:
+        record = {
+            'stage': self.current_stage(),
+            'job': self.current_job(),
+            'name': model,
+            'start_s': round(self._elapsed() - latency_s, 4),
+            'duration_s': round(latency_s, 4),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'cached_tokens': cached_tokens,
+            'cache_hit': cache_hit,
+            'cost_usd': cost_usd,
+            'status': status,
+            'error': error,
+        }
+        if ttft_s is not None:
+            # Only streamed calls (llm.stream=true) see their first token
+            record['ttft_s'] = round(ttft_s, 4)
+        with self._lock:
+            self.calls.append(record)
+            self.in_flight_calls = max(self.in_flight_calls - 1, 0)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def record_item(self, kind: str, name: str, **values) -> None:
+        with self._lock:
+            self.items.setdefault(kind, []).append(dict(name=name, **values))
+
+    def merge_file(self, path: str, stage: str = '') -> None:
+        """Merge call records written by a child process (e.g. feedback_generator)."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not merge metrics from {path}: {e}")
+            return
+        offset = round(self._elapsed(), 4)
+        job = self.current_job()
+        with self._lock:
+            for call in data.get('calls', []):
+                call = dict(call)
+                call['stage'] = stage or call.get('stage', '')
+                call['job'] = job or call.get('job', '')
+                call['start_s'] = offset
+                self.calls.append(call)
+            for counter, value in data.get('counters', {}).items():
+                self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def recent_calls(self, count: int = 20) -> List[dict]:
+        with self._lock:
+            return list(self.calls[-count:])
+
+    def summary(self) -> dict:
+        with self._lock:
+            calls = list(self.calls)
+            spans = list(self.spans)
+            counters = dict(self.counters)
+
+        ok_calls = [c for c in calls if c['status'] == 'ok']
+        costs = [c['cost_usd'] for c in calls if c.get('cost_usd') is not None]
+        ttfts = [c['ttft_s'] for c in calls if 'ttft_s' in c]
+        by_stage = {}
+        for call in calls:
+            by_stage.setdefault(call['stage'] or '(none)', []).append(call['duration_s'])
+
+        stages = {}
+        for span in spans:
+            stages.setdefault(span['stage'], []).append(span)
+
+        # Per-job breakdown: wall time of each directory/student vs. time its LLM calls took
+        calls_by_job = {}
+        for call in calls:
+            calls_by_job.setdefault(call.get('job', ''), []).append(call)
+        jobs = {}
+        for span in (s for s in spans if s['stage'] in JOB_STAGES):
+            job_calls = calls_by_job.get(span['name'], [])
+            jobs[span['name']] = {
+                'kind': span['stage'],
+                'duration_s': span['duration_s'],
+                'status': span['status'],
+                'llm_calls': len(job_calls),
+                'llm_time_s': round(sum(c['duration_s'] for c in job_calls), 4),
+            }
+
+        return {
+            'run': {
+                'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+                'wall_time_s': round(self._elapsed(), 4),
+            },
+            'llm': {
+                'calls': len(calls),
+                'errors': len(calls) - len(ok_calls),
+                'prompt_tokens': sum(c.get('prompt_tokens') or 0 for c in calls),
+                'completion_tokens': sum(c.get('completion_tokens') or 0 for c in calls),
+                'cached_tokens': sum(c.get('cached_tokens') or 0 for c in calls),
+                'cache_hits': sum(1 for c in calls if c.get('cache_hit')),
+                'cost_usd': round(sum(costs), 6) if costs else None,
+                'latency_s': describe([c['duration_s'] for c in calls]),
+                # Omitted rather than reported empty when nothing was streamed
+                **({'ttft_s': describe(ttfts)} if ttfts else {}),
+                'latency_by_stage_s': {stage: describe(values) for stage, values in by_stage.items()},
+            },
+            'stages': {
+                stage: dict(describe([s['duration_s'] for s in records]),
+                            errors=sum(1 for s in records if s['status'] != 'ok'))
+                for stage, records in stages.items()
+            },
+            'jobs': jobs,
+            'counters': counters,
+        }
+
+    def write(self, output_dir: str, basename: str = 'metrics') -> Dict[str, str]:
+        """Write `<basename>.json` (summary + raw records) and `<basename>.csv` (one row per record)."""
+        os.makedirs(output_dir, exist_ok=True)
+        paths = {
+            'json': os.path.join(output_dir, f"{basename}.json"),
+            'csv': os.path.join(output_dir, f"{basename}.csv"),
+        }
+        self.write_json(paths['json'])
+        self.write_csv(paths['csv'])
+        return paths
+
+    def write_json(self, path: str) -> None:
+        with self._lock:
+            data = {'calls': list(self.calls), 'spans': list(self.spans), 'counters': dict(self.counters),
+                    'items': {kind: list(items) for kind, items in self.items.items()}}
+        data = dict(summary=self.summary(), **data)
+        with open_atomic(path) as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def write_csv(self, path: str) -> None:
+        with self._lock:
+            calls = list(self.calls)
+            spans = list(self.spans)
+        with open_atomic(path, newline='') as f:
+            # No ttft_s column unless some call was streamed (llm.stream=true)
+            fields = CSV_FIELDS if any('ttft_s' in c for c in calls) else [field for field in CSV_FIELDS if field != 'ttft_s']
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            for span in spans:
+                writer.writerow(dict(span, kind='span'))
+            for call in calls:
+                writer.writerow(dict(call, kind='llm_call', detail=call.get('error', '')))
+
+    def print_summary(self) -> None:
+        summary = self.summary()
+        llm = summary['llm']
+
+        def fmt(value):
+            return f"{value:.2f}s" if value is not None else "-"
+
+        print("\n📈 Run Metrics:")
+        print(f"  ├─ Wall time: {summary['run']['wall_time_s']:.1f}s")
+        print(f"  ├─ LLM calls: {llm['calls']} (errors: {llm['errors']}, cache hits: {llm['cache_hits']})")
+        print(f"  ├─ Tokens: prompt {llm['prompt_tokens']:,} / completion {llm['completion_tokens']:,}")
+        if llm['cost_usd'] is not None:
+            print(f"  ├─ Estimated cost: ${llm['cost_usd']:.4f}")
+        print(f"  ├─ LLM latency p50/p95: {fmt(llm['latency_s']['p50'])} / {fmt(llm['latency_s']['p95'])}")
+        if 'ttft_s' in llm:
+            print(f"  ├─ Time to first token p50/p95: {fmt(llm['ttft_s']['p50'])} / {fmt(llm['ttft_s']['p95'])}")
+        # Students can number in the thousands; only directories are listed one by one
+        directories = {name: stats for name, stats in summary['jobs'].items() if stats['kind'] == 'directory'}
+        for name, stats in directories.items():
+            print(f"  ├─ 📁 {name}: {stats['duration_s']:.1f}s ({stats['llm_calls']} LLM calls, "
+                  f"{stats['llm_time_s']:.1f}s in LLM){' ⚠️ ' + stats['status'] if stats['status'] != 'ok' else ''}")
+        stage_items = sorted(summary['stages'].items(), key=lambda item: -item[1]['total'])
+        for i, (stage, stats) in enumerate(stage_items):
+            branch = "└─" if i == len(stage_items) - 1 else "├─"
+            print(f"  {branch} {stage}: {stats['count']}x, total {stats['total']:.1f}s, "
+                  f"p50 {fmt(stats['p50'])}, p95 {fmt(stats['p95'])}")
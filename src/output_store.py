@@ -0,0 +1,185 @@
+# src/output_store.py
+"""
+Packed report store (mode.output_store.enabled=true).
+
+Instead of one .md/.html/.pdf (and .json) file per student under
+`{output_base_dir}/<type>/`, report mode keeps every rendering in one SQLite file,
+`{output_base_dir}/reports.sqlite`. There is one row per (report type, student,
+format), with its size, SHA-256, run and time. A rerun replaces the row, just as
+it overwrote the file before.
+
+A `counts` table kept up to date by triggers holds the number of reports and bytes
+per (type, format). Status tools therefore read a handful of rows instead of
+globbing the output tree.
+
+    python src/output_store.py status outputs/reports/reports.sqlite
+    python src/output_store.py export outputs/reports/reports.sqlite --output-dir outputs/reports
+    python src/output_store.py export outputs/reports/reports.sqlite --output-dir out --type teacher --formats md
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+STORE_NAME = "reports.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    report_type TEXT NOT NULL,
+    student TEXT NOT NULL,
+    format TEXT NOT NULL,
+    content BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    run_id TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (report_type, student, format)
+);
+CREATE TABLE IF NOT EXISTS counts (
+    report_type TEXT NOT NULL,
+    format TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    PRIMARY KEY (report_type, format)
+);
+CREATE TRIGGER IF NOT EXISTS outputs_insert AFTER INSERT ON outputs BEGIN
+    INSERT INTO counts VALUES (new.report_type, new.format, 1, new.size)
+    ON CONFLICT (report_type, format) DO UPDATE SET n = n + 1, bytes = bytes + excluded.bytes;
+END;
+CREATE TRIGGER IF NOT EXISTS outputs_update AFTER UPDATE OF size ON outputs BEGIN
+    UPDATE counts SET bytes = bytes - old.size + new.size
+    WHERE report_type = new.report_type AND format = new.format;
+END;
+CREATE TRIGGER IF NOT EXISTS outputs_delete AFTER DELETE ON outputs BEGIN
+    UPDATE counts SET n = n - 1, bytes = bytes - old.size
+    WHERE report_type = old.report_type AND format = old.format;
+END;
+"""
+
+
+def store_path(output_base_dir: str) -> str:
+    return os.path.join(output_base_dir, STORE_NAME)
+
+
+class OutputStore:
+    """SQLite store of report renderings; safe to share between the pipeline's threads."""
+
+    def __init__(self, path: str, run_id: Optional[str] = None):
+        self.path = path
+        self.run_id = run_id
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def put(self, report_type: str, student: str, fmt: str, content: bytes) -> None:
+        """Insert or replace one rendering (committed on return)."""
+        row = (report_type, student, fmt, content, len(content), hashlib.sha256(content).hexdigest(),
+               self.run_id, datetime.now().isoformat(timespec='seconds'))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO outputs VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (report_type, student, format) DO UPDATE SET content = excluded.content, "
+                "size = excluded.size, sha256 = excluded.sha256, run_id = excluded.run_id, "
+                "updated_at = excluded.updated_at", row)
+
+    def put_file(self, report_type: str, student: str, path: str, remove: bool = True) -> str:
+        """Store the file at `path` under its extension as format; returns the format."""
+        fmt = os.path.splitext(path)[1].lstrip('.')
+        with open(path, 'rb') as f:
+            self.put(report_type, student, fmt, f.read())
+        if remove:
+            os.remove(path)
+        return fmt
+
+    def get(self, report_type: str, student: str, fmt: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT content FROM outputs WHERE report_type = ? AND student = ? AND format = ?",
+                                     (report_type, student, fmt)).fetchone()
+        return row[0] if row else None
+
+    def counts(self) -> Dict[Tuple[str, str], dict]:
+        """(report type, format) -> {'reports', 'bytes'}, read from the trigger-maintained counts table."""
+        with self._lock:
+            rows = self._conn.execute("SELECT report_type, format, n, bytes FROM counts WHERE n > 0").fetchall()
+        return {(report_type, fmt): {'reports': n, 'bytes': size} for report_type, fmt, n, size in rows}
+
+    def rows(self, report_type: Optional[str] = None, formats: Optional[List[str]] = None) -> Iterator[tuple]:
+        """(report type, student, format, content) of the matching rows, one at a time."""
+        query = "SELECT report_type, student, format, content FROM outputs WHERE 1 = 1"
+        params = []
+        if report_type:
+            query += " AND report_type = ?"
+            params.append(report_type)
+        if formats:
+            query += f" AND format IN ({', '.join('?' for _ in formats)})"
+            params.extend(formats)
+        # Own connection: the rows are streamed while the caller may write through this store
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield from conn.execute(query + " ORDER BY report_type, student, format", params)
+        finally:
+            conn.close()
+
+    def export(self, output_dir: str, report_type: Optional[str] = None,
+               formats: Optional[List[str]] = None) -> int:
+        """Write the stored renderings as `output_dir`/<type>/<student>.<format>; returns the number written."""
+        from output_writer import open_atomic
+        written = 0
+        for row_type, student, fmt, content in self.rows(report_type, formats):
+            with open_atomic(os.path.join(output_dir, row_type, f"{student}.{fmt}"), 'wb') as f:
+                f.write(content)
+            written += 1
+        return written
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def read_counts(path: str) -> Optional[Dict[Tuple[str, str], dict]]:
+    """OutputStore.counts() of the store at `path` without creating it (None if it does not exist)."""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, timeout=5)
+    try:
+        rows = conn.execute("SELECT report_type, format, n, bytes FROM counts WHERE n > 0").fetchall()
+    finally:
+        conn.close()
+    return {(report_type, fmt): {'reports': n, 'bytes': size} for report_type, fmt, n, size in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or export a packed report store (reports.sqlite)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    status = sub.add_parser("status", help="reports and bytes per type and format")
+    status.add_argument("store")
+    export = sub.add_parser("export", help="write the reports as <output-dir>/<type>/<student>.<format>")
+    export.add_argument("store")
+    export.add_argument("--output-dir", required=True)
+    export.add_argument("--type", help="only this report type (student, teacher)")
+    export.add_argument("--formats", nargs="+", help="only these formats (md html pdf json)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.store):
+        parser.error(f"{args.store} does not exist")
+    if args.command == "status":
+        for (report_type, fmt), count in sorted(read_counts(args.store).items()):
+            print(f"{report_type:<10} {fmt:<5} {count['reports']:>7} reports {count['bytes'] / 1e6:>10.2f} MB")
+        return
+    store = OutputStore(args.store)
+    try:
+        written = store.export(args.output_dir, args.type, args.formats)
+    finally:
+        store.close()
+    print(f"Exported {written} files to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# src/output_writer.py
+"""
+Crash-safe output files.
+
+Every report, summary, HTML/PDF rendering and metrics file is written through
+open_atomic() (or write_text()): the content goes to a temporary file in the
+target directory, is flushed to disk and then renamed over the target. An
+interrupted run leaves the previous file or the new one, never a truncated one.
+
+Each committed file is appended to its directory's `.manifest.jsonl` with its size
+and SHA-256. is_valid() checks a file against its latest record before it is
+reused (e.g. existing individual summaries), so a file that was not written
+through here, or was changed since, is regenerated instead of trusted. Appending
+one line per write keeps the manifest safe to share between threads and worker
+processes writing into the same directory.
+
+Directories written before manifests existed have none. Their non-empty files are
+legacy outputs: adopt() records one as it is, so it is reused instead of
+regenerated once.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+MANIFEST_NAME = ".manifest.jsonl"
+
+_manifest_cache: Dict[str, tuple] = {}  # directory -> ((mtime_ns, size), entries)
+_legacy_dirs: Dict[str, bool] = {}  # directory -> had no manifest when this process first looked
+_cache_lock = threading.Lock()
+
+
+def temp_path(path: str) -> str:
+    """Hidden sibling of `path` unique to this process and thread, keeping the extension."""
+    directory, name = os.path.split(os.path.abspath(path))
+    stem, ext = os.path.splitext(name)
+    return os.path.join(directory, f".{stem}.{os.getpid()}-{threading.get_ident()}.partial{ext}")
+
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _record(path: str) -> None:
+    directory, name = os.path.split(os.path.abspath(path))
+    entry = {'file': name, 'size': os.path.getsize(path), 'sha256': file_checksum(path),
+             'written_at': datetime.now().isoformat(timespec='seconds')}
+    line = (json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8')
+    # One O_APPEND write per entry: concurrent writers never interleave within a line
+    fd = os.open(os.path.join(directory, MANIFEST_NAME), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o666)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def commit_file(partial_path: str, path: str, record: bool = True) -> None:
+    """Flush `partial_path` to disk, rename it to `path` and record it in the manifest."""
+    with open(partial_path, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(partial_path, path)
+    if record:
+        _record(path)
+
+
+@contextmanager
+def open_atomic(path: str, mode: str = 'w', encoding: Optional[str] = 'utf-8', newline: Optional[str] = None,
+                record: bool = True):
+    """open() for writing whose result only replaces `path` when the block completes without error."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    partial_path = temp_path(path)
+    try:
+        with open(partial_path, mode, encoding=None if 'b' in mode else encoding, newline=newline) as f:
+            yield f
+        commit_file(partial_path, path, record)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+
+def write_text(path: str, text: str, record: bool = True) -> str:
+    """Write `text` (UTF-8) to `path` atomically; returns `path`."""
+    with open_atomic(path, record=record) as f:
+        f.write(text)
+    return path
+
+
+def load_manifest(directory: str) -> Dict[str, dict]:
+    """file name -> latest manifest entry for `directory` (empty if there is no manifest)."""
+    manifest_path = os.path.join(os.path.abspath(directory), MANIFEST_NAME)
+    try:
+        stat = os.stat(manifest_path)
+    except OSError:
+        return {}
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _manifest_cache.get(manifest_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    entries = {}
+    with open(manifest_path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                entries[entry['file']] = entry
+            except (ValueError, KeyError, TypeError):
+                continue  # a line cut short by a crash
+    with _cache_lock:
+        _manifest_cache[manifest_path] = (key, entries)
+    return entries
+
+
+def is_valid(path: str) -> bool:
+    """True if `path` exists and matches the size and checksum its manifest last recorded for it."""
+    directory, name = os.path.split(os.path.abspath(path))
+    entry = load_manifest(directory).get(name)
+    if entry is None:
+        return False
+    try:
+        if os.path.getsize(path) != entry['size']:
+            return False
+        return file_checksum(path) == entry['sha256']
+    except OSError:
+        return False
+
+
+def is_legacy(path: str) -> bool:
+    """True if `path` is a non-empty file in a directory that had no manifest when this process first checked it."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with _cache_lock:
+        if directory not in _legacy_dirs:
+            _legacy_dirs[directory] = not os.path.exists(os.path.join(directory, MANIFEST_NAME))
+        legacy = _legacy_dirs[directory]
+    try:
+        return legacy and os.path.getsize(path) > 0
+    except OSError:
+        return False
+
+
+def adopt(path: str) -> bool:
+    """Record a legacy file (is_legacy) in its directory's manifest as it is; False if it is not one."""
+    if not is_legacy(path):
+        return False
+    _record(path)
+    return True
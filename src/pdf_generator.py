@@ -3,11 +3,86 @@
 PDF 생성 도구 - 다양한 방법으로 HTML을 PDF로 변환
 """
 
+import argparse
+import html
 import os
+import re
 import subprocess
-import webbrowser
 from pathlib import Path
-import time
+from typing import List, Optional, Tuple
+
+from output_writer import commit_file, open_atomic, temp_path
+
+_HEAD = re.compile(r'<head[^>]*>(.*?)</head>', re.S | re.I)
+_BODY = re.compile(r'<body[^>]*>(.*)</body>', re.S | re.I)
+_TITLE = re.compile(r'<title>.*?</title>', re.S | re.I)
+_SCRIPT = re.compile(r'<script\b[^>]*>.*?</script>', re.S | re.I)
+_HEADING = re.compile(r'<(/?)h([1-5])\b', re.I)
+# 묶음 PDF: 보고서마다 새 페이지에서 시작하고, 보고서 제목(h1)이 최상위 책갈피가 됨
+BULK_STYLE = """<style>
+    .bulk-report { page-break-before: always; }
+    .bulk-report:first-of-type { page-break-before: auto; }
+    h1.bulk-title { margin-top: 0; }
+</style>"""
+
+
+def has_scripts(html_text: str) -> bool:
+    """<head>에 스크립트(로컬 MathJax)가 있는지: wkhtmltopdf가 렌더링을 기다려야 하는지 판단."""
+    head_match = _HEAD.search(html_text)
+    return bool(head_match and _SCRIPT.search(head_match.group(1)))
+
+
+def combine_html(pages: List[Tuple[str, str]]) -> str:
+    """여러 HTML 보고서를 (제목, 경로) 순서대로 한 문서로 합침.
+
+    <head>(스타일)는 첫 파일의 것을 한 번만 쓰고, 수식 렌더러 등 <script>는 모든 파일의 것을
+    중복 없이 모음 (수식은 있는 보고서의 head에만 스크립트가 들어가므로). 각 보고서 본문의 제목은
+    한 단계씩 내려서(h1→h2) 보고서 제목만 h1(책갈피 최상위)이 되게 함.
+    """
+    head = None
+    scripts = []
+    sections = []
+    for title, path in pages:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        head_match = _HEAD.search(text)
+        page_head = _TITLE.sub("", head_match.group(1)) if head_match else ""
+        if head is None:
+            head = _SCRIPT.sub("", page_head)
+        for script in _SCRIPT.findall(page_head):
+            if script not in scripts:
+                scripts.append(script)
+        body_match = _BODY.search(text)
+        body = _HEADING.sub(lambda m: f"<{m.group(1)}h{int(m.group(2)) + 1}",
+                            body_match.group(1) if body_match else text)
+        sections.append(f'<section class="bulk-report">\n<h1 class="bulk-title">{html.escape(title)}</h1>\n'
+                        f'{body}\n</section>')
+    head = "\n    ".join([head or ""] + scripts)
+    return (f'<!DOCTYPE html>\n<html lang="ko">\n<head>{head}\n{BULK_STYLE}\n</head>\n<body>\n'
+            + "\n".join(sections) + "\n</body>\n</html>")
+
+
+def split_pdf(pdf_file: str, output_files: List[str]) -> int:
+    """묶음 PDF를 최상위 책갈피(보고서) 단위로 나눠 `output_files` 순서대로 저장; 저장한 수를 반환 (pypdf 필요)."""
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:
+        print("⚠️ PDF 분할에는 pypdf가 필요합니다 (pip install pypdf)")
+        return 0
+    reader = PdfReader(pdf_file)
+    starts = [reader.get_destination_page_number(item) for item in reader.outline if not isinstance(item, list)]
+    if len(starts) != len(output_files):
+        print(f"⚠️ 책갈피 {len(starts)}개와 보고서 {len(output_files)}개가 맞지 않아 분할하지 않습니다")
+        return 0
+    for index, output_file in enumerate(output_files):
+        end = starts[index + 1] if index + 1 < len(starts) else len(reader.pages)
+        writer = PdfWriter()
+        for page in reader.pages[starts[index]:end]:
+            writer.add_page(page)
+        with open_atomic(output_file, 'wb') as f:
+            writer.write(f)
+    return len(output_files)
+
 
 class PDFGenerator:
     def __init__(self):
@@ -49,11 +124,13 @@ class PDFGenerator:
                 
         return tools
     
-    def generate_pdf_wkhtmltopdf(self, html_file, pdf_file):
-        """wkhtmltopdf를 사용한 PDF 생성"""
+    def generate_pdf_wkhtmltopdf(self, html_file, pdf_file, extra_args=(), scripts=None):
+        """wkhtmltopdf를 사용한 PDF 생성 (scripts: 스크립트 유무, None이면 파일에서 확인)"""
         if not self.available_tools.get('wkhtmltopdf'):
             return False
             
+        # 임시 파일에 렌더링한 뒤 교체 (중단되어도 잘린 PDF가 남지 않음)
+        partial = temp_path(pdf_file)
         try:
             cmd = [
                 'wkhtmltopdf',
@@ -63,15 +140,21 @@ class PDFGenerator:
                 '--margin-bottom', '0.75in',
                 '--margin-left', '0.75in',
                 '--encoding', 'UTF-8',
-                '--no-stop-slow-scripts',
-                '--javascript-delay', '2000',
-                str(html_file),
-                str(pdf_file)
-            ]
+                # html_assets link 모드의 _assets/ 파일 읽기 허용
+                '--enable-local-file-access',
+            ] + list(extra_args)
+            # 스크립트(로컬 MathJax)가 있을 때만 렌더링을 기다림
+            if scripts is None:
+                with open(html_file, 'r', encoding='utf-8', errors='ignore') as f:
+                    scripts = has_scripts(f.read())
+            if scripts:
+                cmd += ['--no-stop-slow-scripts', '--javascript-delay', '2000']
+            cmd += [str(html_file), partial]
             
             result = subprocess.run(cmd, capture_output=True, text=True)
             
             if result.returncode == 0:
+                commit_file(partial, str(pdf_file))
                 print(f"✅ wkhtmltopdf로 PDF 생성 완료: {pdf_file}")
                 return True
             else:
@@ -81,29 +164,35 @@ class PDFGenerator:
         except Exception as e:
             print(f"❌ wkhtmltopdf 실행 오류: {e}")
             return False
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
     
-    def generate_pdf_chrome(self, html_file, pdf_file):
+    def generate_pdf_chrome(self, html_file, pdf_file, extra_args=()):
         """Chrome/Chromium을 사용한 PDF 생성"""
         chrome_path = self.available_tools.get('chrome')
         if not chrome_path:
             return False
             
+        partial = temp_path(pdf_file)
         try:
             cmd = [
                 chrome_path,
                 '--headless',
                 '--disable-gpu',
                 '--no-sandbox',
-                '--print-to-pdf=' + str(pdf_file),
+                '--print-to-pdf=' + partial,
                 '--print-to-pdf-no-header',
                 '--run-all-compositor-stages-before-draw',
                 '--virtual-time-budget=2000',
+            ] + list(extra_args) + [
                 f'file://{os.path.abspath(html_file)}'
             ]
             
             result = subprocess.run(cmd, capture_output=True, text=True)
             
-            if result.returncode == 0 and os.path.exists(pdf_file):
+            if result.returncode == 0 and os.path.exists(partial):
+                commit_file(partial, str(pdf_file))
                 print(f"✅ Chrome으로 PDF 생성 완료: {pdf_file}")
                 return True
             else:
@@ -113,9 +202,14 @@ class PDFGenerator:
         except Exception as e:
             print(f"❌ Chrome 실행 오류: {e}")
             return False
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
     
     def generate_pdf_browser_guide(self, html_file):
         """브라우저 수동 PDF 생성 가이드"""
+        import webbrowser
+        
         print(f"\n🌐 브라우저에서 PDF 생성하기: {html_file}")
         print("=" * 60)
         
@@ -153,8 +247,41 @@ class PDFGenerator:
         self.generate_pdf_browser_guide(html_file)
         return False
     
-    def process_all_html_files(self):
-        """모든 HTML 파일을 PDF로 변환"""
+    def generate_pdf_bulk(self, pages: List[Tuple[str, str]], pdf_file: str,
+                          split_files: Optional[List[str]] = None) -> bool:
+        """여러 HTML 보고서를 (제목, 경로) 순서대로 렌더러 한 번 실행으로 하나의 PDF로 생성 (보고서별 책갈피).
+
+        파일마다 프로세스를 띄우고 글꼴/스크립트를 다시 읽는 대신 합친 문서를 한 번 렌더링함.
+        `split_files`가 있으면 완성된 PDF를 보고서별로 다시 나눠 저장 (pypdf 필요).
+        """
+        if not pages:
+            return False
+        # 상대 경로 에셋(_assets/)이 그대로 해석되도록 첫 보고서와 같은 폴더에 임시 HTML을 씀
+        # (프로세스/스레드별 이름이라 같은 폴더에 동시에 묶음을 만들어도 겹치지 않음)
+        combined_html = temp_path(os.path.join(os.path.dirname(os.path.abspath(pages[0][1])),
+                                               f"bulk_{Path(pdf_file).stem}.html"))
+        combined = combine_html(pages)
+        with open(combined_html, 'w', encoding='utf-8') as f:
+            f.write(combined)
+        print(f"\n🔄 묶음 PDF 생성: 보고서 {len(pages)}개 -> {pdf_file}")
+        try:
+            ok = False
+            if self.available_tools.get('wkhtmltopdf'):
+                ok = self.generate_pdf_wkhtmltopdf(combined_html, pdf_file, ['--outline', '--outline-depth', '1'],
+                                                   scripts=has_scripts(combined))
+            if not ok and self.available_tools.get('chrome'):
+                ok = self.generate_pdf_chrome(combined_html, pdf_file, ['--generate-pdf-document-outline'])
+        finally:
+            os.remove(combined_html)
+        if not ok:
+            print("❌ 묶음 PDF 생성 실패 (wkhtmltopdf 또는 Chrome 필요)")
+            return False
+        if split_files:
+            print(f"✂️ 보고서별 PDF {split_pdf(pdf_file, split_files)}/{len(split_files)}개로 분할")
+        return True
+
+    def process_all_html_files(self, bulk=False, split=False):
+        """모든 HTML 파일을 PDF로 변환 (bulk: 카테고리별 묶음 PDF 하나, split: 묶음을 다시 보고서별로 분할)"""
         print("🎯 전체 HTML 파일 PDF 변환 시작")
         print("=" * 60)
         
@@ -173,9 +300,16 @@ class PDFGenerator:
             if not category_dir.exists():
                 continue
                 
-            html_files = list(category_dir.glob("*.html"))
+            html_files = sorted(category_dir.glob("*.html"))
             print(f"📁 {category} 카테고리: {len(html_files)}개 파일")
             
+            if bulk:
+                pages = [(html_file.stem, str(html_file)) for html_file in html_files]
+                split_files = [str(html_file.with_suffix('.pdf')) for html_file in html_files] if split else None
+                self.generate_pdf_bulk(pages, str(category_dir / f"{category}_reports.pdf"), split_files)
+                print()
+                continue
+
             success_count = 0
             for html_file in html_files:
                 pdf_file = html_file.with_suffix('.pdf')
@@ -190,8 +324,13 @@ class PDFGenerator:
 
 def main():
     """메인 함수"""
+    parser = argparse.ArgumentParser(description='outputs/reports 의 HTML 보고서를 PDF로 변환')
+    parser.add_argument('--bulk', action='store_true', help='카테고리별로 묶음 PDF 하나를 렌더러 한 번 실행으로 생성')
+    parser.add_argument('--split', action='store_true', help='묶음 PDF를 보고서별 PDF로 다시 분할 (pypdf 필요)')
+    args = parser.parse_args()
+
     generator = PDFGenerator()
-    generator.process_all_html_files()
+    generator.process_all_html_files(bulk=args.bulk, split=args.split)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,169 @@
+# src/pipeline.py
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class PipelineError(Exception):
+    """Raised by Pipeline.run() after all runnable tasks finished, if any task failed."""
+
+    def __init__(self, errors: Dict[str, BaseException]):
+        self.errors = errors
+        first_key = next(iter(errors))
+        super().__init__(f"{len(errors)} pipeline task(s) failed; first: {first_key}: {errors[first_key]}")
+
+
+class Task:
+    __slots__ = ('key', 'fn', 'deps', 'stage', 'group', 'order', 'dependents', 'pending')
+
+    def __init__(self, key: str, fn: Callable, deps: List[str], stage: str, group: str, order: int):
+        self.key = key
+        self.fn = fn
+        self.deps = deps
+        self.stage = stage
+        self.group = group
+        self.order = order
+        self.dependents: List[str] = []
+        self.pending = len(deps)
+
+
+class Pipeline:
+    """DAG of stage tasks run on a thread pool as soon as their dependencies finish.
+
+    Each task's function receives the results of its dependencies, in the order the
+    dependencies were listed; a result is dropped once every dependent has consumed it.
+    Ready tasks start in the order they were added, so with one worker a run is
+    depth-first per group (the sequential behaviour), and with more workers the early
+    stages of later groups overlap the later stages of earlier ones. When a task fails,
+    its downstream tasks are skipped while the rest of the graph carries on.
+
+    Groups (an input directory, a student) are reported through `on_group_start(group)`
+    and `on_group_end(group, duration_s, error)` when their first task starts and their
+    last task ends.
+    """
+
+    def __init__(self, max_workers: int = 1, metrics=None,
+                 on_group_start: Optional[Callable[[str], None]] = None,
+                 on_group_end: Optional[Callable[[str, float, Optional[BaseException]], None]] = None):
+        self.max_workers = max(int(max_workers), 1)
+        self.metrics = metrics
+        self.on_group_start = on_group_start
+        self.on_group_end = on_group_end
+        self.tasks: Dict[str, Task] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.skipped: List[str] = []
+        self._results: Dict[str, Any] = {}
+        self._consumers: Dict[str, int] = {}
+        self._group_remaining: Dict[str, int] = {}
+        self._group_started: Dict[str, float] = {}
+        self._group_error: Dict[str, BaseException] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, fn: Callable, deps: Iterable[str] = (), stage: str = '', group: str = '') -> str:
+        if key in self.tasks:
+            raise ValueError(f"Duplicate pipeline task: {key}")
+        deps = list(deps)
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Task {key} depends on unknown task {dep}")
+            self.tasks[dep].dependents.append(key)
+        self.tasks[key] = Task(key, fn, deps, stage, group, len(self.tasks))
+        self._group_remaining[group] = self._group_remaining.get(group, 0) + 1
+        return key
+
+    def groups(self) -> List[str]:
+        return list(dict.fromkeys(task.group for task in self.tasks.values()))
+
+    def run(self) -> None:
+        """Run every task; raises PipelineError at the end if any task failed."""
+        self._consumers = {key: len(task.dependents) for key, task in self.tasks.items()}
+        ready = [(task.order, key) for key, task in self.tasks.items() if task.pending == 0]
+        heapq.heapify(ready)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as executor:
+            while ready or running:
+                while ready and len(running) < self.max_workers:
+                    _, key = heapq.heappop(ready)
+                    running[executor.submit(self._run_task, self.tasks[key])] = key
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    task = self.tasks[key]
+                    error = future.exception()
+                    if error is None:
+                        self._results[key] = future.result()
+                        for dependent in task.dependents:
+                            dependent_task = self.tasks[dependent]
+                            if dependent_task.pending < 0:
+                                # Already skipped because another dependency failed
+                                self._consumers[key] -= 1
+                                continue
+                            dependent_task.pending -= 1
+                            if dependent_task.pending == 0:
+                                heapq.heappush(ready, (dependent_task.order, dependent))
+                        if not self._consumers[key]:
+                            self._results.pop(key, None)
+                    else:
+                        logging.error(f"Pipeline task {key} failed: {error}")
+                        self.errors[key] = error
+                        self._skip_downstream(task, error)
+                    self._release_inputs(task)
+                    self._task_finished(task, error)
+
+        if self.errors:
+            raise PipelineError(self.errors)
+
+    def _run_task(self, task: Task):
+        self._group_start(task.group)
+        inputs = [self._results[dep] for dep in task.deps]
+        if self.metrics is None:
+            return task.fn(*inputs)
+        with self.metrics.span(task.stage or task.key, task.key, job=task.group):
+            return task.fn(*inputs)
+
+    def _skip_downstream(self, task: Task, error: BaseException) -> None:
+        stack = list(task.dependents)
+        while stack:
+            dependent = self.tasks[stack.pop()]
+            if dependent.pending < 0:
+                continue
+            dependent.pending = -1  # never becomes ready
+            self.skipped.append(dependent.key)
+            self._release_inputs(dependent, only_finished=True)
+            self._task_finished(dependent, error)
+            stack.extend(dependent.dependents)
+
+    def _release_inputs(self, task: Task, only_finished: bool = False) -> None:
+        for dep in task.deps:
+            if only_finished and dep not in self._results:
+                continue
+            self._consumers[dep] -= 1
+            if self._consumers[dep] == 0:
+                self._results.pop(dep, None)
+
+    def _group_start(self, group: str) -> None:
+        with self._lock:
+            if group in self._group_started:
+                return
+            self._group_started[group] = time.perf_counter()
+        if self.on_group_start is not None:
+            self.on_group_start(group)
+
+    def _task_finished(self, task: Task, error: Optional[BaseException]) -> None:
+        group = task.group
+        if error is not None:
+            self._group_error.setdefault(group, error)
+        self._group_remaining[group] -= 1
+        if self._group_remaining[group]:
+            return
+        started = self._group_started.get(group)
+        if started is None:
+            # Every task of the group was skipped before any of them ran
+            self._group_start(group)
+            started = self._group_started[group]
+        if self.on_group_end is not None:
+            self.on_group_end(group, time.perf_counter() - started, self._group_error.get(group))
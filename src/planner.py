@@ -0,0 +1,425 @@
+# src/planner.py
+import glob
+import json
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+from file_handler import FileHandler
+from llm_adapter import LLMAdapter
+from metrics import percentile
+from output_writer import is_legacy, is_valid
+from prompt_registry import PromptRegistry, PromptTemplate, PromptTemplateError, document_parts
+from section_index import template_headings
+
+
+class CallEstimator:
+    """Per-stage completion-token and latency assumptions for planned calls.
+
+    Values come from the most recent run's metrics.json when one exists, so estimates
+    track the configured model; otherwise the configured defaults are used.
+    """
+
+    def __init__(self, default_completion_tokens: int, default_latency_s: float, history_path: Optional[str] = None):
+        self.default_completion_tokens = default_completion_tokens
+        self.default_latency_s = default_latency_s
+        self.history_path = history_path
+        self.completion_by_stage: Dict[str, float] = {}
+        self.latency_by_stage: Dict[str, float] = {}
+        if history_path:
+            self._load_history(history_path)
+
+    def _load_history(self, path: str) -> None:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                calls = json.load(f).get('calls', [])
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read metrics history {path}: {e}")
+            return
+        by_stage: Dict[str, List[dict]] = {}
+        for call in calls:
+            if call.get('status') == 'ok':
+                by_stage.setdefault(call.get('stage') or '', []).append(call)
+        for stage, stage_calls in by_stage.items():
+            completions = [c['completion_tokens'] for c in stage_calls if c.get('completion_tokens')]
+            if completions:
+                self.completion_by_stage[stage] = sum(completions) / len(completions)
+            self.latency_by_stage[stage] = percentile([c['duration_s'] for c in stage_calls], 50)
+
+    def completion_tokens(self, stage: str) -> int:
+        return int(self.completion_by_stage.get(stage, self.default_completion_tokens))
+
+    def latency_s(self, stage: str) -> float:
+        return float(self.latency_by_stage.get(stage, self.default_latency_s))
+
+
+def find_latest_metrics(search_patterns: List[str]) -> Optional[str]:
+    candidates = []
+    for pattern in search_patterns:
+        candidates.extend(glob.glob(pattern))
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+class RunPlanner:
+    """Builds every prompt of a run offline and sizes it: calls, tokens, cost and wall-clock.
+
+    No network access and no litellm import: tokens are estimated with
+    LLMAdapter.estimate_tokens, and existing individual summaries are counted as reused.
+    """
+
+    def __init__(self, cfg, llm_adapter: LLMAdapter, templates: PromptRegistry, resolve_path: Callable[[str], str],
+                 estimator: CallEstimator, feedback_adapter: Optional[LLMAdapter] = None):
+        self.cfg = cfg
+        self.llm_adapter = llm_adapter
+        self.templates = templates
+        self.resolve_path = resolve_path
+        self.estimator = estimator
+        self.feedback_adapter = feedback_adapter or llm_adapter
+        self.mode = cfg.mode.analysis_mode
+
+    def plan(self) -> dict:
+        directories = []
+        for input_dir_path in self.cfg.mode.input_dirs:
+            input_dir = self.resolve_path(input_dir_path)
+            if not os.path.isdir(input_dir):
+                directories.append(self._directory(input_dir_path, [], [f"Directory not found: {input_dir}"]))
+                continue
+            if self.mode == "report":
+                directories.append(self._plan_report_dir(input_dir_path, input_dir))
+            else:
+                directories.append(self._plan_document_dir(input_dir_path, input_dir))
+
+        concurrency = max(int(self.cfg.concurrency), 1)
+        calls = [c for d in directories for c in d['calls'] if not c['reused']]
+        work_s = sum(c['latency_s'] for c in calls)
+        critical_path_s = max((d['critical_path_s'] for d in directories), default=0.0)
+        costs = [c['cost_usd'] for c in calls if c['cost_usd'] is not None]
+        return {
+            'mode': self.mode,
+            'model': self.llm_adapter.model_name,
+            'concurrency': concurrency,
+            'history': self.estimator.history_path,
+            'prompts': {
+                'fingerprints': self.templates.fingerprints(),
+                # Invalid templates stop a real run before its first call
+                'errors': self.templates.errors,
+            },
+            'directories': directories,
+            'totals': {
+                'calls': len(calls),
+                'reused': sum(1 for d in directories for c in d['calls'] if c['reused']),
+                'prompt_tokens': sum(c['prompt_tokens'] for c in calls),
+                'completion_tokens': sum(c['completion_tokens'] for c in calls),
+                'cost_usd': round(sum(costs), 4) if costs else None,
+                # Independent calls spread over the workers, bounded below by the longest dependency chain
+                'wall_clock_s': round(max(work_s / concurrency, critical_path_s), 1),
+                'warnings': sum(len(d['warnings']) for d in directories) + len(self.templates.errors),
+            },
+        }
+
+    # --- per-mode planning ---
+
+    def _plan_report_dir(self, input_dir_path: str, input_dir: str) -> dict:
+        calls = []
+        warnings = []
+        critical_path_s = 0.0
+        student_folders = FileHandler(input_dir).find_student_folders(self.cfg.mode.file_patterns.folder_pattern)
+        compactor = None
+        if hasattr(self.cfg.mode, 'compaction') and self.cfg.mode.compaction.enabled:
+            from chat_compaction import ChatCompactor
+            compactor = ChatCompactor.from_config(self.cfg.mode.compaction)
+        sectioned = self._report_sections()
+        for folder_path, student_name, _ in sorted(student_folders, key=lambda f: f[1]):
+            chat_files = sorted(glob.glob(os.path.join(folder_path, self.cfg.mode.file_patterns.chat_file_pattern)))
+            if not chat_files:
+                warnings.append(f"{student_name}: no chat files")
+                continue
+            parts = []
+            for chat_file in chat_files:
+                with open(chat_file, 'r', encoding='utf-8') as f:
+                    parts.extend((f.read(), "\n\n"))
+            content = "".join(parts)
+            if compactor is not None:
+                content = compactor.compact(content)
+            student_calls = []
+            for report_type in self.cfg.mode.report_types:
+                template = self.templates[report_type]
+                if not template:
+                    continue
+                if report_type in sectioned:
+                    student_calls.extend(self._section_calls(student_name, report_type, sectioned[report_type],
+                                                             content, warnings))
+                    continue
+                prompt = self._format(template, warnings, f"{report_type} prompt", query=content)
+                student_calls.append(self._call(student_name, "report", prompt, warnings))
+            calls.extend(student_calls)
+            # Report types and sections of one student are independent of each other
+            critical_path_s = max(critical_path_s, max((c['latency_s'] for c in student_calls), default=0.0))
+        return self._directory(input_dir_path, calls, warnings, critical_path_s)
+
+    def _report_sections(self) -> dict:
+        """Split report prompts when main() would generate them section by section."""
+        mode = self.cfg.mode
+        structured = 'structured_output' in mode and mode.structured_output.enabled
+        if structured or 'section_generation' not in mode or not mode.section_generation.enabled:
+            return {}
+        from report_sections import split_report_template
+        sectioned = {}
+        for report_type in mode.report_types:
+            if report_type in self.templates:
+                try:
+                    sectioned[report_type] = split_report_template(self.templates[report_type],
+                                                                   mode.section_generation.heading_level)
+                except PromptTemplateError:
+                    pass  # already listed in the plan's prompt errors
+        return sectioned
+
+    def _section_calls(self, student_name: str, report_type: str, report, content: str,
+                       warnings: List[str]) -> List[dict]:
+        """One call per section; sections whose cache key is already stored are reused."""
+        import hashlib
+        from report_sections import SectionCache, section_cache_key
+        cache = SectionCache(os.path.join(self.resolve_path(self.cfg.mode.output_base_dir), report_type,
+                                          ".sections", f"{student_name}.json"))
+        input_sha256 = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        calls = []
+        for number, section in enumerate(report.sections):
+            key = section_cache_key(self.llm_adapter.model_name, section, input_sha256)
+            prompt = self._format(section, warnings, f"{section.name} prompt", query=content)
+            calls.append(self._call(f"{student_name}/{report_type}/{number + 1}", "report_section", prompt, warnings,
+                                    reused=cache.get(key) is not None))
+        return calls
+
+    def _plan_document_dir(self, input_dir_path: str, input_dir: str) -> dict:
+        calls = []
+        warnings = []
+        documents = FileHandler(input_dir).read_markdown_files()
+        if not documents:
+            return self._directory(input_dir_path, [], ["No markdown files found"])
+
+        # Individual summaries: existing files are reused exactly as main() does
+        summaries_dir = os.path.join(input_dir, "outputs", "summaries")
+        summary_texts = []
+        summary_path_s = 0.0
+        for doc in documents:
+            base_filename = os.path.basename(doc['filename'])
+            summary_path = os.path.join(summaries_dir, f"{os.path.splitext(base_filename)[0]}_summary.md")
+            if is_valid(summary_path) or is_legacy(summary_path):
+                with open(summary_path, 'r', encoding='utf-8') as f:
+                    summary_texts.append((base_filename, f.read()))
+                calls.append(self._call(doc['filename'], "summarize", "", warnings, reused=True))
+                continue
+            prompt = self._format(self.templates['individual'], warnings, "individual summary prompt",
+                                  document_content=doc['content'])
+            call = self._call(doc['filename'], "summarize", prompt, warnings)
+            calls.append(call)
+            summary_path_s = max(summary_path_s, call['latency_s'])
+            summary_texts.append((base_filename, None))
+
+        final_calls = []
+        strategy = None
+        dedup_stats = None
+        retrieval_stats = None
+        if self.mode == "summary":
+            # New summaries do not exist yet: stand in for them with their estimated size
+            summaries = []
+            placeholder_tokens = 0
+            for filename, text in summary_texts:
+                if text is None:
+                    placeholder_tokens += self.estimator.completion_tokens("summarize")
+                    text = ""
+                summaries.append({'filename': filename.replace('_summary.md', '.md'), 'content': text})
+            concatenated = document_parts(summaries)
+            prompt = self._format(self.templates['final'], warnings, "final prompt", documents_concatenated=concatenated)
+            final_calls.append(self._call(os.path.basename(input_dir_path), "integrate", prompt, warnings,
+                                          extra_prompt_tokens=placeholder_tokens))
+        else:
+            concatenated, dedup_stats = self._concatenate(documents)
+            strategy = self.llm_adapter.analyze_token_strategy(
+                concatenated, token_count=self.llm_adapter.estimate_tokens(concatenated))
+            if strategy['strategy'] == 'chunk' and self.cfg.retrieval.enabled:
+                # Same selection as the run, from the saved index (not written while planning)
+                index, _ = FileHandler(input_dir).load_section_index(
+                    os.path.join(input_dir, "outputs", "section_index.json"), documents,
+                    self.cfg.retrieval.max_section_tokens, save=False)
+                template = self.templates['integration_analysis'] or self.templates['final']
+                token_budget = (int(self.llm_adapter.model_context_limit * self.cfg.retrieval.budget_ratio)
+                                - self.llm_adapter.estimate_tokens(template.text))
+                queries = list(self.cfg.retrieval.queries or []) or template_headings(template.text)
+                selected, retrieval_stats = index.select(queries, self.cfg.retrieval.top_k, token_budget)
+                concatenated, dedup_stats = self._concatenate(selected)
+                strategy = self.llm_adapter.analyze_token_strategy(
+                    concatenated, token_count=self.llm_adapter.estimate_tokens(concatenated))
+            two_step = hasattr(self.cfg.mode, 'two_step_integration') and self.cfg.mode.two_step_integration
+            name = os.path.basename(input_dir_path)
+            if strategy['strategy'] == 'chunk':
+                warnings.append(f"Integration input (~{strategy['token_count']:,} tokens) exceeds the two-step "
+                                f"threshold ({strategy['two_step_threshold']:,}); the run will be high-risk")
+            if strategy['strategy'] == 'direct':
+                prompt = self._format(self.templates['integration_analysis'], warnings, "integration analysis prompt",
+                                      documents_concatenated=concatenated)
+                final_calls.append(self._call(name, "integrate", prompt, warnings))
+            elif two_step:
+                prompt = self._format(self.templates['integration_analysis'], warnings, "integration analysis prompt",
+                                      documents_concatenated=concatenated)
+                final_calls.append(self._call(name, "integrate", prompt, warnings))
+                prompt = self._format(self.templates['integration_report'], warnings, "integration report prompt",
+                                      integration_analysis_summary="")
+                final_calls.append(self._call(name, "integrate", prompt, warnings,
+                                              extra_prompt_tokens=self.estimator.completion_tokens("integrate")))
+            else:
+                prompt = self._format(self.templates['final'], warnings, "final prompt",
+                                      documents_concatenated=concatenated)
+                final_calls.append(self._call(name, "integrate", prompt, warnings))
+        calls.extend(final_calls)
+
+        feedback_calls = []
+        if hasattr(self.cfg.mode, 'feedback_prompt_path') and self.cfg.mode.feedback_prompt_path:
+            feedback_calls.append(self._plan_feedback(os.path.basename(input_dir_path), warnings))
+            calls.extend(feedback_calls)
+
+        critical_path_s = summary_path_s + sum(c['latency_s'] for c in final_calls + feedback_calls)
+        directory = self._directory(input_dir_path, calls, warnings, critical_path_s)
+        directory['documents'] = len(documents)
+        if dedup_stats is not None:
+            directory['dedup'] = dedup_stats
+        if retrieval_stats is not None:
+            directory['retrieval'] = retrieval_stats
+        if strategy is not None:
+            directory['strategy'] = strategy['strategy']
+            directory['content_tokens'] = strategy['token_count']
+        return directory
+
+    def _concatenate(self, documents: List[dict]) -> tuple:
+        """Integration input as main() builds it: (document segments, dedup stats or None)."""
+        dedup_stats = None
+        source_documents = documents
+        if self.cfg.dedup.enabled:
+            from dedup import deduplicate_documents
+            source_documents, dedup_stats = deduplicate_documents(documents, self.cfg.dedup)
+            dedup_stats['tokens_saved'] = (
+                self.llm_adapter.estimate_tokens([doc['content'] for doc in documents])
+                - self.llm_adapter.estimate_tokens([doc['content'] for doc in source_documents]))
+        return document_parts(source_documents), dedup_stats
+
+    def _plan_feedback(self, name: str, warnings: List[str]) -> dict:
+        template = self.templates['feedback']
+        pi_info_path = self.resolve_path('data/target/lab.md')
+        pi_info = ""
+        if os.path.exists(pi_info_path):
+            with open(pi_info_path, 'r', encoding='utf-8') as f:
+                pi_info = f.read()
+        prompt = self._format(template, warnings, "feedback prompt", document_info="", pi_lab_info=pi_info)
+        return self._call(name, "feedback", prompt, warnings, adapter=self.feedback_adapter,
+                          extra_prompt_tokens=self.estimator.completion_tokens("integrate"))
+
+    # --- helpers ---
+
+    def _format(self, template: PromptTemplate, warnings: List[str], label: str, **fields) -> str:
+        try:
+            return template.render(**fields)
+        except PromptTemplateError as e:
+            warnings.append(f"{label} cannot be rendered ({e}); the run would fail here")
+            return template.text
+
+    def _call(self, item: str, stage: str, prompt: str, warnings: List[str], reused: bool = False,
+              adapter: Optional[LLMAdapter] = None, extra_prompt_tokens: int = 0) -> dict:
+        adapter = adapter or self.llm_adapter
+        if reused:
+            return {'item': item, 'stage': stage, 'reused': True, 'prompt_tokens': 0, 'completion_tokens': 0,
+                    'latency_s': 0.0, 'cost_usd': 0.0}
+        prompt_tokens = adapter.estimate_tokens(prompt) + extra_prompt_tokens
+        completion_tokens = min(self.estimator.completion_tokens(stage), adapter.max_tokens)
+        # Only meaningful for models whose context window is known (others use a placeholder default)
+        known_context = any(key in adapter.model_name for key in adapter.model_context_limits)
+        if known_context and prompt_tokens + completion_tokens > adapter.model_context_limit:
+            warnings.append(f"{item} ({stage}): ~{prompt_tokens:,} prompt + ~{completion_tokens:,} completion tokens "
+                            f"exceed the {adapter.model_context_limit:,}-token context of {adapter.model_name}")
+        cost = adapter.estimate_cost(prompt_tokens, completion_tokens) if self._priced(adapter) else None
+        return {
+            'item': item,
+            'stage': stage,
+            'reused': False,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'latency_s': self.estimator.latency_s(stage),
+            'cost_usd': round(cost, 6) if cost is not None else None,
+        }
+
+    @staticmethod
+    def _priced(adapter: LLMAdapter) -> bool:
+        # estimate_cost falls back to litellm for unknown models; the planner must stay offline
+        return any(key in adapter.model_name for key in adapter.model_pricing)
+
+    def _directory(self, input_dir_path: str, calls: List[dict], warnings: List[str],
+                   critical_path_s: float = 0.0) -> dict:
+        new_calls = [c for c in calls if not c['reused']]
+        costs = [c['cost_usd'] for c in new_calls if c['cost_usd'] is not None]
+        return {
+            'input_dir': input_dir_path,
+            'calls': calls,
+            'new_calls': len(new_calls),
+            'reused': len(calls) - len(new_calls),
+            'prompt_tokens': sum(c['prompt_tokens'] for c in new_calls),
+            'completion_tokens': sum(c['completion_tokens'] for c in new_calls),
+            'cost_usd': round(sum(costs), 4) if costs else None,
+            'critical_path_s': round(critical_path_s, 1),
+            'warnings': warnings,
+        }
+
+
+def format_cost(cost: Optional[float]) -> str:
+    return f"${cost:.4f}" if cost is not None else "n/a"
+
+
+def print_plan(plan: dict, show_items: bool = True) -> None:
+    print(f"\n🧭 Run Plan ({plan['mode']} mode, model {plan['model']}, concurrency {plan['concurrency']})")
+    if plan['history']:
+        print(f"   Per-stage latency/output estimates from: {plan['history']}")
+    else:
+        print("   No previous metrics found; using configured per-call defaults")
+
+    for error in plan['prompts']['errors']:
+        print(f"   ❌ {error}")
+
+    for directory in plan['directories']:
+        print(f"\n📁 {directory['input_dir']}")
+        if 'documents' in directory:
+            print(f"  ├─ Documents: {directory['documents']}")
+        if 'dedup' in directory:
+            dedup = directory['dedup']
+            print(f"  ├─ Deduplication: {dedup['exact_duplicates'] + dedup['near_duplicates']} of "
+                  f"{dedup['paragraphs']} paragraphs collapsed (~{dedup['tokens_saved']:,} tokens saved)")
+        if 'retrieval' in directory:
+            retrieval = directory['retrieval']
+            print(f"  ├─ Section retrieval: {retrieval['selected']} of {retrieval['sections']} sections "
+                  f"(~{retrieval['tokens_total']:,} → ~{retrieval['tokens_selected']:,} tokens)")
+        if 'strategy' in directory:
+            print(f"  ├─ Integration strategy: {directory['strategy'].upper()} (~{directory['content_tokens']:,} tokens)")
+        print(f"  ├─ LLM calls: {directory['new_calls']} new, {directory['reused']} reused")
+        print(f"  ├─ Tokens: prompt ~{directory['prompt_tokens']:,} / completion ~{directory['completion_tokens']:,}")
+        print(f"  ├─ Estimated cost: {format_cost(directory['cost_usd'])}")
+        print(f"  └─ Longest dependency chain: ~{directory['critical_path_s'] / 60:.1f} min")
+        if show_items:
+            items: Dict[str, List[dict]] = {}
+            for call in directory['calls']:
+                items.setdefault(call['item'], []).append(call)
+            for item, item_calls in items.items():
+                if all(c['reused'] for c in item_calls):
+                    print(f"      · {item}: reused")
+                    continue
+                tokens = sum(c['prompt_tokens'] for c in item_calls)
+                costs = [c['cost_usd'] for c in item_calls if c['cost_usd'] is not None]
+                stages = ", ".join(sorted({c['stage'] for c in item_calls}))
+                print(f"      · {item}: {len(item_calls)} call(s) [{stages}], ~{tokens:,} prompt tokens, "
+                      f"{format_cost(sum(costs) if costs else None)}")
+        for warning in directory['warnings']:
+            print(f"      ⚠️  {warning}")
+
+    totals = plan['totals']
+    print("\n📊 Plan Totals:")
+    print(f"  ├─ LLM calls: {totals['calls']} new, {totals['reused']} reused")
+    print(f"  ├─ Tokens: prompt ~{totals['prompt_tokens']:,} / completion ~{totals['completion_tokens']:,}")
+    print(f"  ├─ Estimated cost: {format_cost(totals['cost_usd'])}")
+    print(f"  ├─ Estimated wall-clock: ~{totals['wall_clock_s'] / 60:.1f} min at concurrency {plan['concurrency']}")
+    print(f"  └─ Warnings: {totals['warnings']}")
@@ -0,0 +1,202 @@
+# src/profiling.py
+"""
+Sampling profiler attributed to pipeline stages (profile=true).
+
+A background thread samples the Python stack of every thread that is inside a
+RunMetrics span, so work is attributed to the stage it ran in even when stages run
+concurrently. Samples are wall-clock: time blocked in a provider call, sleep or
+lock wait is counted in the frame that waits. Writes collapsed stacks
+(`stage;outer;...;leaf count`, the input format of flamegraph.pl and speedscope)
+for the whole run and per stage, plus a JSON summary, and prints the top
+self-time functions.
+
+Standalone converter/PDF scripts can be profiled the same way:
+
+    python src/profiling.py --output profile_out src/pdf_generator.py
+"""
+
+import argparse
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from output_writer import open_atomic, write_text
+
+# Repo modules are labelled relative to src/, third-party ones relative to site-packages
+_SELF_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _label(code) -> str:
+    path = code.co_filename
+    if path.startswith(_SELF_DIR):
+        path = os.path.relpath(path, _SELF_DIR)
+    else:
+        parts = path.replace("\\", "/").split("/")
+        if "site-packages" in parts:
+            path = "/".join(parts[parts.index("site-packages") + 1:])
+        else:
+            path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class StageProfiler:
+    """Samples threads registered with enter()/exit() every `interval_s` seconds.
+
+    Each sample counts the innermost stage of its thread and the thread's stack
+    (outermost frame first). Threads outside any stage are not sampled.
+    """
+
+    def __init__(self, interval_s: float = 0.005, max_depth: int = 64):
+        self.interval_s = interval_s
+        self.max_depth = max_depth
+        self.samples: Dict[str, Counter] = {}  # stage -> Counter of stack tuples
+        self._stages: Dict[int, List[str]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self.duration_s = 0.0
+        self.ticks = 0
+
+    def enter(self, stage: str) -> None:
+        with self._lock:
+            self._stages.setdefault(threading.get_ident(), []).append(stage)
+
+    def exit(self) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            stack = self._stages.get(ident)
+            if stack:
+                stack.pop()
+                if not stack:
+                    del self._stages[ident]
+
+    def start(self, main_stage: str = "main") -> 'StageProfiler':
+        """Start sampling; the calling thread is attributed to `main_stage` outside other stages."""
+        self.enter(main_stage)
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stage-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration_s = time.perf_counter() - self._started
+        self.exit()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            frames = sys._current_frames()
+            with self._lock:
+                active = {ident: stack[-1] for ident, stack in self._stages.items() if stack}
+            for ident, stage in active.items():
+                frame = frames.get(ident)
+                if frame is None or ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples.setdefault(stage, Counter())[tuple(stack)] += 1
+            self.ticks += 1
+
+    # --- reporting ---
+
+    @property
+    def seconds_per_sample(self) -> float:
+        return self.duration_s / self.ticks if self.ticks else self.interval_s
+
+    def self_time(self, stage: Optional[str] = None) -> Counter:
+        """Leaf-frame sample counts (self time), for one stage or all of them."""
+        counts = Counter()
+        for name, stacks in self.samples.items():
+            if stage is None or name == stage:
+                for stack, count in stacks.items():
+                    counts[stack[-1] if stack else "(idle)"] += count
+        return counts
+
+    def collapsed(self, stage: Optional[str] = None) -> List[str]:
+        lines = []
+        for name, stacks in sorted(self.samples.items()):
+            if stage is not None and name != stage:
+                continue
+            for stack, count in sorted(stacks.items()):
+                lines.append(";".join((name,) + stack) + f" {count}")
+        return lines
+
+    def write(self, output_dir: str, top: int = 20) -> Dict[str, str]:
+        """Write collapsed.txt, <stage>.collapsed.txt and profile.json; returns their paths."""
+        paths = {'collapsed': os.path.join(output_dir, "collapsed.txt"),
+                 'summary': os.path.join(output_dir, "profile.json")}
+        write_text(paths['collapsed'], "\n".join(self.collapsed()) + "\n")
+        for stage in self.samples:
+            safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in stage)
+            write_text(os.path.join(output_dir, f"{safe}.collapsed.txt"), "\n".join(self.collapsed(stage)) + "\n")
+        per_sample = self.seconds_per_sample
+        summary = {
+            'interval_s': self.interval_s,
+            'duration_s': round(self.duration_s, 3),
+            'seconds_per_sample': round(per_sample, 6),
+            'stages': {
+                stage: {
+                    'samples': sum(stacks.values()),
+                    'thread_s': round(sum(stacks.values()) * per_sample, 3),
+                    'top_self': [{'function': name, 'samples': count, 'thread_s': round(count * per_sample, 3)}
+                                 for name, count in self.self_time(stage).most_common(top)],
+                }
+                for stage, stacks in sorted(self.samples.items())
+            },
+            'top_self': [{'function': name, 'samples': count, 'thread_s': round(count * per_sample, 3)}
+                         for name, count in self.self_time().most_common(top)],
+        }
+        with open_atomic(paths['summary']) as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return paths
+
+    def print_summary(self, top: int = 15) -> None:
+        total = sum(sum(stacks.values()) for stacks in self.samples.values())
+        if not total:
+            print("\n🔬 Profile: no samples")
+            return
+        per_sample = self.seconds_per_sample
+        print(f"\n🔬 Profile ({total:,} samples, ~{per_sample * 1000:.1f} ms each, thread time by stage):")
+        for stage, stacks in sorted(self.samples.items(), key=lambda item: -sum(item[1].values())):
+            count = sum(stacks.values())
+            print(f"  ├─ {stage}: {count * per_sample:.2f}s ({count / total:.0%})")
+        print("  Top self time:")
+        for name, count in self.self_time().most_common(top):
+            print(f"  ├─ {count * per_sample:7.2f}s {count / total:5.1%}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a Python script under the stage profiler")
+    parser.add_argument("--output", default="profile", help="output directory")
+    parser.add_argument("--interval", type=float, default=0.005, help="sampling interval (s)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    sys.argv = [args.script] + args.args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    profiler = StageProfiler(args.interval).start(os.path.splitext(os.path.basename(args.script))[0])
+    try:
+        runpy.run_path(args.script, run_name="__main__")
+    finally:
+        profiler.stop()
+        paths = profiler.write(args.output, top=args.top)
+        profiler.print_summary(args.top)
+        print(f"\nProfile saved to: {paths['collapsed']} / {paths['summary']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+# src/progress.py
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from output_writer import open_atomic
+
+
+class ProgressReporter:
+    """Append-only newline-delimited JSON progress feed for one pipeline run.
+
+    Events: run_started, status_server, jobs_added, job_started, job_finished, job_failed, run_finished.
+    Status tools fold these events with ProgressState instead of scanning outputs and logs.
+    A reporter created with path=None writes no file but still keeps the in-process state.
+    """
+
+    def __init__(self, path: Optional[str], mode: str = '', concurrency: int = 1):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        # Live in-process view of the same events (served by status_server)
+        self.state = ProgressState()
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, 'a', encoding='utf-8')
+        self.emit('run_started', mode=mode, concurrency=concurrency, pid=os.getpid())
+
+    @classmethod
+    def for_run(cls, progress_dir: str, mode: str = '', concurrency: int = 1) -> 'ProgressReporter':
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return cls(os.path.join(progress_dir, f"progress_{timestamp}.jsonl"), mode=mode, concurrency=concurrency)
+
+    def emit(self, event: str, **fields) -> None:
+        record = {'ts': round(time.time(), 3), 'event': event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.state.apply(record)
+            if self._file is None or self._file.closed:
+                return
+            self._file.write(line)
+            self._file.flush()
+
+    def add_jobs(self, count: int, kind: str = '') -> None:
+        if count:
+            self.emit('jobs_added', count=count, kind=kind)
+
+    def job_started(self, job_id: str, kind: str = '') -> None:
+        self.emit('job_started', job=job_id, kind=kind)
+
+    def job_ended(self, job_id: str, kind: str, duration_s: float, error: Optional[BaseException] = None) -> None:
+        """Report a job as finished, or as failed if `error` is given."""
+        if error is None:
+            self.emit('job_finished', job=job_id, kind=kind, duration_s=round(duration_s, 3))
+        else:
+            self.emit('job_failed', job=job_id, kind=kind, duration_s=round(duration_s, 3), error=str(error)[:500])
+
+    @contextmanager
+    def job(self, job_id: str, kind: str = ''):
+        """Report a job as started, then finished or failed (the exception is re-raised)."""
+        started = time.perf_counter()
+        self.job_started(job_id, kind)
+        try:
+            yield
+        except BaseException as e:
+            self.job_ended(job_id, kind, time.perf_counter() - started, e)
+            raise
+        self.job_ended(job_id, kind, time.perf_counter() - started)
+
+    def snapshot(self, now: Optional[float] = None) -> dict:
+        """Plain copy of the live state, taken under the lock emit() applies events with."""
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self.state
+            return {
+                'mode': state.mode,
+                'pid': state.pid,
+                'status': state.status,
+                'started_at': state.started_at,
+                'total': state.total,
+                'done': state.done,
+                'failed': state.failed,
+                'in_flight': sorted(state.in_flight),
+                'remaining': state.remaining,
+                'progress': state.progress,
+                'throughput_per_min': state.throughput_per_min(),
+                'eta_s': state.eta_seconds(now),
+            }
+
+    def close(self, status: str = 'ok') -> None:
+        self.emit('run_finished', status=status)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+
+
+class ProgressState:
+    """Aggregated view of a progress feed, updated one event at a time.
+
+    ETA uses an exponentially weighted moving average of the interval between job
+    completions, so it reflects observed throughput including any concurrency.
+    """
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self.mode = ''
+        self.concurrency = 1
+        self.pid = None
+        self.status_url = None
+        self.started_at = None
+        self.finished_at = None
+        self.status = 'running'
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.in_flight: Dict[str, float] = {}
+        self.duration_total = 0.0
+        self.duration_count = 0
+        self.last_completion_at = None
+        self.ewma_interval = None
+        self.last_event_at = None
+
+    def apply(self, event: dict) -> None:
+        kind = event.get('event')
+        ts = event.get('ts', time.time())
+        self.last_event_at = ts
+
+        if kind == 'run_started':
+            self.mode = event.get('mode', '')
+            self.concurrency = event.get('concurrency', 1)
+            self.pid = event.get('pid')
+            self.started_at = ts
+        elif kind == 'status_server':
+            self.status_url = event.get('url')
+        elif kind == 'jobs_added':
+            self.total += event.get('count', 0)
+        elif kind == 'job_started':
+            self.in_flight[event.get('job', '')] = ts
+        elif kind in ('job_finished', 'job_failed'):
+            self.in_flight.pop(event.get('job', ''), None)
+            if kind == 'job_finished':
+                self.done += 1
+            else:
+                self.failed += 1
+            if event.get('duration_s') is not None:
+                self.duration_total += event['duration_s']
+                self.duration_count += 1
+            self._update_throughput(ts)
+        elif kind == 'run_finished':
+            self.status = event.get('status', 'ok')
+            self.finished_at = ts
+
+    def _update_throughput(self, ts: float) -> None:
+        previous = self.last_completion_at if self.last_completion_at is not None else self.started_at
+        self.last_completion_at = ts
+        if previous is None:
+            return
+        interval = max(ts - previous, 1e-3)
+        if self.ewma_interval is None:
+            self.ewma_interval = interval
+        else:
+            self.ewma_interval = self.alpha * interval + (1 - self.alpha) * self.ewma_interval
+
+    @property
+    def completed(self) -> int:
+        return self.done + self.failed
+
+    @property
+    def remaining(self) -> int:
+        return max(self.total - self.completed, 0)
+
+    @property
+    def progress(self) -> float:
+        return self.completed / self.total * 100 if self.total else 0.0
+
+    def mean_duration(self) -> Optional[float]:
+        return self.duration_total / self.duration_count if self.duration_count else None
+
+    def throughput_per_min(self) -> Optional[float]:
+        if not self.ewma_interval:
+            return None
+        return 60.0 / self.ewma_interval
+
+    def eta_seconds(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until all known jobs complete; None until a rate can be estimated."""
+        if self.finished_at is not None or not self.remaining:
+            return 0.0
+        now = now if now is not None else time.time()
+        if self.ewma_interval is not None:
+            since_last = now - (self.last_completion_at or now)
+            return max(self.remaining * self.ewma_interval - since_last, 0.0)
+        if self.duration_count:
+            # No completion interval yet: fall back to mean job time spread over the workers
+            return self.remaining * self.mean_duration() / max(self.concurrency, 1)
+        return None
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ProgressState':
+        state = cls()
+        for key, value in data.items():
+            if hasattr(state, key):
+                setattr(state, key, value)
+        return state
+
+
+class ProgressFeedReader:
+    """Reads new events from a progress feed incrementally, keeping the byte offset.
+
+    The offset and folded state can be persisted to a sidecar checkpoint
+    (`<feed>.offset`), so one-shot status commands only read events appended since
+    the previous invocation instead of replaying the whole feed.
+    """
+
+    def __init__(self, path: str, state: Optional[ProgressState] = None, offset: int = 0):
+        self.path = path
+        self.state = state or ProgressState()
+        self.offset = offset
+
+    @property
+    def checkpoint_path(self) -> str:
+        return self.path + ".offset"
+
+    @classmethod
+    def resume(cls, path: str) -> 'ProgressFeedReader':
+        """Reader restored from the feed's checkpoint, or starting at offset 0 if there is none."""
+        reader = cls(path)
+        try:
+            with open(reader.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            if checkpoint.get('offset', 0) <= os.path.getsize(path):
+                reader.offset = checkpoint['offset']
+                reader.state = ProgressState.from_dict(checkpoint['state'])
+        except (OSError, ValueError, KeyError):
+            pass
+        return reader
+
+    def save(self) -> None:
+        """Persist offset and state atomically next to the feed."""
+        try:
+            with open_atomic(self.checkpoint_path, record=False) as f:
+                json.dump({'offset': self.offset, 'state': self.state.to_dict()}, f, ensure_ascii=False)
+        except OSError:
+            pass
+
+    def poll(self) -> int:
+        """Apply events appended since the last poll; returns how many were read."""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < self.offset:
+                    # Feed was truncated or replaced: start over
+                    self.offset = 0
+                    self.state = ProgressState()
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return 0
+        # Only consume complete lines; a partially written event is picked up next time
+        end = data.rfind(b"\n")
+        if end < 0:
+            return 0
+        count = 0
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self.state.apply(json.loads(line))
+                count += 1
+            except ValueError:
+                continue
+        self.offset += end + 1
+        return count
+
+
+def tail_lines(path: str, count: int = 5, block_size: int = 8192) -> List[str]:
+    """Last `count` non-empty lines of a text file, reading backwards from the end.
+
+    tqdm redraws with carriage returns, so only the last segment of each such line is kept.
+    """
+    def split_lines(data: bytes) -> List[str]:
+        lines = []
+        for raw in data.split(b"\n"):
+            segment = raw.rstrip(b"\r").split(b"\r")[-1].strip()
+            if segment:
+                lines.append(segment.decode('utf-8', errors='replace'))
+        return lines
+
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+            # The first line may be cut in the middle unless we reached the start of the file
+            complete = data.split(b"\n", 1)[1] if position > 0 and b"\n" in data else data
+            if position == 0 or len(split_lines(complete)) >= count:
+                data = complete
+                break
+    return split_lines(data)[-count:]
+
+
+def find_latest_feed(progress_dir: str = "logs") -> Optional[str]:
+    feeds = glob.glob(os.path.join(progress_dir, "progress_*.jsonl"))
+    return max(feeds, key=os.path.getmtime) if feeds else None
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "추정 불가"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}시간 {minutes}분"
+    if minutes:
+        return f"{minutes}분 {secs}초"
+    return f"{secs}초"
@@ -0,0 +1,173 @@
+# src/prompt_registry.py
+import hashlib
+import os
+import string
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Placeholders each prompt role is rendered with (str.format syntax in the prompt files)
+TEMPLATE_FIELDS = {
+    'individual': ('document_content',),
+    'final': ('documents_concatenated',),
+    'integration_analysis': ('documents_concatenated',),
+    'integration_report': ('integration_analysis_summary',),
+    'student': ('query',),
+    'teacher': ('query',),
+    'feedback': ('document_info', 'pi_lab_info'),
+}
+
+
+PromptValue = Union[str, List[str]]
+
+
+def document_parts(documents: Iterable[Dict[str, str]], label: Callable[[str], str] = os.path.basename) -> List[str]:
+    """The `--- DOCUMENT: name ---` concatenation as segments; document contents are referenced, not copied."""
+    parts: List[str] = []
+    for doc in documents:
+        parts.extend((f"--- DOCUMENT: {label(doc['filename'])} ---\n\n", doc['content'], "\n\n"))
+    return parts
+
+
+class PromptTemplateError(ValueError):
+    """A prompt template that cannot be rendered (bad braces, unknown or missing placeholders)."""
+
+
+class PromptTemplate:
+    """A prompt file compiled once into literal segments and placeholder slots.
+
+    Uses str.format syntax (`{field}`, `{{` / `}}` for literal braces), but is parsed
+    only once: render() fills the slots and joins the segments, and inserted values
+    are never parsed, so braces inside documents are always safe. A value may be a
+    list of segments (see document_parts); it is joined straight into the prompt, so
+    a large input is copied once, into the final prompt string. `fingerprint`
+    identifies the template text for cache keys.
+    """
+
+    def __init__(self, name: str, text: str, path: Optional[str] = None):
+        self.name = name
+        self.text = text
+        self.path = path
+        self.fingerprint = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+        self.segments, self.slots = self._compile(text)
+        self._slot_fields = dict(self.slots)
+        self.fields = tuple(dict.fromkeys(field for _, field in self.slots))
+
+    def _compile(self, text: str) -> Tuple[List[str], List[Tuple[int, str]]]:
+        segments: List[str] = []
+        slots: List[Tuple[int, str]] = []
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError as e:
+            raise PromptTemplateError(f"{self._where()}: {e} (use {{{{ and }}}} for literal braces)") from None
+        for literal, field, format_spec, conversion in parsed:
+            if literal:
+                segments.append(literal)
+            if field is None:
+                continue
+            if not field.isidentifier() or format_spec or conversion:
+                raise PromptTemplateError(f"{self._where(field)}: unsupported placeholder "
+                                          f"'{{{field}{'!' + conversion if conversion else ''}"
+                                          f"{':' + format_spec if format_spec else ''}}}'")
+            slots.append((len(segments), field))
+            segments.append("")
+        return segments, slots
+
+    def _where(self, field: Optional[str] = None) -> str:
+        location = self.path or self.name
+        if field is not None and "{" + field in self.text:
+            location += f":{self.text.count(chr(10), 0, self.text.index('{' + field)) + 1}"
+        return location
+
+    def check_fields(self, expected: Tuple[str, ...]) -> List[str]:
+        """Errors for placeholders the caller never fills (rendering would fail on them)."""
+        return [f"{self._where(field)}: unknown placeholder {{{field}}} (expected: {', '.join(expected)})"
+                for field in self.fields if field not in expected]
+
+    def render(self, **values: PromptValue) -> str:
+        pieces: List[str] = []
+        for position, segment in enumerate(self.segments):
+            field = self._slot_fields.get(position)
+            if field is None:
+                pieces.append(segment)
+                continue
+            try:
+                value = values[field]
+            except KeyError:
+                raise PromptTemplateError(f"{self._where(field)}: no value for placeholder {{{field}}}") from None
+            if isinstance(value, str):
+                pieces.append(value)
+            elif isinstance(value, (list, tuple)):
+                pieces.extend(value)
+            else:
+                pieces.append(str(value))
+        return "".join(pieces)
+
+    def with_suffix(self, suffix: str) -> 'PromptTemplate':
+        """This template followed by literal `suffix` (its braces are not placeholders)."""
+        escaped = suffix.replace("{", "{{").replace("}", "}}")
+        return PromptTemplate(self.name, self.text + escaped, path=self.path)
+
+    def __bool__(self) -> bool:
+        return bool(self.text)
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    @classmethod
+    def from_file(cls, name: str, path: str) -> 'PromptTemplate':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(name, f.read(), path=path)
+
+
+class PromptRegistry:
+    """The prompt templates of one run, loaded and validated before any model call.
+
+    load() collects every problem instead of stopping at the first one; validate()
+    raises them together. Roles that were not loaded render as empty templates.
+    """
+
+    def __init__(self, resolve_path: Callable[[str], str] = os.path.abspath):
+        self.resolve_path = resolve_path
+        self.templates: Dict[str, PromptTemplate] = {}
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+
+    def load(self, name: str, path: str) -> Optional[PromptTemplate]:
+        full_path = self.resolve_path(path)
+        try:
+            template = PromptTemplate.from_file(name, full_path)
+        except OSError as e:
+            self.errors.append(f"{name} prompt: cannot read {full_path}: {e.strerror or e}")
+            return None
+        except PromptTemplateError as e:
+            self.errors.append(str(e))
+            return None
+        expected = TEMPLATE_FIELDS.get(name)
+        if expected is not None:
+            self.errors.extend(template.check_fields(expected))
+            missing = [field for field in expected if field not in template.fields]
+            if missing:
+                self.warnings.append(f"{full_path}: no {', '.join('{' + f + '}' for f in missing)} placeholder; "
+                                     f"that input will not reach the model")
+        self.templates[name] = template
+        return template
+
+    def validate(self) -> 'PromptRegistry':
+        if self.errors:
+            raise PromptTemplateError("Invalid prompt templates:\n  " + "\n  ".join(self.errors))
+        return self
+
+    def fingerprints(self) -> Dict[str, str]:
+        return {name: template.fingerprint for name, template in self.templates.items()}
+
+    def __getitem__(self, name: str) -> PromptTemplate:
+        template = self.templates.get(name)
+        return template if template is not None else PromptTemplate(name, "")
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.templates
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.templates)
+
+    def items(self):
+        return self.templates.items()
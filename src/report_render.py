@@ -0,0 +1,169 @@
+# src/report_render.py
+"""
+Deterministic rendering of structured (JSON) reports to Markdown, HTML and PDF.
+
+Structured reports are saved next to their renderings, so every format can be
+re-rendered, or two runs diffed, without calling the model:
+
+    python src/report_render.py outputs/reports --formats md html
+    python src/report_render.py --diff old/teacher/홍길동.json new/teacher/홍길동.json
+"""
+
+import argparse
+import glob
+import html
+import json
+import os
+from typing import Dict, List, Optional
+
+from output_writer import write_text
+
+# Headings of the fixed (non-section) fields, in render order
+FIELD_HEADINGS = {
+    'scores': "📊 학습 상태 개요",
+    'recommendations': "💡 교육적 권장사항",
+    'missions': "🎯 내일의 선택 미션",
+    'message': "💬 응원 메시지",
+}
+DIFF_MARKS = {'added': '+', 'removed': '-', 'changed': '~'}
+
+
+def _section_markdown(section: dict, level: int) -> List[str]:
+    lines = [f"{'#' * min(level, 6)} {section['heading']}", ""]
+    if section.get('body'):
+        lines += [section['body'].strip(), ""]
+    if section.get('items'):
+        lines += [f"- {item}" for item in section['items']] + [""]
+    for subsection in section.get('subsections', []):
+        lines += _section_markdown(subsection, level + 1)
+    return lines
+
+
+def render_markdown(report: dict) -> str:
+    """Markdown for a structured report; the same JSON always renders to the same text."""
+    lines = [f"# {report['title']}", ""]
+    if report.get('summary'):
+        lines += [f"> {report['summary'].strip()}", ""]
+    if report.get('scores'):
+        lines += [f"## {FIELD_HEADINGS['scores']}", "", "| 항목 | 수준 | 근거 |", "|---|---|---|"]
+        lines += [f"| {score['name']} | {score['level']} | {score['evidence'].replace('|', '/')} |"
+                  for score in report['scores']]
+        lines.append("")
+    for section in report.get('sections', []):
+        lines += _section_markdown(section, 2)
+    if report.get('recommendations'):
+        lines += [f"## {FIELD_HEADINGS['recommendations']}", ""]
+        lines += [f"- {item}" for item in report['recommendations']] + [""]
+    if report.get('missions'):
+        lines += [f"## {FIELD_HEADINGS['missions']}", ""]
+        lines += [f"- □ {item}" for item in report['missions']] + [""]
+    if report.get('message'):
+        lines += [f"## {FIELD_HEADINGS['message']}", "", report['message'].strip(), ""]
+    if report.get('closing'):
+        lines += ["---", "", f"*{report['closing'].strip()}*", ""]
+    return "\n".join(lines)
+
+
+def _paragraphs(text: str) -> str:
+    return "".join(f"<p>{html.escape(p.strip())}</p>" for p in text.split("\n\n") if p.strip())
+
+
+def _list(items: List[str]) -> str:
+    return "<ul>" + "".join(f"<li>{html.escape(item)}</li>" for item in items) + "</ul>"
+
+
+def _section_html(section: dict, level: int) -> str:
+    tag = f"h{min(level, 6)}"
+    parts = [f"<{tag}>{html.escape(section['heading'])}</{tag}>"]
+    if section.get('body'):
+        parts.append(_paragraphs(section['body']))
+    if section.get('items'):
+        parts.append(_list(section['items']))
+    parts.extend(_section_html(subsection, level + 1) for subsection in section.get('subsections', []))
+    return "\n".join(parts)
+
+
+def render_html(report: dict, assets=None, html_path: Optional[str] = None) -> str:
+    """Full HTML page for a structured report (model text is escaped, never parsed as markup).
+
+    `assets` is the html_assets bundle; `html_path` is where the page will be written (link mode).
+    """
+    from improved_html_converter import create_full_html
+
+    parts = [f"<h1>{html.escape(report['title'])}</h1>"]
+    if report.get('summary'):
+        parts.append(f"<blockquote>{_paragraphs(report['summary'])}</blockquote>")
+    if report.get('scores'):
+        rows = "".join(f"<tr><td>{html.escape(s['name'])}</td><td>{html.escape(s['level'])}</td>"
+                       f"<td>{html.escape(s['evidence'])}</td></tr>" for s in report['scores'])
+        parts.append(f"<h2>{FIELD_HEADINGS['scores']}</h2>"
+                     f"<table><tr><th>항목</th><th>수준</th><th>근거</th></tr>{rows}</table>")
+    parts.extend(_section_html(section, 2) for section in report.get('sections', []))
+    if report.get('recommendations'):
+        parts.append(f"<h2>{FIELD_HEADINGS['recommendations']}</h2>" + _list(report['recommendations']))
+    if report.get('missions'):
+        parts.append(f"<h2>{FIELD_HEADINGS['missions']}</h2>" + _list([f"□ {m}" for m in report['missions']]))
+    if report.get('message'):
+        parts.append(f"<h2>{FIELD_HEADINGS['message']}</h2>" + _paragraphs(report['message']))
+    if report.get('closing'):
+        parts.append(f"<hr><p><em>{html.escape(report['closing'])}</em></p>")
+    return create_full_html(html.escape(report['title']), "\n".join(parts), assets, html_path)
+
+
+def render_files(report: dict, base_path: str, formats: List[str], assets=None) -> Dict[str, str]:
+    """Write `base_path`.md/.html/.pdf for the requested formats; returns format -> path written.
+
+    PDF is printed from the HTML rendering (kept next to it) by PDFGenerator.
+    """
+    written = {}
+    if 'md' in formats:
+        write_text(f"{base_path}.md", render_markdown(report))
+        written['md'] = f"{base_path}.md"
+    if 'html' in formats or 'pdf' in formats:
+        write_text(f"{base_path}.html", render_html(report, assets, f"{base_path}.html"))
+        written['html'] = f"{base_path}.html"
+    if 'pdf' in formats:
+        from pdf_generator import PDFGenerator
+        if PDFGenerator().generate_pdf_auto(f"{base_path}.html", f"{base_path}.pdf"):
+            written['pdf'] = f"{base_path}.pdf"
+    return written
+
+
+def main():
+    from structured_report import diff_reports
+
+    parser = argparse.ArgumentParser(description='구조화(JSON) 보고서를 LLM 호출 없이 다시 렌더링')
+    parser.add_argument('input', nargs='?', help='JSON 보고서 파일 또는 디렉토리 (하위 디렉토리 포함)')
+    parser.add_argument('--formats', nargs='+', default=['md', 'html'], choices=['md', 'html', 'pdf'])
+    parser.add_argument('--diff', nargs=2, metavar=('OLD', 'NEW'), help='두 JSON 보고서의 변경된 섹션 출력')
+    args = parser.parse_args()
+
+    if args.diff:
+        reports = []
+        for path in args.diff:
+            with open(path, 'r', encoding='utf-8') as f:
+                reports.append(json.load(f))
+        changes = diff_reports(*reports)
+        for change, name in changes:
+            print(f"{DIFF_MARKS[change]} {name}")
+        print(f"{len(changes)}개 항목 변경")
+        return
+    if not args.input:
+        parser.error("input 또는 --diff 가 필요합니다")
+
+    paths = [args.input] if os.path.isfile(args.input) else sorted(
+        glob.glob(os.path.join(args.input, '**', '*.json'), recursive=True))
+    rendered = 0
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+            render_files(report, os.path.splitext(path)[0], args.formats)
+            rendered += 1
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ {path}: {e}")
+    print(f"✅ {rendered}/{len(paths)}개 보고서 렌더링 완료 ({', '.join(args.formats)})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# src/report_sections.py
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional
+
+from output_writer import open_atomic
+from prompt_registry import PromptTemplate, PromptTemplateError
+
+SECTION_INSTRUCTION = (
+    "\n\n---\n\n위 보고서 형식 중 아래 섹션 하나만 작성하세요. "
+    "섹션 제목 줄부터 시작하고, 다른 섹션이나 서론·맺음말은 출력하지 마세요.\n\n"
+)
+_RULE_RE = re.compile(r"^\s*---+\s*$")
+
+
+class ReportSections:
+    """A report prompt split at its section headings into one prompt per section.
+
+    Everything above the first section heading (instructions and `{query}`) is shared
+    by every section prompt. Heading lines right above the first section (the report
+    title) and the note after the closing `---` rule are not generated: they are copied
+    into the assembled report as written.
+    """
+
+    def __init__(self, header: str, sections: List[PromptTemplate], headings: List[str], footer: str):
+        self.header = header
+        self.sections = sections
+        self.headings = headings
+        self.footer = footer
+
+    def assemble(self, texts: List[str]) -> str:
+        parts = [self.header] if self.header else []
+        for heading, text in zip(self.headings, texts):
+            text = text.strip()
+            if not text.startswith("#"):
+                # The model dropped the section title; restore it so the report keeps its outline
+                text = f"{heading}\n\n{text}"
+            parts.append(text)
+        if self.footer:
+            parts.extend(("---", self.footer))
+        return "\n\n".join(parts) + "\n"
+
+
+def _literal(text: str, name: str) -> str:
+    """Template text without placeholders, with `{{`/`}}` unescaped."""
+    template = PromptTemplate(name, text)
+    if template.fields:
+        raise PromptTemplateError(f"{name}: placeholders are only supported above the first section")
+    return template.render()
+
+
+def split_report_template(template: PromptTemplate, heading_level: int = 3) -> ReportSections:
+    """Split `template` at its level-`heading_level` markdown headings (see ReportSections)."""
+    marker = "#" * heading_level + " "
+    lines = template.text.split("\n")
+    starts = [i for i, line in enumerate(lines) if line.startswith(marker)]
+    if not starts:
+        raise PromptTemplateError(f"{template.path or template.name}: no '{marker.strip()}' section headings to split on")
+
+    preamble = lines[:starts[0]]
+    if set(template.fields) - set(PromptTemplate(template.name, "\n".join(preamble)).fields):
+        raise PromptTemplateError(f"{template.path or template.name}: section generation needs every placeholder "
+                                  f"above the first section heading")
+    # Report title: heading lines after the last rule of the preamble
+    title_start = max((i + 1 for i, line in enumerate(preamble) if _RULE_RE.match(line)), default=0)
+    header = "\n".join(line for line in preamble[title_start:] if line.startswith("#"))
+
+    # Closing note: text after the last rule that follows the last section heading
+    body_end = len(lines)
+    for i in range(len(lines) - 1, starts[-1], -1):
+        if _RULE_RE.match(lines[i]):
+            body_end = i
+            break
+    footer = "\n".join(lines[body_end + 1:]).strip()
+
+    shared_lines = list(preamble)
+    while shared_lines and (not shared_lines[-1].strip() or _RULE_RE.match(shared_lines[-1])):
+        shared_lines.pop()
+    shared = "\n".join(shared_lines) + SECTION_INSTRUCTION
+    sections = []
+    headings = []
+    for number, start in enumerate(starts):
+        end = starts[number + 1] if number + 1 < len(starts) else body_end
+        section_text = "\n".join(lines[start:end]).strip()
+        sections.append(PromptTemplate(f"{template.name}/{number + 1}", shared + section_text, path=template.path))
+        headings.append(_literal(lines[start], f"{template.name}/{number + 1} heading"))
+    return ReportSections(_literal(header, f"{template.name} title"), sections, headings,
+                          _literal(footer, f"{template.name} footer"))
+
+
+def section_cache_key(model_name: str, section: PromptTemplate, input_sha256: str) -> str:
+    """Cache key of one generated section: the model, the section prompt and the input."""
+    return hashlib.sha256(f"{model_name}\0{section.fingerprint}\0{input_sha256}".encode('utf-8')).hexdigest()[:24]
+
+
+class SectionCache:
+    """Generated sections of one report, saved next to it as JSON (cache key -> heading and text).
+
+    Entries are looked up by key alone, so reordering or inserting sections in the
+    prompt does not invalidate the sections that did not change.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries: Dict[str, dict] = json.load(f).get('sections', {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        return entry['text'] if entry is not None else None
+
+    def save(self, entries: Dict[str, dict]) -> None:
+        with open_atomic(self.path, record=False) as f:
+            json.dump({'sections': entries}, f, ensure_ascii=False, indent=2)
+        self.entries = entries
@@ -0,0 +1,270 @@
+# src/section_index.py
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from output_writer import open_atomic
+
+INDEX_VERSION = 1
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_PLACEHOLDER_RE = re.compile(r"(?<!\{)\{[A-Za-z_]\w*\}(?!\})")
+
+
+def terms(text: str) -> List[str]:
+    """BM25 terms: lowercased words, plus character bigrams of non-ASCII words.
+
+    Korean words carry particles and endings ("분석을", "분석의"), so their bigrams let
+    inflected forms still match the stem.
+    """
+    output = []
+    for word in _WORD_RE.findall(text.lower()):
+        if word.isascii():
+            if len(word) > 1:
+                output.append(word)
+            continue
+        output.append(word)
+        if len(word) > 2:
+            output.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return output
+
+
+def split_sections(content: str, max_tokens: int, estimate_tokens: Callable[[str], int]) -> List[Dict[str, str]]:
+    """Split a markdown document into heading sections; sections over `max_tokens` are cut at paragraphs.
+
+    Each section is {'heading': 'H1 > H2', 'text': body}. Headings inside fenced code
+    blocks are ignored and heading-only sections are dropped.
+    """
+    sections = []
+    path: List[Tuple[int, str]] = []
+    body: List[str] = []
+    in_fence = False
+
+    def flush():
+        text = "\n".join(body).strip()
+        body.clear()
+        if not text:
+            return
+        heading = " > ".join(title for _, title in path)
+        chunk: List[str] = []
+        chunk_tokens = 0
+        for paragraph in re.split(r"\n\s*\n", text):
+            tokens = estimate_tokens(paragraph)
+            if chunk and chunk_tokens + tokens > max_tokens:
+                sections.append({'heading': heading, 'text': "\n\n".join(chunk)})
+                chunk, chunk_tokens = [], 0
+            chunk.append(paragraph)
+            chunk_tokens += tokens
+        if chunk:
+            sections.append({'heading': heading, 'text': "\n\n".join(chunk)})
+
+    for line in content.split("\n"):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING_RE.match(line)
+        if match is None:
+            body.append(line)
+            continue
+        flush()
+        level = len(match.group(1))
+        while path and path[-1][0] >= level:
+            path.pop()
+        path.append((level, match.group(2)))
+    flush()
+    return sections
+
+
+def template_headings(template_text: str) -> List[str]:
+    """Distinct headings of a prompt template, the default retrieval queries.
+
+    Only the report outline counts: reading stops at the first `{placeholder}`, and the
+    heading right above it (the label of the inserted documents) is dropped.
+    """
+    headings = []
+    in_fence = False
+    for line in template_text.split("\n"):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        if _PLACEHOLDER_RE.search(line):
+            if headings and not headings[-1][1]:
+                headings.pop()
+            break
+        match = None if in_fence else _HEADING_RE.match(line)
+        if match is not None:
+            headings.append([match.group(2).replace("*", "").strip(), False])
+        elif headings and line.strip():
+            headings[-1][1] = True  # the heading has a body of its own
+    seen = set()
+    output = []
+    for heading, _ in headings:
+        key = tuple(terms(heading))
+        if key and key not in seen:
+            seen.add(key)
+            output.append(heading)
+    return output
+
+
+class SectionIndex:
+    """BM25 index over the heading sections of a directory's markdown documents.
+
+    Persisted as JSON (sections, their token estimates and term frequencies) keyed by
+    file name and content hash, so `update()` only re-splits files that changed since
+    the index was saved. The inverted index is rebuilt in memory after each update.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_section_tokens: int = 800,
+                 estimate_tokens: Optional[Callable[[str], int]] = None, k1: float = 1.5, b: float = 0.75):
+        if estimate_tokens is None:
+            from llm_adapter import LLMAdapter
+            estimate_tokens = LLMAdapter.estimate_tokens
+        self.path = path
+        self.max_section_tokens = max_section_tokens
+        self.estimate_tokens = estimate_tokens
+        self.k1 = k1
+        self.b = b
+        self.files: Dict[str, dict] = {}  # filename -> {'sha256': ..., 'sections': [...]}
+        self._sections: List[Tuple[str, int]] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+        self._average_length = 0.0
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'SectionIndex':
+        """Index saved at `path`; starts empty if missing, unreadable or built with other settings."""
+        index = cls(path, **kwargs)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return index
+        if data.get('version') == INDEX_VERSION and data.get('max_section_tokens') == index.max_section_tokens:
+            index.files = data.get('files', {})
+        index._rebuild()
+        return index
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        data = {'version': INDEX_VERSION, 'max_section_tokens': self.max_section_tokens, 'files': self.files}
+        with open_atomic(path, record=False) as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def update(self, documents: List[Dict[str, str]]) -> Dict[str, int]:
+        """Sync the index with `documents` (FileHandler.read_markdown_files output)."""
+        stats = {'added': 0, 'updated': 0, 'reused': 0, 'removed': 0}
+        files = {}
+        for doc in documents:
+            sha256 = hashlib.sha256(doc['content'].encode('utf-8')).hexdigest()
+            previous = self.files.get(doc['filename'])
+            if previous is not None and previous['sha256'] == sha256:
+                files[doc['filename']] = previous
+                stats['reused'] += 1
+                continue
+            stats['updated' if previous is not None else 'added'] += 1
+            sections = split_sections(doc['content'], self.max_section_tokens, self.estimate_tokens)
+            for section in sections:
+                section['tokens'] = self.estimate_tokens(section['text'])
+                section['tf'] = dict(Counter(terms(f"{section['heading']}\n{section['text']}")))
+            files[doc['filename']] = {'sha256': sha256, 'sections': sections}
+        stats['removed'] = len(set(self.files) - set(files))
+        self.files = files
+        self._rebuild()
+        return stats
+
+    def _rebuild(self) -> None:
+        self._sections = []
+        self._postings = {}
+        self._lengths = []
+        for filename, entry in self.files.items():
+            for position, section in enumerate(entry['sections']):
+                section_id = len(self._sections)
+                self._sections.append((filename, position))
+                self._lengths.append(sum(section['tf'].values()))
+                for term, count in section['tf'].items():
+                    self._postings.setdefault(term, []).append((section_id, count))
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+
+    def section(self, section_id: int) -> dict:
+        filename, position = self._sections[section_id]
+        return self.files[filename]['sections'][position]
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """Top `top_k` (section_id, score) pairs for `query`, best first."""
+        count = len(self._sections)
+        scores: Dict[int, float] = {}
+        for term in set(terms(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for section_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[section_id] / self._average_length)
+                scores[section_id] = scores.get(section_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+
+    def headings(self) -> List[str]:
+        """Distinct innermost section headings in document order (the default retrieval queries)."""
+        seen = set()
+        output = []
+        for filename, position in self._sections:
+            heading = self.files[filename]['sections'][position]['heading'].split(" > ")[-1]
+            key = tuple(terms(heading))
+            if key and key not in seen:
+                seen.add(key)
+                output.append(heading)
+        return output
+
+    def select(self, queries: Optional[List[str]], top_k: int, token_budget: int) -> Tuple[List[Dict[str, str]], dict]:
+        """Sections most relevant to `queries` that fit in `token_budget`, regrouped per document.
+
+        Queries take turns: every query's best section is considered before any query's
+        second best, so each report heading gets some context before the budget runs out.
+        Sections that no longer fit are skipped. Callers pass the report template's
+        headings (template_headings) unless retrieval.queries is set; without queries the
+        index's own headings are used (document order if there are none). Returns documents in the FileHandler format plus selection stats.
+        """
+        queries = queries or self.headings()
+        if queries:
+            rankings = [self.search(query, top_k) for query in queries]
+        else:
+            # No headings at all: keep sections in document order
+            rankings = [[(section_id, 0.0) for section_id in range(len(self._sections))]]
+        chosen = set()
+        used_tokens = 0
+        for rank in range(max(map(len, rankings), default=0)):
+            for ranking in rankings:
+                if rank >= len(ranking):
+                    continue
+                section_id = ranking[rank][0]
+                tokens = self.section(section_id)['tokens']
+                if section_id in chosen or used_tokens + tokens > token_budget:
+                    continue
+                chosen.add(section_id)
+                used_tokens += tokens
+
+        documents = []
+        section_id = 0
+        for filename, entry in self.files.items():
+            parts = []
+            for section in entry['sections']:
+                if section_id in chosen:
+                    parts.append(f"## {section['heading']}\n\n{section['text']}" if section['heading'] else section['text'])
+                section_id += 1
+            if parts:
+                header = f"[관련 섹션 {len(parts)}/{len(entry['sections'])}개 발췌]"
+                documents.append({'filename': filename, 'content': header + "\n\n" + "\n\n".join(parts) + "\n"})
+        stats = {
+            'queries': len(queries),
+            'sections': len(self._sections),
+            'selected': len(chosen),
+            'tokens_selected': used_tokens,
+            'tokens_total': sum(self.section(i)['tokens'] for i in range(len(self._sections))),
+            'token_budget': token_budget,
+        }
+        return documents, stats
@@ -0,0 +1,143 @@
+# src/status_server.py
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from metrics import RunMetrics, describe
+from progress import ProgressReporter
+
+
+class StatusServer:
+    """Optional local HTTP endpoint exposing live run status from inside the pipeline process.
+
+    GET /status   JSON snapshot (progress, queue depth, in-flight LLM calls, recent latencies, errors)
+    GET /metrics  the same numbers in Prometheus text exposition format
+    """
+
+    def __init__(self, progress: ProgressReporter, metrics: RunMetrics,
+                 host: str = "127.0.0.1", port: int = 0, run_name: str = ""):
+        self.progress = progress
+        self.metrics = metrics
+        self.run_name = run_name
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StatusServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name="status-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        # Copied under the reporter's lock: pipeline threads update the state while requests are served
+        state = self.progress.snapshot(now)
+        recent = self.metrics.recent_calls(20)
+        llm = self.metrics.summary()['llm']
+        return {
+            'run': {
+                'name': self.run_name,
+                'mode': state['mode'],
+                'pid': state['pid'],
+                'status': state['status'],
+                'uptime_s': round(now - state['started_at'], 1) if state['started_at'] else None,
+            },
+            'progress': {
+                'total': state['total'],
+                'done': state['done'],
+                'failed': state['failed'],
+                'in_flight': state['in_flight'],
+                'queue_depth': max(state['remaining'] - len(state['in_flight']), 0),
+                'percent': round(state['progress'], 1),
+                'throughput_per_min': state['throughput_per_min'],
+                'eta_s': state['eta_s'],
+            },
+            'llm': {
+                'in_flight': self.metrics.in_flight_calls,
+                'calls': llm['calls'],
+                'errors': llm['errors'],
+                'prompt_tokens': llm['prompt_tokens'],
+                'completion_tokens': llm['completion_tokens'],
+                'cost_usd': llm['cost_usd'],
+                'recent_latency_s': describe([c['duration_s'] for c in recent]),
+                'recent': [{'stage': c['stage'], 'duration_s': c['duration_s'], 'status': c['status']}
+                           for c in recent],
+            },
+        }
+
+    def prometheus(self) -> str:
+        snap = self.snapshot()
+        progress = snap['progress']
+        llm = snap['llm']
+        labels = f'run="{self.run_name}",mode="{snap["run"]["mode"]}"'
+        samples = [
+            ('critical_analyzer_jobs_known', 'gauge', 'Jobs known for this run', progress['total']),
+            ('critical_analyzer_jobs_done_total', 'counter', 'Jobs finished successfully', progress['done']),
+            ('critical_analyzer_jobs_failed_total', 'counter', 'Jobs that failed', progress['failed']),
+            ('critical_analyzer_jobs_in_flight', 'gauge', 'Jobs currently running', len(progress['in_flight'])),
+            ('critical_analyzer_queue_depth', 'gauge', 'Jobs waiting to start', progress['queue_depth']),
+            ('critical_analyzer_eta_seconds', 'gauge', 'Estimated seconds to completion', progress['eta_s']),
+            ('critical_analyzer_llm_in_flight', 'gauge', 'LLM calls currently in flight', llm['in_flight']),
+            ('critical_analyzer_llm_calls_total', 'counter', 'LLM calls completed', llm['calls']),
+            ('critical_analyzer_llm_errors_total', 'counter', 'LLM calls that failed', llm['errors']),
+            ('critical_analyzer_llm_prompt_tokens_total', 'counter', 'Prompt tokens sent', llm['prompt_tokens']),
+            ('critical_analyzer_llm_completion_tokens_total', 'counter', 'Completion tokens received',
+             llm['completion_tokens']),
+            ('critical_analyzer_llm_cost_usd_total', 'counter', 'Estimated LLM cost in USD', llm['cost_usd']),
+            ('critical_analyzer_llm_recent_latency_p50_seconds', 'gauge', 'p50 latency of the last 20 calls',
+             llm['recent_latency_s']['p50']),
+            ('critical_analyzer_llm_recent_latency_p95_seconds', 'gauge', 'p95 latency of the last 20 calls',
+             llm['recent_latency_s']['p95']),
+        ]
+        lines = []
+        for name, metric_type, help_text, value in samples:
+            if value is None:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name}{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0].rstrip('/') or '/status'
+                try:
+                    if path == '/status':
+                        body = json.dumps(server.snapshot(), ensure_ascii=False).encode('utf-8')
+                        content_type = 'application/json; charset=utf-8'
+                    elif path == '/metrics':
+                        body = server.prometheus().encode('utf-8')
+                        content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                    else:
+                        self.send_error(404)
+                        return
+                except Exception as e:
+                    logging.warning(f"Status endpoint error: {e}")
+                    self.send_error(500)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Keep polling requests out of the batch log
+                pass
+
+        return Handler
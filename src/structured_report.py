@@ -0,0 +1,120 @@
+# src/structured_report.py
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_TYPE_CHECKS = {
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+    'string': lambda value: isinstance(value, str),
+    'integer': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'number': lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    'boolean': lambda value: isinstance(value, bool),
+}
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*\n(.*?)\n\s*```\s*$", re.DOTALL)
+
+
+class StructuredReportError(ValueError):
+    """The model response is not a JSON report matching the schema."""
+
+
+def load_schema(schema_dir: str, report_type: str) -> dict:
+    with open(os.path.join(schema_dir, f"{report_type}.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def validate(instance: Any, schema: dict, root: Optional[dict] = None, path: str = "$") -> List[str]:
+    """Errors of `instance` against a JSON Schema subset (no external dependency).
+
+    Supports type, required, properties, items, enum, minItems/maxItems,
+    minimum/maximum and local `$ref`s to `#/definitions/<name>`.
+    """
+    root = root if root is not None else schema
+    if '$ref' in schema:
+        name = schema['$ref'].rsplit('/', 1)[-1]
+        schema = root.get('definitions', {}).get(name, {})
+    errors: List[str] = []
+    expected = schema.get('type')
+    if expected and not _TYPE_CHECKS[expected](instance):
+        return [f"{path}: expected {expected}, got {type(instance).__name__}"]
+    if 'enum' in schema and instance not in schema['enum']:
+        errors.append(f"{path}: {instance!r} is not one of {schema['enum']}")
+    if isinstance(instance, dict):
+        for key in schema.get('required', []):
+            if key not in instance:
+                errors.append(f"{path}: missing required '{key}'")
+        for key, subschema in schema.get('properties', {}).items():
+            if key in instance:
+                errors.extend(validate(instance[key], subschema, root, f"{path}.{key}"))
+    elif isinstance(instance, list):
+        if len(instance) < schema.get('minItems', 0):
+            errors.append(f"{path}: expected at least {schema['minItems']} item(s)")
+        if 'maxItems' in schema and len(instance) > schema['maxItems']:
+            errors.append(f"{path}: expected at most {schema['maxItems']} item(s)")
+        if 'items' in schema:
+            for index, item in enumerate(instance):
+                errors.extend(validate(item, schema['items'], root, f"{path}[{index}]"))
+    elif isinstance(instance, (int, float)):
+        if 'minimum' in schema and instance < schema['minimum']:
+            errors.append(f"{path}: {instance} is below {schema['minimum']}")
+        if 'maximum' in schema and instance > schema['maximum']:
+            errors.append(f"{path}: {instance} is above {schema['maximum']}")
+    return errors
+
+
+def output_instruction(schema: dict) -> str:
+    """Prompt suffix asking for one JSON object matching `schema` instead of Markdown."""
+    return (
+        "\n\n---\n\n## 출력 형식 (JSON)\n"
+        "위 보고서 형식의 섹션 구성과 내용 기준을 그대로 따르되, Markdown 대신 아래 JSON 스키마에 맞는 "
+        "JSON 객체 하나만 출력하세요. 코드 블록이나 설명 문장 없이 JSON만 출력합니다. "
+        "각 섹션의 heading 에는 보고서 형식의 제목을 그대로 쓰고, 목록은 items 배열로 작성하세요.\n\n"
+        + json.dumps(schema, ensure_ascii=False, indent=2)
+    )
+
+
+def parse_report(response: str, schema: dict) -> dict:
+    """JSON report from a model response (a ```json fence or surrounding text is tolerated)."""
+    text = response.strip()
+    fenced = _FENCE_RE.match(text)
+    if fenced:
+        text = fenced.group(1)
+    elif not text.startswith("{"):
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise StructuredReportError("response contains no JSON object")
+        text = text[start:end + 1]
+    try:
+        report = json.loads(text)
+    except ValueError as e:
+        raise StructuredReportError(f"invalid JSON: {e}") from None
+    errors = validate(report, schema)
+    if errors:
+        raise StructuredReportError("; ".join(errors[:5]) + (f" (+{len(errors) - 5} more)" if len(errors) > 5 else ""))
+    return report
+
+
+def diff_reports(old: dict, new: dict) -> List[Tuple[str, str]]:
+    """(change, field or section heading) pairs between two structured reports of the same type."""
+    changes: List[Tuple[str, str]] = []
+    for key in sorted(set(old) | set(new)):
+        if key == 'sections':
+            continue
+        if key not in old:
+            changes.append(('added', key))
+        elif key not in new:
+            changes.append(('removed', key))
+        elif old[key] != new[key]:
+            changes.append(('changed', key))
+    old_sections: Dict[str, dict] = {s.get('heading', ''): s for s in old.get('sections', [])}
+    new_sections: Dict[str, dict] = {s.get('heading', ''): s for s in new.get('sections', [])}
+    for heading, section in new_sections.items():
+        if heading not in old_sections:
+            changes.append(('added', f"sections/{heading}"))
+        elif old_sections[heading] != section:
+            changes.append(('changed', f"sections/{heading}"))
+    for heading in old_sections:
+        if heading not in new_sections:
+            changes.append(('removed', f"sections/{heading}"))
+    return changes